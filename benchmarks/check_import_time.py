@@ -0,0 +1,112 @@
+"""
+Check that the lightweight modules import quickly and without heavy dependencies.
+
+Each module is imported in a fresh interpreter under ``python -X importtime``,
+after numpy and pandas (which every module needs) are already loaded. Its
+cumulative import time must stay within a budget, and none of the heavy
+libraries (sklearn, matplotlib, seaborn, xgboost, lightgbm, imblearn) may be
+loaded.
+
+Usage:
+    python benchmarks/check_import_time.py
+    python benchmarks/check_import_time.py --budget-ms 50 --modules data_loader metrics
+
+Exits with status 1 when a module is over budget or loads a heavy dependency.
+"""
+
+import re
+import sys
+import argparse
+import statistics
+import subprocess
+from pathlib import Path
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+
+# Modules on the load-and-score path, and the libraries they must not import
+LIGHT_MODULES = ['data_loader', 'preprocessing', 'metrics', 'model_evaluation', 'model_io', 'training',
+                 'compiled_trees', 'out_of_core', 'imbalance']
+HEAVY_MODULES = ['sklearn', 'matplotlib', 'seaborn', 'xgboost', 'lightgbm', 'imblearn']
+
+# Shared by every module, so imported first and not counted
+BASELINE_MODULES = ['numpy', 'pandas']
+
+_LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|\s*(\S+)')
+
+
+def measure_import(module, src_dir):
+    """
+    Import a module in a fresh interpreter, after BASELINE_MODULES, and parse its -X importtime report.
+    
+    Parameters:
+    -----------
+    module : str
+        Module to import
+    src_dir : str or Path
+        Directory prepended to sys.path
+    
+    Returns:
+    --------
+    float, set
+        Cumulative import time of the module in milliseconds, and the names
+        of the top-level packages loaded by it
+    """
+    baseline = ', '.join(name for name in BASELINE_MODULES if name != module)
+    code = f'import sys; sys.path.insert(0, {str(src_dir)!r}); import {baseline}; import {module}'
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                            capture_output=True, text=True, cwd=REPO_DIR)
+    if result.returncode != 0:
+        raise RuntimeError(f'import {module} failed:\n{result.stderr[-2000:]}')
+    
+    lines = [match.groups() for match in map(_LINE.match, result.stderr.splitlines()) if match]
+    # Children are reported before their parent, so the module's own imports precede its line
+    end = max(i for i, (_, _, name) in enumerate(lines) if name == module)
+    start = max([i + 1 for i, (_, _, name) in enumerate(lines[:end]) if name in BASELINE_MODULES], default=0)
+    loaded = {name.split('.')[0] for _, _, name in lines[start:end + 1]}
+    return int(lines[end][1]) / 1000, loaded
+
+
+def median_import_ms(module, src_dir, repeats):
+    times = []
+    loaded = set()
+    for _ in range(repeats):
+        ms, modules = measure_import(module, src_dir)
+        times.append(ms)
+        loaded |= modules
+    return statistics.median(times), loaded
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Import-time budget check')
+    parser.add_argument('--modules', nargs='+', default=LIGHT_MODULES,
+                        help='modules to check')
+    parser.add_argument('--budget-ms', type=float, default=100.0,
+                        help='allowed import time of each module beyond numpy and pandas')
+    parser.add_argument('--repeats', type=int, default=3,
+                        help='imports per module; the median is compared with the budget')
+    parser.add_argument('--src', default=str(REPO_DIR / 'src'),
+                        help='source directory to import from')
+    args = parser.parse_args(argv)
+    
+    baseline_ms, _ = median_import_ms(BASELINE_MODULES[-1], args.src, args.repeats)
+    print(f"{' + '.join(BASELINE_MODULES)}: {baseline_ms:.0f} ms (loaded first, not counted)")
+    print(f"{'module':<20} {'ms':>8} {'budget':>7}  heavy imports")
+    
+    failures = 0
+    for module in args.modules:
+        own_ms, loaded = median_import_ms(module, args.src, args.repeats)
+        heavy = sorted(loaded & set(HEAVY_MODULES))
+        ok = own_ms <= args.budget_ms and not heavy
+        failures += not ok
+        print(f"{module:<20} {own_ms:8.0f} {args.budget_ms:7.0f}  "
+              f"{', '.join(heavy) or '-'}{'' if ok else '   FAIL'}")
+    
+    if failures:
+        print(f"\n{failures} module(s) over the import budget")
+        return 1
+    print("\nAll modules within the import budget")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,146 @@
+"""
+Compare two benchmark runs and flag regressions.
+
+Either compares two JSON files written by run_benchmarks.py, or checks out
+two commits into temporary git worktrees and benchmarks both with the
+current suite (on the same generated data) before comparing them.
+
+Usage:
+    python benchmarks/compare_benchmarks.py benchmarks/results/abc1234.json benchmarks/results/def5678.json
+    python benchmarks/compare_benchmarks.py --commits main HEAD -- --sizes 4000 50000 --days 60
+
+Arguments after '--' are passed to run_benchmarks.py.
+"""
+
+import sys
+import json
+import argparse
+import tempfile
+import subprocess
+from pathlib import Path
+
+BENCHMARK_DIR = Path(__file__).resolve().parent
+REPO_DIR = BENCHMARK_DIR.parent
+
+
+def _index(report):
+    return {(record['employees'], record['stage']): record for record in report['results']}
+
+
+def compare_reports(base, new, threshold=0.10, min_seconds=0.1, min_megabytes=8):
+    """
+    Compare the stage timings and peak memory of two benchmark reports.
+    
+    Parameters:
+    -----------
+    base, new : dict
+        Reports written by run_benchmarks.py
+    threshold : float
+        Relative slowdown (or memory growth) counted as a regression
+    min_seconds : float
+        Stages faster than this in both runs are too noisy to flag
+    min_megabytes : float
+        Memory growth below this is too noisy to flag
+    
+    Returns:
+    --------
+    list, list
+        One row per (size, stage) present in either report, and the rows
+        flagged as regressions
+    """
+    base_records, new_records = _index(base), _index(new)
+    rows = []
+    regressions = []
+    # Keep the order in which the stages ran
+    for key in dict.fromkeys(list(base_records) + list(new_records)):
+        before, after = base_records.get(key, {}), new_records.get(key, {})
+        row = {'employees': key[0], 'stage': key[1],
+               'base_seconds': before.get('seconds'), 'new_seconds': after.get('seconds'),
+               'base_peak_mb': before.get('peak_increase_mb'), 'new_peak_mb': after.get('peak_increase_mb'),
+               'note': ''}
+        if 'error' in after and 'error' not in before:
+            row['note'] = 'FAILS'
+        elif row['base_seconds'] is not None and row['new_seconds'] is not None:
+            row['time_ratio'] = row['new_seconds'] / max(row['base_seconds'], 1e-9)
+            slower = (row['time_ratio'] > 1 + threshold
+                      and max(row['base_seconds'], row['new_seconds']) >= min_seconds)
+            more_memory = (row['base_peak_mb'] is not None and row['new_peak_mb'] is not None
+                           and row['new_peak_mb'] > (1 + threshold) * max(row['base_peak_mb'], 0) + min_megabytes)
+            row['note'] = ' '.join(flag for flag, hit in (('SLOWER', slower), ('MORE MEMORY', more_memory)) if hit)
+        elif not before:
+            row['note'] = 'new'
+        if row['note'] and row['note'] != 'new':
+            regressions.append(row)
+        rows.append(row)
+    return rows, regressions
+
+
+def _fmt(value, spec):
+    return format(value, spec) if value is not None else format('-', '>' + spec.split('.')[0])
+
+
+def print_comparison(base, new, rows):
+    print(f"Base: {base['commit']} ({base['timestamp']})   New: {new['commit']} ({new['timestamp']})")
+    print(f"{'employees':>10} {'stage':<32} {'base s':>9} {'new s':>9} {'ratio':>7} "
+          f"{'base MB':>8} {'new MB':>8}  note")
+    for row in rows:
+        print(f"{row['employees']:>10} {row['stage']:<32} {_fmt(row['base_seconds'], '9.2f')} "
+              f"{_fmt(row['new_seconds'], '9.2f')} {_fmt(row.get('time_ratio'), '7.2f')} "
+              f"{_fmt(row['base_peak_mb'], '8.0f')} {_fmt(row['new_peak_mb'], '8.0f')}  {row['note']}")
+
+
+def benchmark_commit(commit, output, suite_args):
+    """
+    Benchmark a commit's src/ from a temporary worktree with the current suite.
+    """
+    with tempfile.TemporaryDirectory(prefix='bench-') as tmp:
+        worktree = Path(tmp) / 'checkout'
+        subprocess.run(['git', 'worktree', 'add', '--detach', str(worktree), commit], cwd=REPO_DIR, check=True)
+        try:
+            subprocess.run([sys.executable, str(BENCHMARK_DIR / 'run_benchmarks.py'),
+                            '--src', str(worktree / 'src'), '--output', str(output)] + suite_args,
+                           check=True)
+        finally:
+            subprocess.run(['git', 'worktree', 'remove', '--force', str(worktree)], cwd=REPO_DIR, check=True)
+    with open(output) as f:
+        return json.load(f)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compare two benchmark runs')
+    parser.add_argument('reports', nargs='*', help='base and new JSON reports')
+    parser.add_argument('--commits', nargs=2, metavar=('BASE', 'NEW'),
+                        help='benchmark two commits instead of reading reports')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help='relative slowdown or memory growth flagged as a regression')
+    argv = list(sys.argv[1:] if argv is None else argv)
+    suite_args = []
+    if '--' in argv:
+        suite_args = argv[argv.index('--') + 1:]
+        argv = argv[:argv.index('--')]
+    args = parser.parse_args(argv)
+    
+    if args.commits:
+        results_dir = BENCHMARK_DIR / 'results'
+        reports = [benchmark_commit(commit, results_dir / f'compare-{commit.replace("/", "_")}.json', suite_args)
+                   for commit in args.commits]
+    elif len(args.reports) == 2:
+        reports = []
+        for path in args.reports:
+            with open(path) as f:
+                reports.append(json.load(f))
+    else:
+        parser.error('give two reports or --commits BASE NEW')
+    
+    base, new = reports
+    rows, regressions = compare_reports(base, new, threshold=args.threshold)
+    print_comparison(base, new, rows)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) above {args.threshold:.0%}")
+        return 1
+    print("\nNo regressions")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
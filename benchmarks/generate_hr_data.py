@@ -0,0 +1,297 @@
+"""
+Synthetic HR extract generator for benchmarking at scale.
+
+Writes general_data.csv, manager_survey_data.csv, employee_survey_data.csv
+and the in/out badge files (in_out_time.zip and/or in_time.csv and
+out_time.csv) in the layout of the files in data/, for any number of
+employees and working days. Column distributions follow the 4,410-employee
+sample, and attrition depends on tenure, travel, satisfaction and the
+hours worked, so the models have something to learn.
+
+Usage:
+    python benchmarks/generate_hr_data.py --employees 50000 --days 261 --output bench_data/50k
+"""
+
+import os
+import sys
+import time
+import zipfile
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+
+# Category frequencies of the sample in data/
+CATEGORIES = {
+    'BusinessTravel': {'Travel_Rarely': 0.71, 'Travel_Frequently': 0.188, 'Non-Travel': 0.102},
+    'Department': {'Research & Development': 0.654, 'Sales': 0.303, 'Human Resources': 0.043},
+    'EducationField': {'Life Sciences': 0.412, 'Medical': 0.316, 'Marketing': 0.108,
+                       'Technical Degree': 0.09, 'Other': 0.056, 'Human Resources': 0.018},
+    'Gender': {'Male': 0.6, 'Female': 0.4},
+    'JobRole': {'Sales Executive': 0.222, 'Research Scientist': 0.199, 'Laboratory Technician': 0.176,
+                'Manufacturing Director': 0.099, 'Healthcare Representative': 0.089, 'Manager': 0.069,
+                'Sales Representative': 0.056, 'Research Director': 0.054, 'Human Resources': 0.035},
+    'MaritalStatus': {'Married': 0.458, 'Single': 0.32, 'Divorced': 0.222}
+}
+
+# Survey answer frequencies (1-4 scale) and share of missing answers
+SURVEYS = {
+    'JobInvolvement': ([0.06, 0.26, 0.59, 0.09], 0.0),
+    'PerformanceRating': ([0.0, 0.0, 0.85, 0.15], 0.0),
+    'EnvironmentSatisfaction': ([0.19, 0.2, 0.31, 0.3], 0.006),
+    'JobSatisfaction': ([0.2, 0.19, 0.3, 0.31], 0.005),
+    'WorkLifeBalance': ([0.05, 0.23, 0.61, 0.11], 0.009)
+}
+
+# Holidays of the badge calendar are days with no badge event at all
+HOLIDAY_SHARE = 0.035
+
+# Bytes of one badge cell: 'YYYY-MM-DD HH:MM:SS' plus the separator
+CELL_BYTES = 20
+MISSING_CELL = b'0000-00-00 00:00:00'
+
+
+def _choice(rng, frequencies, n):
+    values = list(frequencies)
+    p = np.array(list(frequencies.values()), dtype=np.float64)
+    return np.asarray(values, dtype=object)[rng.choice(len(values), size=n, p=p / p.sum())]
+
+
+def _survey_answers(rng, frequencies, missing_share, n):
+    answers = rng.choice(np.arange(1, 5), size=n, p=frequencies).astype(np.float64)
+    answers[rng.random(n) < missing_share] = np.nan
+    return answers
+
+
+def generate_employees(n_employees, random_state=42):
+    """
+    Generate the HR table, both surveys and the per-employee working pattern.
+    
+    Parameters:
+    -----------
+    n_employees : int
+        Number of employees
+    random_state : int
+        Random seed
+    
+    Returns:
+    --------
+    pd.DataFrame, pd.DataFrame, pd.DataFrame, dict
+        general_data, manager_survey_data, employee_survey_data, and the
+        arrival / workday-length parameters (seconds) of every employee
+    """
+    rng = np.random.default_rng(random_state)
+    n = n_employees
+    ids = np.arange(1, n + 1)
+    
+    age = rng.integers(18, 61, n)
+    total_years = np.minimum(np.maximum(age - 18 - rng.integers(0, 8, n), 0), 40).astype(np.float64)
+    years_at_company = np.minimum(rng.geometric(1 / 7.0, n) - 1, total_years).astype(np.int64)
+    since_promotion = np.minimum(rng.geometric(1 / 3.2, n) - 1, years_at_company)
+    with_manager = np.minimum(rng.geometric(1 / 5.0, n) - 1, years_at_company)
+    job_level = rng.choice(np.arange(1, 6), size=n, p=[0.37, 0.36, 0.15, 0.07, 0.05])
+    income = np.clip(np.round(rng.lognormal(10.85, 0.6, n) / 10) * 10, 10090, 199990).astype(np.int64)
+    num_companies = rng.integers(0, 10, n).astype(np.float64)
+    
+    general = pd.DataFrame({
+        'Age': age,
+        'Attrition': 'No',
+        'BusinessTravel': _choice(rng, CATEGORIES['BusinessTravel'], n),
+        'Department': _choice(rng, CATEGORIES['Department'], n),
+        'DistanceFromHome': rng.integers(1, 30, n),
+        'Education': rng.choice(np.arange(1, 6), size=n, p=[0.12, 0.19, 0.39, 0.27, 0.03]),
+        'EducationField': _choice(rng, CATEGORIES['EducationField'], n),
+        'EmployeeCount': 1,
+        'EmployeeID': ids,
+        'Gender': _choice(rng, CATEGORIES['Gender'], n),
+        'JobLevel': job_level,
+        'JobRole': _choice(rng, CATEGORIES['JobRole'], n),
+        'MaritalStatus': _choice(rng, CATEGORIES['MaritalStatus'], n),
+        'MonthlyIncome': income,
+        'NumCompaniesWorked': num_companies,
+        'Over18': 'Y',
+        'PercentSalaryHike': rng.integers(11, 26, n),
+        'StandardHours': 8,
+        'StockOptionLevel': rng.choice(np.arange(4), size=n, p=[0.43, 0.41, 0.11, 0.05]),
+        'TotalWorkingYears': total_years,
+        'TrainingTimesLastYear': rng.integers(0, 7, n),
+        'YearsAtCompany': years_at_company,
+        'YearsSinceLastPromotion': since_promotion,
+        'YearsWithCurrManager': with_manager
+    })
+    general.loc[rng.random(n) < 0.004, 'NumCompaniesWorked'] = np.nan
+    general.loc[rng.random(n) < 0.002, 'TotalWorkingYears'] = np.nan
+    
+    manager = pd.DataFrame({'EmployeeID': ids})
+    employee = pd.DataFrame({'EmployeeID': ids})
+    for column in ['JobInvolvement', 'PerformanceRating']:
+        manager[column] = _survey_answers(rng, *SURVEYS[column], n).astype(np.int64)
+    for column in ['EnvironmentSatisfaction', 'JobSatisfaction', 'WorkLifeBalance']:
+        employee[column] = _survey_answers(rng, *SURVEYS[column], n)
+    
+    # Working pattern: usual arrival around 10:00 and a workday of about 7.7 hours
+    arrival = rng.normal(10 * 3600, 900, n)
+    workday = rng.normal(7.7 * 3600, 0.9 * 3600, n).clip(5 * 3600, 11 * 3600)
+    
+    # Attrition: a logit on tenure, travel, marital status, satisfaction and overtime
+    satisfaction = np.nan_to_num(employee['JobSatisfaction'].to_numpy(), nan=2.5) + \
+        np.nan_to_num(employee['EnvironmentSatisfaction'].to_numpy(), nan=2.5)
+    logit = (-2.5
+             - 0.08 * (age - 37)
+             - 0.12 * years_at_company
+             + 0.9 * (general['BusinessTravel'].to_numpy() == 'Travel_Frequently')
+             + 0.7 * (general['MaritalStatus'].to_numpy() == 'Single')
+             - 0.35 * (satisfaction - 5)
+             + 1.1 * (workday - 7.7 * 3600) / 3600
+             + 0.1 * num_companies)
+    leaves = rng.random(n) < 1 / (1 + np.exp(-logit))
+    general.loc[leaves, 'Attrition'] = 'Yes'
+    
+    return general, manager, employee, {'arrival': arrival, 'workday': workday}
+
+
+def _time_table():
+    # 'HH:MM:SS' for every second of the day, as a (86400, 8) byte table
+    seconds = np.arange(86400)
+    text = np.char.mod('%02d:', seconds // 3600)
+    text = np.char.add(text, np.char.mod('%02d:', seconds // 60 % 60))
+    text = np.char.add(text, np.char.mod('%02d', seconds % 60))
+    return np.frombuffer(text.astype('S8').tobytes(), dtype=np.uint8).reshape(86400, 8)
+
+
+def _badge_lines(ids, seconds, day_prefixes, time_table):
+    """
+    CSV lines of one badge file for a block of employees; NaN seconds become NA.
+    """
+    n_rows, n_days = seconds.shape
+    cells = np.empty((n_rows, n_days, CELL_BYTES), dtype=np.uint8)
+    cells[:, :, :11] = day_prefixes[np.newaxis, :, :]
+    missing = np.isnan(seconds)
+    index = np.where(missing, 0, seconds).astype(np.int64).clip(0, 86399)
+    cells[:, :, 11:19] = time_table[index]
+    cells[missing, :19] = np.frombuffer(MISSING_CELL, dtype=np.uint8)
+    cells[:, :, 19] = ord(',')
+    cells[:, -1, 19] = ord('\n')
+    
+    rows = cells.reshape(n_rows, n_days * CELL_BYTES)
+    text = b''.join(b'%d,' % employee_id + rows[i].tobytes() for i, employee_id in enumerate(ids))
+    return text.replace(MISSING_CELL + b',', b'NA,').replace(MISSING_CELL + b'\n', b'NA\n')
+
+
+def write_badge_files(output_dir, pattern, n_days, start_date='2015-01-01', badge_format='zip',
+                      chunk_rows=20_000, random_state=42):
+    """
+    Write the in/out badge files for the generated employees.
+    
+    Parameters:
+    -----------
+    output_dir : str
+        Destination directory
+    pattern : dict
+        Per-employee 'arrival' and 'workday' seconds from generate_employees
+    n_days : int
+        Number of business days
+    start_date : str
+        First day of the calendar
+    badge_format : str
+        'zip' (in_out_time.zip), 'csv' (in_time.csv and out_time.csv) or 'both'
+    chunk_rows : int
+        Employees generated and written per block
+    random_state : int
+        Random seed
+    """
+    rng = np.random.default_rng(random_state + 1)
+    output_dir = Path(output_dir)
+    days = pd.bdate_range(start_date, periods=n_days)
+    holidays = rng.random(n_days) < HOLIDAY_SHARE
+    day_prefixes = np.frombuffer(
+        ''.join(day.strftime('%Y-%m-%d ') for day in days).encode(), dtype=np.uint8
+    ).reshape(n_days, 11)
+    time_table = _time_table()
+    header = (',' + ','.join(day.strftime('%Y-%m-%d') for day in days) + '\n').encode()
+    
+    arrival, workday = pattern['arrival'], pattern['workday']
+    n = len(arrival)
+    paths = {name: output_dir / f'{name}.csv' for name in ('in_time', 'out_time')}
+    with open(paths['in_time'], 'wb') as in_file, open(paths['out_time'], 'wb') as out_file:
+        in_file.write(header)
+        out_file.write(header)
+        for start in range(0, n, chunk_rows):
+            stop = min(start + chunk_rows, n)
+            shape = (stop - start, n_days)
+            in_seconds = arrival[start:stop, np.newaxis] + rng.normal(0, 1200, shape)
+            out_seconds = in_seconds + workday[start:stop, np.newaxis] + rng.normal(0, 1800, shape)
+            in_seconds = in_seconds.clip(5 * 3600, 14 * 3600)
+            out_seconds = out_seconds.clip(in_seconds + 1800, 86399)
+            
+            # Leave, sick days and holidays have no badge events; a few departures are not badged
+            absent = (rng.random(shape) < 0.05) | holidays[np.newaxis, :]
+            in_seconds[absent] = np.nan
+            out_seconds[absent | (rng.random(shape) < 0.002)] = np.nan
+            
+            ids = range(start + 1, stop + 1)
+            in_file.write(_badge_lines(ids, in_seconds, day_prefixes, time_table))
+            out_file.write(_badge_lines(ids, out_seconds, day_prefixes, time_table))
+    
+    if badge_format in ('zip', 'both'):
+        with zipfile.ZipFile(output_dir / 'in_out_time.zip', 'w', zipfile.ZIP_DEFLATED, compresslevel=1) as archive:
+            for name, path in paths.items():
+                archive.write(path, f'{name}.csv')
+        if badge_format == 'zip':
+            for path in paths.values():
+                os.remove(path)
+
+
+def generate_dataset(output_dir, n_employees, n_days=261, badge_format='zip', random_state=42):
+    """
+    Write a complete synthetic HR extract.
+    
+    Parameters:
+    -----------
+    output_dir : str
+        Destination directory (created if needed)
+    n_employees : int
+        Number of employees
+    n_days : int
+        Number of business days of badge data (0 writes no badge files)
+    badge_format : str
+        'zip', 'csv' or 'both'
+    random_state : int
+        Random seed
+    
+    Returns:
+    --------
+    dict
+        Size in bytes of every written file
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    general, manager, employee, pattern = generate_employees(n_employees, random_state)
+    general.to_csv(output_dir / 'general_data.csv', index=False, na_rep='NA')
+    manager.to_csv(output_dir / 'manager_survey_data.csv', index=False)
+    employee.to_csv(output_dir / 'employee_survey_data.csv', index=False, na_rep='NA')
+    if n_days > 0:
+        write_badge_files(output_dir, pattern, n_days, badge_format=badge_format, random_state=random_state)
+    return {path.name: path.stat().st_size for path in sorted(output_dir.iterdir()) if path.is_file()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Generate a synthetic HR extract')
+    parser.add_argument('--employees', type=int, default=4410)
+    parser.add_argument('--days', type=int, default=261, help='business days of badge data (0 for none)')
+    parser.add_argument('--badge-format', choices=['zip', 'csv', 'both'], default='zip')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', required=True, help='destination directory')
+    args = parser.parse_args(argv)
+    
+    start = time.perf_counter()
+    sizes = generate_dataset(args.output, args.employees, args.days, args.badge_format, args.seed)
+    print(f"Generated {args.employees} employees x {args.days} days in {time.perf_counter() - start:.1f}s")
+    for name, size in sizes.items():
+        print(f"  {name}: {size / 1e6:.1f} MB")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,173 @@
+"""
+Load test of the scoring service (serve.py) on localhost.
+
+Opens a number of concurrent keep-alive connections, each sending one
+employee per POST /score request (records taken from the HR extract in
+data/), and reports client-side p50/p99 latency and throughput next to the
+server's own counters from GET /stats.
+
+Usage:
+    python serve.py --port 8080 &
+    python benchmarks/load_test.py --port 8080 --concurrency 32 --requests 5000
+    
+    # or start (and stop) a server just for the test
+    python benchmarks/load_test.py --spawn-server --max-batch-size 64 --max-latency-ms 5
+"""
+
+import sys
+import json
+import time
+import asyncio
+import argparse
+import subprocess
+from pathlib import Path
+
+import numpy as np
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(REPO_DIR / 'src'))
+
+
+def load_records(general_path, manager_path, employee_path, zip_path=None, in_time_path=None,
+                 out_time_path=None):
+    """
+    Request bodies: one JSON object per employee with the merged raw fields.
+    
+    The badge features are included when badge sources are given, as
+    serve.py requires them for models trained with them.
+    """
+    from data_loader import iter_merged_chunks
+    
+    records = []
+    for merged in iter_merged_chunks(general_path, manager_path, employee_path, zip_path=zip_path,
+                                     in_time_path=in_time_path, out_time_path=out_time_path):
+        merged = merged.drop(columns=['Attrition'], errors='ignore')
+        records.extend(json.dumps(record).encode() for record in json.loads(merged.to_json(orient='records')))
+    return records
+
+
+async def request(reader, writer, host, method, path, body=b''):
+    """
+    Send one HTTP/1.1 request on an open keep-alive connection and read the response.
+    
+    Returns:
+    --------
+    int, bytes
+        Status code and body
+    """
+    writer.write(f'{method} {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n'
+                 f'Content-Length: {len(body)}\r\n\r\n'.encode('latin-1') + body)
+    await writer.drain()
+    head = (await reader.readuntil(b'\r\n\r\n')).decode('latin-1').split('\r\n')
+    status = int(head[0].split(' ', 2)[1])
+    length = next(int(line.split(':', 1)[1]) for line in head[1:] if line.lower().startswith('content-length:'))
+    return status, await reader.readexactly(length)
+
+
+async def get_json(host, port, path):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        _, body = await request(reader, writer, host, 'GET', path)
+        return json.loads(body)
+    finally:
+        writer.close()
+
+
+async def run_load(host, port, records, n_requests, concurrency):
+    """
+    Send n_requests /score requests over `concurrency` connections.
+    
+    Returns:
+    --------
+    np.ndarray, int, float
+        Latency of each successful request in seconds, number of failed
+        requests and wall time
+    """
+    latencies = []
+    errors = 0
+    next_index = iter(range(n_requests))
+    
+    async def client():
+        nonlocal errors
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            for i in next_index:
+                start = time.perf_counter()
+                status, _ = await request(reader, writer, host, 'POST', '/score', records[i % len(records)])
+                if status == 200:
+                    latencies.append(time.perf_counter() - start)
+                else:
+                    errors += 1
+        finally:
+            writer.close()
+    
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return np.array(latencies), errors, time.perf_counter() - start
+
+
+def wait_for_server(host, port, timeout=60.0):
+    deadline = time.perf_counter() + timeout
+    while True:
+        try:
+            return asyncio.run(get_json(host, port, '/health'))
+        except OSError:
+            if time.perf_counter() > deadline:
+                raise
+            time.sleep(0.2)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Load test of the scoring service')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--concurrency', type=int, default=32, help='concurrent connections')
+    parser.add_argument('--requests', type=int, default=5000, help='total /score requests')
+    parser.add_argument('--general', default=str(REPO_DIR / 'data' / 'general_data.csv'))
+    parser.add_argument('--manager-survey', default=str(REPO_DIR / 'data' / 'manager_survey_data.csv'))
+    parser.add_argument('--employee-survey', default=str(REPO_DIR / 'data' / 'employee_survey_data.csv'))
+    parser.add_argument('--badge-zip', default=None, help='in_out_time.zip, for models using badge features')
+    parser.add_argument('--in-time', default=None, help='in_time.csv (instead of --badge-zip)')
+    parser.add_argument('--out-time', default=None, help='out_time.csv (instead of --badge-zip)')
+    parser.add_argument('--spawn-server', action='store_true',
+                        help='start serve.py for the test and stop it afterwards')
+    parser.add_argument('--max-batch-size', type=int, default=64, help='passed to a spawned server')
+    parser.add_argument('--max-latency-ms', type=float, default=5.0, help='passed to a spawned server')
+    parser.add_argument('--model-dir', default='models', help='passed to a spawned server')
+    args = parser.parse_args(argv)
+    
+    records = load_records(args.general, args.manager_survey, args.employee_survey, zip_path=args.badge_zip,
+                           in_time_path=args.in_time, out_time_path=args.out_time)
+    server = None
+    if args.spawn_server:
+        server = subprocess.Popen([sys.executable, 'serve.py', '--host', args.host, '--port', str(args.port),
+                                   '--model-dir', args.model_dir, '--max-batch-size', str(args.max_batch_size),
+                                   '--max-latency-ms', str(args.max_latency_ms)], cwd=REPO_DIR)
+    try:
+        health = wait_for_server(args.host, args.port, timeout=60.0 if server else 0.0)
+        print(f"Load test of {health['model']} at http://{args.host}:{args.port}: "
+              f"{args.requests} requests over {args.concurrency} connections")
+        
+        latencies, errors, wall = asyncio.run(
+            run_load(args.host, args.port, records, args.requests, args.concurrency)
+        )
+        stats = asyncio.run(get_json(args.host, args.port, '/stats'))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+    
+    ms = latencies * 1000
+    p50, p90, p99 = np.percentile(ms, [50, 90, 99]) if len(ms) else (float('nan'),) * 3
+    print(f"  Client: {len(latencies) / wall:,.0f} requests/sec, {errors} errors, wall {wall:.2f}s")
+    print(f"  Client latency: p50 {p50:.2f} ms, p90 {p90:.2f} ms, p99 {p99:.2f} ms, "
+          f"max {ms.max() if len(ms) else float('nan'):.2f} ms")
+    print(f"  Server: {stats['requests']} requests in {stats['batches']} batches "
+          f"(mean size {stats['mean_batch_size']}, largest {stats['largest_batch']}), "
+          f"p50 {stats['latency_p50_ms']} ms, p99 {stats['latency_p99_ms']} ms, "
+          f"{stats['recent_requests_per_second']} requests/sec recently")
+    return 1 if errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
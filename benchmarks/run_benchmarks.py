@@ -0,0 +1,358 @@
+"""
+Scaling benchmarks for the data pipeline and model training.
+
+Generates synthetic extracts (see generate_hr_data.py) at several sizes,
+then times every stage and records its peak memory: loading, working-hours
+features, merge, the preprocessing functions, split + SMOTE + scaling and
+model training. Results are written as JSON, tagged with the git commit, so
+two runs can be compared with compare_benchmarks.py.
+
+Usage:
+    python benchmarks/run_benchmarks.py                      # 4k, 50k, 250k, 1M employees
+    python benchmarks/run_benchmarks.py --sizes 4410 50000 --days 60
+    python benchmarks/run_benchmarks.py --src /path/to/other/checkout/src
+"""
+
+import os
+import gc
+import sys
+import json
+import time
+import platform
+import argparse
+import resource
+import subprocess
+from pathlib import Path
+
+BENCHMARK_DIR = Path(__file__).resolve().parent
+REPO_DIR = BENCHMARK_DIR.parent
+sys.path.insert(0, str(BENCHMARK_DIR))
+
+from generate_hr_data import generate_dataset
+
+
+DEFAULT_SIZES = [4_000, 50_000, 250_000, 1_000_000]
+
+# Models trained by default; SVM and KNN scale quadratically and are opt-in
+DEFAULT_MODELS = ['Logistic Regression', 'Random Forest', 'XGBoost', 'LightGBM']
+
+
+def _read_status_kb(field):
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith(field + ':'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def reset_peak_rss():
+    """
+    Reset the peak resident set size of this process (Linux only).
+    
+    Returns:
+    --------
+    bool
+        Whether the peak could be reset; otherwise peaks are process-wide maxima
+    """
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss_mb():
+    """
+    Peak resident set size in MB since the last reset_peak_rss.
+    """
+    peak_kb = _read_status_kb('VmHWM')
+    if peak_kb is None:
+        # ru_maxrss is in KB on Linux and in bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+    return peak_kb / 1024
+
+
+def current_rss_mb():
+    rss_kb = _read_status_kb('VmRSS')
+    return rss_kb / 1024 if rss_kb is not None else float('nan')
+
+
+def measure(name, func, results, context, **info):
+    """
+    Run one stage, appending its wall time and peak memory to results.
+    
+    A stage that raises (e.g. a function missing at an older commit) is
+    recorded with its error and later stages that need its output are skipped.
+    """
+    gc.collect()
+    reset_peak_rss()
+    baseline = current_rss_mb()
+    start = time.perf_counter()
+    record = dict(info, stage=name)
+    try:
+        output = func(context)
+        record['seconds'] = time.perf_counter() - start
+        record['peak_rss_mb'] = peak_rss_mb()
+        record['peak_increase_mb'] = record['peak_rss_mb'] - baseline
+        # Worker processes (model training) are not in this process's RSS; this is their all-time peak
+        record['children_peak_rss_mb'] = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+        if isinstance(output, dict):
+            record.update(output)
+        status = f"{record['seconds']:8.2f}s {record['peak_increase_mb']:8.0f} MB"
+    except Exception as e:
+        record['error'] = f'{type(e).__name__}: {e}'
+        status = f"[ERROR] {record['error']}"
+    results.append(record)
+    print(f"  {name:<30} {status}", flush=True)
+    return 'error' not in record
+
+
+def _load(ctx):
+    import data_loader
+    data_dir = ctx['data_dir']
+    ctx['general'] = data_loader.load_general_data(str(data_dir / 'general_data.csv'))
+    ctx['manager'] = data_loader.load_manager_survey(str(data_dir / 'manager_survey_data.csv'))
+    ctx['employee'] = data_loader.load_employee_survey(str(data_dir / 'employee_survey_data.csv'))
+    return {'rows': len(ctx['general'])}
+
+
+def _load_badge(ctx):
+    import data_loader
+    data_dir = ctx['data_dir']
+    ctx['in_time'], ctx['out_time'] = data_loader.load_working_hours_data(
+        zip_path=None, in_time_path=str(data_dir / 'in_time.csv'), out_time_path=str(data_dir / 'out_time.csv')
+    )
+    return {'cells': int(ctx['in_time'].size)}
+
+
+def _process_working_hours(ctx):
+    import data_loader
+    ctx['hours'] = data_loader.process_working_hours(ctx.pop('in_time'), ctx.pop('out_time'))
+    return {'rows': len(ctx['hours'])}
+
+
+def _process_working_hours_streaming(ctx):
+    import data_loader
+    data_dir = ctx['data_dir']
+    hours = data_loader.process_working_hours_streaming(
+        zip_path=None, in_time_path=str(data_dir / 'in_time.csv'), out_time_path=str(data_dir / 'out_time.csv')
+    )
+    ctx.setdefault('hours', hours)
+    return {'rows': len(hours)}
+
+
+def _merge(ctx):
+    import data_loader
+    merged = data_loader.merge_all_data(ctx['general'], ctx['manager'], ctx['employee'])
+    if ctx.get('hours') is not None:
+        merged = merged.merge(ctx['hours'], on='EmployeeID', how='left')
+    ctx['merged'] = merged
+    return {'rows': len(merged), 'columns': merged.shape[1]}
+
+
+def _handle_missing_values(ctx):
+    import preprocessing
+    ctx['imputed'] = preprocessing.handle_missing_values(ctx['merged'], strategy='median')
+
+
+def _create_features(ctx):
+    import preprocessing
+    ctx['featured'] = preprocessing.create_features(ctx.pop('imputed'))
+
+
+def _encode_categorical_variables(ctx):
+    import preprocessing
+    ctx['encoded'], _ = preprocessing.encode_categorical_variables(ctx.pop('featured'), target_col='Attrition')
+
+
+def _pipeline_fit_transform(ctx):
+    import preprocessing
+    pipeline = preprocessing.PreprocessingPipeline(strategy='median', target_col='Attrition')
+    pipeline.fit_transform(ctx['merged'])
+
+
+def _split(ctx):
+    import pandas as pd
+    import preprocessing
+    from sklearn.model_selection import train_test_split
+    from imblearn.over_sampling import SMOTE
+    
+    X, y = preprocessing.prepare_features_for_modeling(ctx.pop('encoded'), target_col='Attrition')
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
+    X_train, y_train = SMOTE(random_state=42).fit_resample(X_train, y_train)
+    X_train_scaled, X_test_scaled, _ = preprocessing.scale_features(
+        pd.DataFrame(X_train, columns=X.columns), pd.DataFrame(X_test, columns=X.columns)
+    )
+    ctx['split'] = (X_train_scaled, X_train.values, y_train, X_test_scaled, X_test.values, y_test)
+    return {'train_rows': len(X_train)}
+
+
+def _model_zoo(names):
+    try:
+        from training import build_model_zoo
+        zoo = build_model_zoo(random_state=42)
+    except ImportError:
+        # Commits before the training module defined the models in run_analysis.py
+        from sklearn.ensemble import RandomForestClassifier
+        from sklearn.linear_model import LogisticRegression
+        import xgboost as xgb
+        import lightgbm as lgb
+        zoo = {
+            'Logistic Regression': (LogisticRegression(random_state=42, max_iter=1000), True),
+            'Random Forest': (RandomForestClassifier(n_estimators=100, random_state=42, n_jobs=-1), False),
+            'XGBoost': (xgb.XGBClassifier(random_state=42, eval_metric='logloss'), False),
+            'LightGBM': (lgb.LGBMClassifier(random_state=42, verbose=-1), False)
+        }
+    return {name: zoo[name] for name in names if name in zoo}
+
+
+def _train(models, n_jobs):
+    def run(ctx):
+        from sklearn.metrics import roc_auc_score
+        X_train_scaled, X_train, y_train, X_test_scaled, X_test, y_test = ctx['split']
+        zoo = _model_zoo(models)
+        try:
+            from training import train_models
+        except ImportError:
+            train_models = None
+        
+        if train_models is not None:
+            results = train_models(zoo, X_train_scaled, X_train, y_train, X_test_scaled, X_test, n_workers=n_jobs)
+        else:
+            results = {}
+            for name, (estimator, use_scaled) in zoo.items():
+                start = time.perf_counter()
+                estimator.fit(X_train_scaled if use_scaled else X_train, y_train)
+                fit_seconds = time.perf_counter() - start
+                proba = estimator.predict_proba(X_test_scaled if use_scaled else X_test)[:, 1]
+                results[name] = {'y_pred_proba': proba, 'fit_seconds': fit_seconds}
+        
+        return {'models': {
+            name: ({'error': str(result['error'])} if 'error' in result else
+                   {'fit_seconds': result['fit_seconds'], 'roc_auc': roc_auc_score(y_test, result['y_pred_proba'])})
+            for name, result in results.items()
+        }}
+    return run
+
+
+def run_size(data_dir, n_employees, models, n_jobs, skip=()):
+    """
+    Run every stage on one generated extract.
+    
+    Returns:
+    --------
+    list
+        One record per stage
+    """
+    results = []
+    ctx = {'data_dir': Path(data_dir)}
+    info = {'employees': n_employees}
+    stages = [
+        ('load', _load),
+        ('load_badge', _load_badge),
+        ('process_working_hours', _process_working_hours),
+        ('process_working_hours_streaming', _process_working_hours_streaming),
+        ('merge_all_data', _merge),
+        ('handle_missing_values', _handle_missing_values),
+        ('create_features', _create_features),
+        ('encode_categorical_variables', _encode_categorical_variables),
+        ('pipeline_fit_transform', _pipeline_fit_transform),
+        ('split_smote_scale', _split),
+        ('train', _train(models, n_jobs))
+    ]
+    # Stages whose output later stages need; when one fails the rest of the size is skipped
+    required = {'load', 'merge_all_data', 'handle_missing_values', 'create_features',
+                'encode_categorical_variables', 'split_smote_scale'}
+    for name, func in stages:
+        if name in skip:
+            continue
+        if name == 'process_working_hours' and 'in_time' not in ctx:
+            continue
+        if not measure(name, func, results, ctx, **info) and name in required:
+            print(f"  Skipping the remaining stages for {n_employees} employees")
+            break
+    return results
+
+
+def git_commit(src_dir):
+    """
+    Commit of the checkout holding src_dir, with a '-dirty' suffix for uncommitted changes.
+    """
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=src_dir,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=src_dir,
+                               capture_output=True, text=True, check=True).stdout.strip()
+        return commit + ('-dirty' if dirty else '')
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def library_versions():
+    versions = {}
+    for name in ['numpy', 'pandas', 'sklearn', 'imblearn', 'xgboost', 'lightgbm']:
+        try:
+            versions[name] = __import__(name).__version__
+        except ImportError:
+            versions[name] = None
+    return versions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the pipeline on synthetic extracts')
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help='employee counts')
+    parser.add_argument('--days', type=int, default=261, help='business days of badge data')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--data-root', default=str(REPO_DIR / 'bench_data'),
+                        help='where generated extracts are kept (reused across runs)')
+    parser.add_argument('--src', default=str(REPO_DIR / 'src'),
+                        help='src/ directory of the checkout to benchmark')
+    parser.add_argument('--models', nargs='+', default=DEFAULT_MODELS)
+    parser.add_argument('--n-jobs', type=int, default=None, help='models trained concurrently')
+    parser.add_argument('--skip', nargs='+', default=[], help='stages to leave out')
+    parser.add_argument('--output', default=None,
+                        help='JSON results file (default benchmarks/results/<commit>.json)')
+    args = parser.parse_args(argv)
+    
+    src_dir = Path(args.src).resolve()
+    sys.path.insert(0, str(src_dir))
+    commit = git_commit(src_dir)
+    output = Path(args.output) if args.output else BENCHMARK_DIR / 'results' / f'{commit}.json'
+    
+    report = {
+        'commit': commit,
+        'src': str(src_dir),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'libraries': library_versions(),
+        'params': {'days': args.days, 'seed': args.seed, 'models': args.models, 'n_jobs': args.n_jobs},
+        'results': []
+    }
+    
+    for n_employees in args.sizes:
+        data_dir = Path(args.data_root) / f'{n_employees}x{args.days}-seed{args.seed}'
+        if not (data_dir / 'general_data.csv').exists():
+            start = time.perf_counter()
+            generate_dataset(data_dir, n_employees, args.days, badge_format='csv', random_state=args.seed)
+            print(f"Generated {data_dir} in {time.perf_counter() - start:.1f}s")
+        print(f"\n{n_employees} employees x {args.days} days ({commit})")
+        report['results'].extend(run_size(data_dir, n_employees, args.models, args.n_jobs, args.skip))
+        
+        # Written after every size so a long run keeps its partial results
+        output.parent.mkdir(parents=True, exist_ok=True)
+        with open(output, 'w') as f:
+            json.dump(report, f, indent=2)
+    
+    print(f"\nResults written to {output}")
+    return output
+
+
+if __name__ == '__main__':
+    main()
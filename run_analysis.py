@@ -5,6 +5,7 @@ This script executes the key parts of the notebook to test the models.
 
 import sys
 import os
+import argparse
 sys.path.append('src')
 
 # Import necessary libraries
@@ -13,48 +14,156 @@ import numpy as np
 import warnings
 warnings.filterwarnings('ignore')
 
-from data_loader import (
-    load_general_data, load_manager_survey, load_employee_survey,
-    load_working_hours_data, merge_all_data
-)
+import data_loader
+import preprocessing
+import training
+import imbalance
+from data_loader import load_all, merge_all_data, data_source_files
 from preprocessing import (
-    handle_missing_values, encode_categorical_variables,
-    create_features, prepare_features_for_modeling, scale_features
+    PreprocessingPipeline, prepare_features_for_modeling, scale_features
 )
+from model_io import save_model
 from model_evaluation import (
     evaluate_model, plot_confusion_matrix, plot_roc_curve,
     compare_models, print_classification_report
 )
 
-from sklearn.model_selection import train_test_split
-from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
-from sklearn.linear_model import LogisticRegression
-from sklearn.svm import SVC
-from sklearn.neighbors import KNeighborsClassifier
-from imblearn.over_sampling import SMOTE
-import xgboost as xgb
-import lightgbm as lgb
+from metrics import evaluate_models, threshold_sweep, select_threshold
+from training import (
+    build_model_zoo, train_models, model_fit_params, prepare_cv_folds, cross_validate_models
+)
+from imbalance import IMBALANCE_STRATEGIES, resample, apply_class_weights
+from tuning import successive_halving, best_estimators, format_params
+from stage_cache import STAGES, StageCache
+import instrumentation
+
+parser = argparse.ArgumentParser(description='HumanForYou employee turnover analysis')
+parser.add_argument('--rebuild-badge-cache', action='store_true',
+                    help='re-parse the badge files even if the cached matrices are up to date')
+parser.add_argument('--artifacts-dir', default='models',
+                    help='directory for the fitted preprocessing state and models')
+parser.add_argument('--n-jobs', type=int, default=None,
+                    help='models trained concurrently (default: one per core; 1 trains sequentially)')
+parser.add_argument('--cv', type=int, default=0, metavar='K',
+                    help='also report stratified K-fold cross-validation metrics (SMOTE inside each fold)')
+parser.add_argument('--imbalance', choices=list(IMBALANCE_STRATEGIES), default='smote',
+                    help='class-imbalance handling of the training split (default: smote)')
+parser.add_argument('--compare-imbalance', action='store_true',
+                    help='train every model under each imbalance strategy and report fit time, memory and ROC-AUC')
+parser.add_argument('--search', action='store_true',
+                    help='tune XGBoost, LightGBM and Random Forest by successive halving before training')
+parser.add_argument('--search-trials', type=int, default=27,
+                    help='configurations tried by --search')
+parser.add_argument('--search-budget', type=float, default=None, metavar='SECONDS',
+                    help='wall-clock budget for --search')
+parser.add_argument('--cache-dir', default='data/.stage_cache',
+                    help='directory of the stage cache')
+parser.add_argument('--from-stage', choices=STAGES, default=None,
+                    help='recompute this stage and all later ones even if they are cached')
+parser.add_argument('--force', action='store_true',
+                    help='recompute every stage and refresh the stage cache')
+parser.add_argument('--no-cache', action='store_true',
+                    help='neither read nor write the stage cache')
+parser.add_argument('--bootstrap', type=int, default=0, metavar='N',
+                    help='report 95%% bootstrap confidence intervals of the test metrics from N resamples')
+parser.add_argument('--cost-fn', type=float, default=None, metavar='COST',
+                    help='cost of a missed leaver; with --cost-fp reports the cheapest threshold of every model')
+parser.add_argument('--cost-fp', type=float, default=1.0, metavar='COST',
+                    help='cost of an unnecessary retention intervention (default: 1)')
+parser.add_argument('--max-alerts', type=int, default=None, metavar='N',
+                    help='most test-set employees HR can follow up when choosing the threshold')
+parser.add_argument('--report', nargs='?', const='reports/figures', default=None, metavar='DIR',
+                    help='render every evaluation figure (PNG and SVG) with an index.html into DIR '
+                         '(default: reports/figures)')
+parser.add_argument('--explain', action='store_true',
+                    help='explain every employee\'s risk with SHAP values of the best tree model (cached per employee)')
+parser.add_argument('--explain-background', type=int, default=50, metavar='N',
+                    help='background rows sampled for the SHAP explanations')
+parser.add_argument('--run-log', default=None,
+                    help='JSONL file receiving per-stage timings and memory (default: <artifacts-dir>/run_log.jsonl)')
+parser.add_argument('--no-run-log', action='store_true',
+                    help='do not measure or log the stages')
+parser.add_argument('--profile-stage', default=None, metavar='STAGE',
+                    help='run one stage (e.g. merge, train) under cProfile')
+parser.add_argument('--trace-memory-stage', default=None, metavar='STAGE',
+                    help='record tracemalloc allocations of one stage')
+args = parser.parse_args()
+
+run_log = instrumentation.configure(
+    args.run_log or os.path.join(args.artifacts_dir, 'run_log.jsonl'), enabled=not args.no_run_log,
+    profile_stage=args.profile_stage, trace_memory_stage=args.trace_memory_stage
+)
 
 print("="*60)
 print("HUMANFORYOU EMPLOYEE TURNOVER ANALYSIS")
 print("="*60)
 
-# Step 1: Load data
-print("\n[1/7] Loading data...")
-try:
-    general_df = load_general_data('data/general_data.csv')
-    manager_df = load_manager_survey('data/manager_survey_data.csv')
-    employee_df = load_employee_survey('data/employee_survey_data.csv')
+# Every stage below is cached under a hash of its inputs, parameters and code
+cache = StageCache(args.cache_dir, from_stage='load' if args.rebuild_badge_cache else args.from_stage,
+                   force=args.force, enabled=not args.no_cache)
+
+def run_load():
+    # Read all sources concurrently (parsed badge matrices are cached under data/.badge_cache)
+    data, load_timings = load_all('data', rebuild_cache=args.rebuild_badge_cache)
+    return data
+
+def run_merge():
+    data = load_stage.value
+    if data['badge'] is not None:
+        return merge_all_data(data['general'], data['manager'], data['employee'], badge=data['badge'])
+    return merge_all_data(data['general'], data['manager'], data['employee'])
+
+def run_preprocess():
+    # Impute, derive features and encode in one pass over the merged frame
+    preprocessor = PreprocessingPipeline(strategy='median', target_col='Attrition')
+    df_encoded = preprocessor.fit_transform(merge_stage.value, inplace=True)
+    X, y = prepare_features_for_modeling(df_encoded, target_col='Attrition')
+    return preprocessor, X, y
+
+def run_split():
+    from sklearn.model_selection import train_test_split
     
-    # Load working hours
-    in_time_df, out_time_df = load_working_hours_data(
-        zip_path='data/in_out_time.zip',
-        in_time_path='data/in_time.csv',
-        out_time_path='data/out_time.csv'
+    preprocessor, X, y = preprocess_stage.value
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=0.2, random_state=42, stratify=y
     )
     
-    has_working_hours = (in_time_df is not None and out_time_df is not None)
-    print(f"[OK] Data loaded successfully! Working hours: {has_working_hours}")
+    # Handle class imbalance (class_weight leaves the rows as they are, see apply_class_weights)
+    X_train_balanced, y_train_balanced = resample(X_train, y_train, args.imbalance, random_state=42)
+    
+    # Scale features
+    X_train_scaled, X_test_scaled, scaler = scale_features(
+        pd.DataFrame(X_train_balanced, columns=X.columns),
+        pd.DataFrame(X_test, columns=X.columns)
+    )
+    return {
+        'X_train': X_train, 'y_train': y_train, 'X_test': X_test, 'y_test': y_test,
+        'X_train_balanced': X_train_balanced, 'y_train_balanced': y_train_balanced,
+        'X_train_scaled': X_train_scaled, 'X_test_scaled': X_test_scaled, 'scaler': scaler
+    }
+
+load_stage = cache.stage('load', run_load, params={'use_badge_cache': True},
+                         files=data_source_files('data'), code=[data_loader])
+merge_stage = cache.stage('merge', run_merge, parents=[load_stage], code=[data_loader])
+preprocess_stage = cache.stage('preprocess', run_preprocess,
+                               params={'strategy': 'median', 'target_col': 'Attrition'},
+                               parents=[merge_stage], code=[preprocessing])
+split_stage = cache.stage('split', run_split,
+                          params={'test_size': 0.2, 'random_state': 42, 'resample_random_state': 42,
+                                  'imbalance': args.imbalance},
+                          parents=[preprocess_stage], code=[preprocessing, imbalance])
+
+# Step 1: Load data
+print("\n[1/7] Loading data...")
+try:
+    with instrumentation.stage('load') as record:
+        if cache.is_cached(merge_stage):
+            record['cached'] = True
+            print("[OK] Sources unchanged, merged data read from the stage cache")
+        else:
+            record['rows'] = len(load_stage.value['general'])
+            has_working_hours = load_stage.value['badge'] is not None
+            print(f"[OK] Data loaded successfully! Working hours: {has_working_hours}")
 except Exception as e:
     print(f"[ERROR] Error loading data: {e}")
     import traceback
@@ -64,11 +173,13 @@ except Exception as e:
 # Step 2: Merge data
 print("\n[2/7] Merging data...")
 try:
-    if has_working_hours:
-        df = merge_all_data(general_df, manager_df, employee_df, in_time_df, out_time_df)
-    else:
-        df = merge_all_data(general_df, manager_df, employee_df)
-    print(f"[OK] Merged dataset: {df.shape}")
+    with instrumentation.stage('merge') as record:
+        if cache.is_cached(preprocess_stage):
+            record['cached'] = True
+            print("[OK] Merged data unchanged, preprocessed data read from the stage cache")
+        else:
+            record['rows'] = len(merge_stage.value)
+            print(f"[OK] Merged dataset: {merge_stage.value.shape}")
 except Exception as e:
     print(f"[ERROR] Error merging data: {e}")
     import traceback
@@ -78,10 +189,11 @@ except Exception as e:
 # Step 3: Preprocessing
 print("\n[3/7] Preprocessing data...")
 try:
-    df_clean = handle_missing_values(df, strategy='median')
-    df_features = create_features(df_clean)
-    df_encoded, encoders = encode_categorical_variables(df_features, target_col='Attrition')
-    X, y = prepare_features_for_modeling(df_encoded, target_col='Attrition')
+    with instrumentation.stage('preprocess') as record:
+        record['cached'] = cache.is_cached(preprocess_stage)
+        preprocessor, X, y = preprocess_stage.value
+        record['rows'] = len(X)
+    encoders = preprocessor.encoders
     print(f"[OK] Preprocessing complete! Features: {X.shape[1]}, Samples: {X.shape[0]}")
     print(f"  Attrition rate: {(y == 1).sum() / len(y) * 100:.2f}%")
 except Exception as e:
@@ -93,24 +205,23 @@ except Exception as e:
 # Step 4: Train-test split
 print("\n[4/7] Splitting data...")
 try:
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.2, random_state=42, stratify=y
-    )
-    
-    # Handle class imbalance
-    smote = SMOTE(random_state=42)
-    X_train_balanced, y_train_balanced = smote.fit_resample(X_train, y_train)
-    
-    # Scale features
-    X_train_scaled, X_test_scaled, scaler = scale_features(
-        pd.DataFrame(X_train_balanced, columns=X.columns),
-        pd.DataFrame(X_test, columns=X.columns)
-    )
+    with instrumentation.stage('split') as record:
+        record['imbalance'] = args.imbalance
+        record['cached'] = cache.is_cached(split_stage)
+        split = split_stage.value
+        record['rows'] = len(split['X_train_balanced'])
+    X_train, X_test, y_train, y_test = split['X_train'], split['X_test'], split['y_train'], split['y_test']
+    X_train_balanced, y_train_balanced = split['X_train_balanced'], split['y_train_balanced']
+    X_train_scaled, X_test_scaled, scaler = split['X_train_scaled'], split['X_test_scaled'], split['scaler']
     X_train_unscaled = X_train_balanced
     X_test_unscaled = X_test.values
     
+    # Keep the fitted preprocessing state so new data can be scored without refitting
+    preprocessor.set_model_inputs(X.columns, scaler)
+    preprocessor.save(os.path.join(args.artifacts_dir, 'preprocessing.json'))
+    
     print(f"[OK] Data split complete!")
-    print(f"  Training: {X_train_balanced.shape[0]} samples")
+    print(f"  Training: {X_train_balanced.shape[0]} samples ({args.imbalance})")
     print(f"  Test: {X_test.shape[0]} samples")
 except Exception as e:
     print(f"[ERROR] Error in data splitting: {e}")
@@ -120,37 +231,66 @@ except Exception as e:
 
 # Step 5: Train models
 print("\n[5/7] Training models...")
-models = {
-    'Logistic Regression': (LogisticRegression(random_state=42, max_iter=1000), True),
-    'Random Forest': (RandomForestClassifier(n_estimators=100, random_state=42, n_jobs=-1), False),
-    'Gradient Boosting': (GradientBoostingClassifier(random_state=42), False),
-    'XGBoost': (xgb.XGBClassifier(random_state=42, eval_metric='logloss'), False),
-    'LightGBM': (lgb.LGBMClassifier(random_state=42, verbose=-1), False),
-    'SVM': (SVC(probability=True, random_state=42), True),
-    'KNN': (KNeighborsClassifier(n_neighbors=5), True)
-}
+models = build_model_zoo(random_state=42)
+
+if args.search:
+    # Tune on folds of the training split only; the test split stays untouched, and
+    # boosters early-stop on a validation split of each fold's training part
+    print(f"  Searching {args.search_trials} configurations by successive halving...")
+    search_folds = prepare_cv_folds(X_train, y_train, n_splits=3, random_state=42, validation_size=0.2)
+    leaderboard = successive_halving(search_folds, n_trials=args.search_trials,
+                                     time_budget=args.search_budget, n_workers=args.n_jobs)
+    for _, row in leaderboard.drop_duplicates(subset='Model').iterrows():
+        print(f"  Best {row['Model']}: AUC {row['ROC-AUC']:.4f} with {format_params(row['Params'])}")
+    models.update(best_estimators(leaderboard, random_state=42))
+
+if args.imbalance == 'class_weight':
+    weighted = apply_class_weights(models, y_train_balanced)
+    print(f"  Class weights: {', '.join(weighted)} (unweighted: "
+          f"{', '.join(name for name in models if name not in weighted) or 'none'})")
+
+# Read unchanged fits from the stage cache and train the rest concurrently
+fit_keys = {name: cache.key(f'fit:{name}', params=model_fit_params(estimator, use_scaled),
+                            parents=[split_stage], code=[training])
+            for name, (estimator, use_scaled) in models.items()}
+training_results = {}
+for name in models:
+    hit, result = cache.lookup(f'fit:{name}', fit_keys[name])
+    if hit:
+        training_results[name] = dict(result, cached=True)
+
+to_train = {name: model for name, model in models.items() if name not in training_results}
+if to_train:
+    with instrumentation.stage('train', rows=len(y_train_balanced), models=len(to_train)):
+        trained = train_models(
+            to_train, X_train_scaled, X_train_unscaled, y_train_balanced, X_test_scaled, X_test_unscaled,
+            n_workers=args.n_jobs
+        )
+    for name, result in trained.items():
+        if 'error' not in result:
+            cache.store(f'fit:{name}', fit_keys[name], result, seconds=result['wall_seconds'])
+            # Fitted in a worker process, so measured there rather than by a stage block
+            instrumentation.log(f'fit:{name}', parent='train', rows=len(y_train_balanced),
+                                fit_seconds=result['fit_seconds'], wall_seconds=result['wall_seconds'],
+                                cpu_seconds=result['cpu_seconds'], threads=result['threads'])
+        training_results[name] = result
+training_results = {name: training_results[name] for name in models}
 
 results = []
 trained_models = {}
 
-for name, (model, use_scaled) in models.items():
-    try:
-        print(f"  Training {name}...", end=' ')
-        X_train_model = X_train_scaled if use_scaled else X_train_unscaled
-        X_test_model = X_test_scaled if use_scaled else X_test_unscaled
-        
-        model.fit(X_train_model, y_train_balanced)
-        trained_models[name] = model
-        
-        y_pred = model.predict(X_test_model)
-        y_pred_proba = model.predict_proba(X_test_model)[:, 1]
-        
-        metrics = evaluate_model(y_test, y_pred, y_pred_proba, model_name=name)
-        results.append(metrics)
-        
-        print(f"[OK] (AUC: {metrics['ROC-AUC']:.4f})")
-    except Exception as e:
-        print(f"[ERROR] Error: {e}")
+for name, result in training_results.items():
+    if 'error' in result:
+        print(f"  Training {name}... [ERROR] Error: {result['error']}")
+        continue
+    trained_models[name] = result['model']
+    
+    with instrumentation.stage(f'evaluate:{name}', rows=len(y_test)):
+        metrics = evaluate_model(y_test, result['y_pred'], result['y_pred_proba'], model_name=name)
+    results.append(metrics)
+    
+    source = 'cached' if result.get('cached') else f"{result['wall_seconds']:.2f}s on {result['threads']} thread(s)"
+    print(f"  Training {name}... [OK] (AUC: {metrics['ROC-AUC']:.4f}, {source})")
 
 # Step 6: Compare results
 print("\n[6/7] Model Comparison Results:")
@@ -161,6 +301,90 @@ results_df = results_df.sort_values('ROC-AUC', ascending=False)
 print("\n" + results_df.to_string(index=False))
 print("\n" + "="*60)
 
+if args.bootstrap > 0:
+    # All models share the same resamples, drawn and scored in vectorized blocks
+    with instrumentation.stage('bootstrap', rows=len(y_test), resamples=args.bootstrap):
+        intervals = evaluate_models(
+            y_test, {name: (result['y_pred'], result['y_pred_proba'])
+                     for name, result in training_results.items() if 'error' not in result},
+            n_resamples=args.bootstrap
+        )
+    print(f"\n95% bootstrap confidence intervals ({args.bootstrap} resamples):")
+    for metric in ['ROC-AUC', 'F1-Score']:
+        table = intervals[intervals['Metric'] == metric].sort_values('Value', ascending=False)
+        print(f"\n{metric}:")
+        print(table[['Model', 'Value', 'CI Low', 'CI High']].to_string(index=False))
+    print("\n" + "="*60)
+
+if args.cost_fn is not None or args.max_alerts is not None:
+    # One sort per model gives every threshold; the cheapest within capacity is reported
+    cost_fn = args.cost_fn if args.cost_fn is not None else 1.0
+    print(f"\nOperating points (missed leaver costs {cost_fn:g}, needless intervention {args.cost_fp:g}"
+          + (f", at most {args.max_alerts} alerts" if args.max_alerts is not None else '') + "):")
+    operating_points = []
+    for name, result in training_results.items():
+        if 'error' in result:
+            continue
+        sweep = threshold_sweep(y_test, result['y_pred_proba'], cost_fn=cost_fn, cost_fp=args.cost_fp)
+        point = select_threshold(sweep, max_alerts=args.max_alerts)
+        default = sweep[sweep['Threshold'] > 0.5].iloc[-1]
+        operating_points.append({'Model': name, 'Threshold': point['Threshold'], 'Alerts': int(point['Alerts']),
+                                 'Precision': point['Precision'], 'Recall': point['Recall'],
+                                 'Cost': point['Cost'], 'Cost at 0.5': default['Cost'],
+                                 'Alerts at 0.5': int(default['Alerts'])})
+    print(pd.DataFrame(operating_points).sort_values('Cost').to_string(index=False))
+    print("\n" + "="*60)
+
+if args.report:
+    from reporting import render_report
+    
+    # Figures are drawn headlessly, one worker process per core
+    with instrumentation.stage('report'):
+        index_path, figures = render_report(
+            y_test, {name: (result['y_pred'], result['y_pred_proba'])
+                     for name, result in training_results.items() if 'error' not in result},
+            results_df=results_df, output_dir=args.report, n_workers=args.n_jobs,
+            cost_fn=args.cost_fn if args.cost_fn is not None else 1.0, cost_fp=args.cost_fp,
+            max_alerts=args.max_alerts
+        )
+    failed = [figure for figure in figures if 'error' in figure]
+    print(f"\nReport: {index_path} ({len(figures) - len(failed)} figures)")
+    for figure in failed:
+        print(f"  [ERROR] {figure['kind']} {figure['model']}: {figure['error']}")
+    print("\n" + "="*60)
+
+if args.cv > 1:
+    # Folds are resampled and scaled once, then every (model, fold) pair runs in parallel
+    print(f"\nStratified {args.cv}-fold cross-validation (mean and std over folds):")
+    folds = prepare_cv_folds(X, y, n_splits=args.cv, random_state=42, strategy=args.imbalance)
+    cv_models = build_model_zoo(random_state=42)
+    if args.imbalance == 'class_weight':
+        # Weighted from the labels of the whole dataset; the folds are stratified, so the ratio is the same
+        apply_class_weights(cv_models, y)
+    fold_metrics, cv_summary = cross_validate_models(cv_models, folds,
+                                                     evaluate=evaluate_model, n_workers=args.n_jobs)
+    cv_summary = cv_summary.sort_values('ROC-AUC mean', ascending=False)
+    print(cv_summary[['Model', 'ROC-AUC mean', 'ROC-AUC std', 'F1-Score mean', 'F1-Score std']]
+          .to_string(index=False))
+    print("\n" + "="*60)
+
+if args.compare_imbalance:
+    from imbalance import compare_strategies, summarize_strategies
+    
+    # Every strategy starts from the same raw training split and is scored on the same test split
+    print("\nImbalance strategies (all models trained under each):")
+    with instrumentation.stage('compare_imbalance', rows=len(y_train)):
+        comparison = compare_strategies(lambda: build_model_zoo(random_state=42), X_train, y_train,
+                                        X_test, y_test, n_workers=args.n_jobs)
+    print(summarize_strategies(comparison).to_string(index=False, float_format='{:.4f}'.format))
+    print("\nROC-AUC by model:")
+    print(comparison.pivot(index='Model', columns='Strategy', values='ROC-AUC')
+          .reindex(columns=list(dict.fromkeys(comparison['Strategy']))).to_string(float_format='{:.4f}'.format))
+    print("\nFit seconds by model:")
+    print(comparison.pivot(index='Model', columns='Strategy', values='Fit s')
+          .reindex(columns=list(dict.fromkeys(comparison['Strategy']))).to_string(float_format='{:.2f}'.format))
+    print("\n" + "="*60)
+
 # Step 7: Best model details
 print("\n[7/7] Best Model Analysis:")
 best_model_name = results_df.iloc[0]['Model']
@@ -174,6 +398,9 @@ y_pred_proba_best = best_model.predict_proba(X_test_model)[:, 1]
 print(f"\nBest Model: {best_model_name}")
 print_classification_report(y_test, y_pred_best, model_name=best_model_name)
 
+# Persist the best model next to the preprocessing state for score.py
+save_model(best_model, best_model_name, use_scaled, model_dir=args.artifacts_dir)
+
 # Feature importance
 if hasattr(best_model, 'feature_importances_'):
     feature_importance = pd.DataFrame({
@@ -184,6 +411,40 @@ if hasattr(best_model, 'feature_importances_'):
     print("\nTop 10 Most Important Features:")
     print(feature_importance.head(10).to_string(index=False))
 
+if args.explain:
+    from explanation import is_tree_model, sample_background, explain_model, top_reasons
+    
+    if not is_tree_model(best_model):
+        print(f"\nSHAP explanations skipped: {best_model_name} is not a tree model")
+    else:
+        # Only employees whose features changed since the last run are explained again
+        with instrumentation.stage('explain', rows=len(X)) as record:
+            # The background comes from the training rows, so it only changes when the model does
+            shap_values, expected_value, shap_stats = explain_model(
+                best_model, X, background=sample_background(X_train, args.explain_background),
+                n_workers=args.n_jobs,
+                cache_dir=os.path.join(args.cache_dir, 'shap'), use_cache=not args.no_cache
+            )
+            record.update(shap_stats)
+        print(f"\nSHAP explanations: {shap_stats['computed']} employees explained, "
+              f"{shap_stats['cached']} from cache ({shap_stats['seconds']:.1f}s)")
+        
+        reasons = top_reasons(shap_values)
+        reasons.insert(0, 'Attrition Risk', best_model.predict_proba(X)[:, 1])
+        reasons.insert(0, 'EmployeeID', merge_stage.value.loc[X.index, 'EmployeeID'].to_numpy())
+        explanations_path = os.path.join(args.artifacts_dir, 'explanations.parquet')
+        reasons.join(shap_values.add_prefix('SHAP ')).to_parquet(explanations_path, index=False)
+        
+        print("\nTop reasons of the 5 highest-risk employees:")
+        print(reasons.sort_values('Attrition Risk', ascending=False).head(5).to_string(index=False,
+                                                                                  float_format='{:.3f}'.format))
+        print(f"Per-employee explanations: {explanations_path}")
+
+cache.print_summary()
+if run_log.enabled:
+    instrumentation.summarize([record for record in run_log.records if 'parent' not in record])
+    print(f"Run log: {run_log.path} (run {run_log.run_id})")
+
 print("\n" + "="*60)
 print("ANALYSIS COMPLETE!")
 print("="*60)
@@ -0,0 +1,163 @@
+"""
+Batch scoring of a fresh HR extract with the model saved by run_analysis.py.
+
+Reads general_data in chunks, joins the surveys and the (streamed) badge
+features, applies the persisted preprocessing state and writes EmployeeID,
+attrition probability and risk rank to CSV or Parquet.
+
+Usage:
+    python score.py --general data/general_data.csv --output scores.csv
+"""
+
+import sys
+import time
+import argparse
+from pathlib import Path
+sys.path.append('src')
+
+import numpy as np
+import pandas as pd
+
+from data_loader import iter_merged_chunks
+from preprocessing import PreprocessingPipeline
+from model_io import load_model
+
+
+def score_extract(general_path, manager_path, employee_path, model_dir='models',
+                  zip_path=None, in_time_path=None, out_time_path=None,
+                  batch_size=100_000, max_memory_mb=256, compiled=False):
+    """
+    Score every employee of an HR extract.
+    
+    Parameters:
+    -----------
+    general_path : str
+        Path to general_data.csv
+    manager_path : str
+        Path to manager_survey_data.csv
+    employee_path : str
+        Path to employee_survey_data.csv
+    model_dir : str
+        Directory with model.pkl, model.json and preprocessing.json
+    zip_path, in_time_path, out_time_path : str, optional
+        Badge sources, as for load_working_hours_data
+    batch_size : int
+        Employees read, transformed and scored per batch
+    max_memory_mb : float
+        Memory ceiling per chunk when streaming the badge files
+    compiled : bool
+        Score with the compiled NumPy version of a tree model (no model
+        library import, probabilities within 1e-6 of the original)
+    
+    Returns:
+    --------
+    pd.DataFrame, dict
+        EmployeeID, AttritionProbability and RiskRank (1 = highest risk),
+        sorted by rank, and timing statistics
+    """
+    start = time.perf_counter()
+    model, meta = load_model(model_dir, compiled=compiled)
+    preprocessor = PreprocessingPipeline.load(Path(model_dir) / 'preprocessing.json')
+    
+    # The surveys and badge features are narrow and held in full; general_data is read in chunks
+    chunks = iter_merged_chunks(general_path, manager_path, employee_path, zip_path=zip_path,
+                                in_time_path=in_time_path, out_time_path=out_time_path,
+                                chunk_rows=batch_size, max_memory_mb=max_memory_mb)
+    merged = next(chunks, None)
+    load_seconds = time.perf_counter() - start
+    
+    ids = []
+    probabilities = []
+    predict_seconds = 0.0
+    while merged is not None:
+        X = preprocessor.transform_features(merged, scaled=meta['use_scaled'])
+        if hasattr(model, 'feature_names_in_'):
+            X = pd.DataFrame(X, columns=preprocessor.feature_columns_)
+        predict_start = time.perf_counter()
+        probabilities.append(model.predict_proba(X)[:, 1])
+        predict_seconds += time.perf_counter() - predict_start
+        ids.append(merged['EmployeeID'].to_numpy())
+        merged = next(chunks, None)
+    
+    ids = np.concatenate(ids) if ids else np.array([], dtype=np.int64)
+    probabilities = np.concatenate(probabilities) if probabilities else np.array([])
+    
+    order = np.argsort(-probabilities, kind='stable')
+    rank = np.empty(len(order), dtype=np.int64)
+    rank[order] = np.arange(1, len(order) + 1)
+    
+    scores = pd.DataFrame({
+        'EmployeeID': ids[order],
+        'AttritionProbability': probabilities[order],
+        'RiskRank': rank[order]
+    })
+    
+    total_seconds = time.perf_counter() - start
+    stats = {
+        'rows': len(scores),
+        'model': meta['model_name'],
+        'load_seconds': load_seconds,
+        'predict_seconds': predict_seconds,
+        'total_seconds': total_seconds,
+        'rows_per_second': len(scores) / total_seconds if total_seconds > 0 else float('nan'),
+        'predict_rows_per_second': len(scores) / predict_seconds if predict_seconds > 0 else float('nan')
+    }
+    return scores, stats
+
+
+def write_scores(scores, output_path, chunk_rows=1_000_000):
+    """
+    Write scores to CSV, or to Parquet when the path ends in .parquet.
+    
+    Parameters:
+    -----------
+    scores : pd.DataFrame
+        Output of score_extract
+    output_path : str
+        Destination file
+    chunk_rows : int
+        Rows written per CSV chunk
+    """
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    if output_path.suffix == '.parquet':
+        scores.to_parquet(output_path, index=False)
+        return
+    for start in range(0, max(len(scores), 1), chunk_rows):
+        scores.iloc[start:start + chunk_rows].to_csv(
+            output_path, index=False, mode='w' if start == 0 else 'a', header=start == 0
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Score an HR extract with the saved attrition model')
+    parser.add_argument('--general', default='data/general_data.csv')
+    parser.add_argument('--manager-survey', default='data/manager_survey_data.csv')
+    parser.add_argument('--employee-survey', default='data/employee_survey_data.csv')
+    parser.add_argument('--badge-zip', default=None, help='in_out_time.zip with the badge data')
+    parser.add_argument('--in-time', default=None, help='in_time.csv (instead of --badge-zip)')
+    parser.add_argument('--out-time', default=None, help='out_time.csv (instead of --badge-zip)')
+    parser.add_argument('--model-dir', default='models')
+    parser.add_argument('--output', default='scores.csv', help='.csv or .parquet')
+    parser.add_argument('--batch-size', type=int, default=100_000)
+    parser.add_argument('--max-memory-mb', type=float, default=256)
+    parser.add_argument('--compiled', action='store_true',
+                        help='score tree models with their compiled NumPy version instead of the pickled model')
+    args = parser.parse_args(argv)
+    
+    scores, stats = score_extract(
+        args.general, args.manager_survey, args.employee_survey, model_dir=args.model_dir,
+        zip_path=args.badge_zip, in_time_path=args.in_time, out_time_path=args.out_time,
+        batch_size=args.batch_size, max_memory_mb=args.max_memory_mb, compiled=args.compiled
+    )
+    write_scores(scores, args.output)
+    
+    print(f"Scored {stats['rows']} employees with {stats['model']} -> {args.output}")
+    print(f"  Load: {stats['load_seconds']:.2f}s, predict: {stats['predict_seconds']:.2f}s, "
+          f"total: {stats['total_seconds']:.2f}s")
+    print(f"  Throughput: {stats['rows_per_second']:,.0f} rows/sec "
+          f"({stats['predict_rows_per_second']:,.0f} rows/sec in predict_proba)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,460 @@
+"""
+Interactive scoring service for single employees, backed by the saved model.
+
+Loads the model and preprocessing state written by run_analysis.py once and
+serves them over HTTP with asyncio (standard library only). Concurrent
+single-employee requests are coalesced into micro-batches: a batch is
+scored as soon as it holds max_batch_size requests or its oldest request
+has waited max_latency_ms, so one predict_proba call serves many requests.
+
+Endpoints:
+    POST /score    JSON object with the merged raw fields of one employee
+                   (general data and surveys, as in data/, plus the badge
+                   features when the model was trained with them); returns
+                   {"EmployeeID": ..., "AttritionProbability": ...}
+    GET  /stats    request and batch counters, p50/p99 latency, throughput
+    GET  /health   liveness, model name and required fields
+
+Usage:
+    python serve.py --port 8080 --max-batch-size 64 --max-latency-ms 5
+    python benchmarks/load_test.py --port 8080
+"""
+
+import sys
+import json
+import time
+import signal
+import asyncio
+import argparse
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+sys.path.append('src')
+
+import numpy as np
+import pandas as pd
+
+from data_loader import WORKING_HOURS_FEATURES
+from preprocessing import PreprocessingPipeline
+from model_io import load_model
+
+
+MAX_BODY_BYTES = 1 << 20
+
+_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+            413: 'Payload Too Large', 422: 'Unprocessable Entity', 500: 'Internal Server Error',
+            503: 'Service Unavailable'}
+
+
+class ScoringModel:
+    """
+    The saved model and preprocessing state, scoring raw employee records.
+    
+    Parameters:
+    -----------
+    model_dir : str
+        Directory with model.pkl, model.json and preprocessing.json
+    compiled : bool
+        Use the compiled NumPy version of a tree model (see compiled_trees)
+    """
+    
+    def __init__(self, model_dir='models', compiled=False):
+        self.model, self.meta = load_model(model_dir, compiled=compiled)
+        self.preprocessor = PreprocessingPipeline.load(Path(model_dir) / 'preprocessing.json')
+        self.columns = [col for col in self.preprocessor.columns_ if col != self.preprocessor.target_col]
+        # Badge features were never missing in training, so imputing them would fabricate a working pattern
+        self.required_columns = [col for col in self.columns if col in WORKING_HOURS_FEATURES]
+    
+    def check_record(self, record):
+        """
+        Raise ValueError when a record lacks a required (badge-derived) field.
+        """
+        missing = [col for col in self.required_columns if record.get(col) is None]
+        if missing:
+            raise ValueError(f"missing badge-derived fields {missing} (the model uses them and they are "
+                             f"not imputed)")
+    
+    def predict(self, records):
+        """
+        Attrition probability of each record.
+        
+        Parameters:
+        -----------
+        records : list of dict
+            Raw merged fields per employee; absent or null fields are imputed
+            like missing values in the training data, except required_columns
+            (the badge features, when the model uses them), which raise
+            ValueError. Unknown keys are ignored
+        
+        Returns:
+        --------
+        np.ndarray
+            Probability of the positive class per record
+        """
+        for record in records:
+            self.check_record(record)
+        # Fixed columns, so a record is transformed the same way whatever batch it lands in
+        df = pd.DataFrame.from_records(records, columns=self.columns)
+        X = self.preprocessor.transform_features(df, scaled=self.meta['use_scaled'])
+        if hasattr(self.model, 'feature_names_in_'):
+            X = pd.DataFrame(X, columns=self.preprocessor.feature_columns_)
+        return self.model.predict_proba(X)[:, 1]
+    
+    def score_batch(self, records):
+        """
+        Score a batch, isolating records that cannot be transformed.
+        
+        Returns:
+        --------
+        list
+            Probability (float) or the exception raised, per record
+        """
+        results = []
+        for record in records:
+            try:
+                self.check_record(record)
+                results.append(None)
+            except ValueError as e:
+                results.append(e)
+        valid = [record for record, result in zip(records, results) if result is None]
+        if not valid:
+            return results
+        try:
+            scores = iter([float(p) for p in self.predict(valid)])
+            return [next(scores) if result is None else result for result in results]
+        except Exception as e:
+            if len(valid) == 1:
+                return [e if result is None else result for result in results]
+        # One bad record should not fail the requests batched with it
+        for i, record in enumerate(records):
+            if results[i] is None:
+                try:
+                    results[i] = float(self.predict([record])[0])
+                except Exception as e:
+                    results[i] = e
+        return results
+
+
+class LatencyStats:
+    """
+    Request and batch counters with latency percentiles over a recent window.
+    
+    Parameters:
+    -----------
+    window : int
+        Latest requests kept for the percentiles and the recent throughput
+    rate_seconds : float
+        Period of the recent throughput
+    """
+    
+    def __init__(self, window=100_000, rate_seconds=10.0):
+        self.started = time.perf_counter()
+        self.rate_seconds = rate_seconds
+        self.recent = deque(maxlen=window)
+        self.requests = 0
+        self.errors = 0
+        self.batches = 0
+        self.batch_rows = 0
+        self.max_batch = 0
+        self.predict_seconds = 0.0
+    
+    def record_request(self, latency, ok=True):
+        self.requests += 1
+        self.errors += not ok
+        self.recent.append((time.perf_counter(), latency))
+    
+    def record_batch(self, size, seconds):
+        self.batches += 1
+        self.batch_rows += size
+        self.max_batch = max(self.max_batch, size)
+        self.predict_seconds += seconds
+    
+    def snapshot(self):
+        """
+        Current counters as a JSON-serializable dict (latencies in milliseconds).
+        """
+        now = time.perf_counter()
+        uptime = now - self.started
+        latencies = np.array([latency for _, latency in self.recent]) * 1000
+        p50, p99 = np.percentile(latencies, [50, 99]) if len(latencies) else (None, None)
+        period = min(self.rate_seconds, uptime)
+        n_recent = sum(1 for finished, _ in self.recent if finished >= now - period)
+        return {
+            'uptime_seconds': round(uptime, 3),
+            'requests': self.requests,
+            'errors': self.errors,
+            'batches': self.batches,
+            'mean_batch_size': round(self.batch_rows / self.batches, 2) if self.batches else None,
+            'largest_batch': self.max_batch,
+            'latency_p50_ms': None if p50 is None else round(float(p50), 3),
+            'latency_p99_ms': None if p99 is None else round(float(p99), 3),
+            'latency_window': len(latencies),
+            'requests_per_second': round(self.requests / uptime, 2) if uptime > 0 else None,
+            'recent_requests_per_second': round(n_recent / period, 2) if period > 0 else None,
+            'predict_seconds': round(self.predict_seconds, 3)
+        }
+
+
+class MicroBatcher:
+    """
+    Coalesce concurrent single-record requests into batched scoring calls.
+    
+    A batch is flushed when it holds max_batch_size records or when its
+    oldest record has waited max_latency_ms. Scoring runs on one worker
+    thread, so the event loop keeps accepting requests meanwhile; requests
+    arriving during a slow batch are flushed together right after it.
+    
+    Parameters:
+    -----------
+    score_batch : callable
+        Takes a list of records and returns one probability or exception each
+    max_batch_size : int
+        Largest batch passed to score_batch
+    max_latency_ms : float
+        Longest a request waits for other requests to join its batch
+    stats : LatencyStats, optional
+        Receives the batch counters
+    """
+    
+    def __init__(self, score_batch, max_batch_size=64, max_latency_ms=5.0, stats=None):
+        self.score_batch = score_batch
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_latency = max(0.0, max_latency_ms) / 1000
+        self.stats = stats if stats is not None else LatencyStats()
+        self._queue = None
+        self._task = None
+        self._executor = None
+    
+    def start(self):
+        self._queue = asyncio.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='score')
+        self._task = asyncio.create_task(self._run())
+    
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+    
+    async def submit(self, record):
+        """
+        Queue one record and wait for its probability.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        await self._queue.put((record, future, loop.time()))
+        return await future
+    
+    async def _next_batch(self):
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = batch[0][2] + self.max_latency
+        while len(batch) < self.max_batch_size:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+    
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._next_batch()
+            records = [record for record, _, _ in batch]
+            start = time.perf_counter()
+            try:
+                results = await loop.run_in_executor(self._executor, self.score_batch, records)
+            except Exception as e:
+                results = [e] * len(batch)
+            self.stats.record_batch(len(batch), time.perf_counter() - start)
+            for (_, future, _), result in zip(batch, results):
+                if future.done():
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+
+class ScoringServer:
+    """
+    HTTP/1.1 front end (keep-alive, JSON bodies) of a MicroBatcher.
+    
+    Parameters:
+    -----------
+    scorer : ScoringModel
+        Loaded model
+    max_batch_size, max_latency_ms :
+        Micro-batching limits, see MicroBatcher
+    """
+    
+    def __init__(self, scorer, max_batch_size=64, max_latency_ms=5.0):
+        self.scorer = scorer
+        self.stats = LatencyStats()
+        self.batcher = MicroBatcher(scorer.score_batch, max_batch_size, max_latency_ms, self.stats)
+        self.settings = {'max_batch_size': self.batcher.max_batch_size, 'max_latency_ms': max_latency_ms}
+    
+    async def handle_score(self, body):
+        start = time.perf_counter()
+        try:
+            record = json.loads(body)
+        except ValueError:
+            self.stats.record_request(time.perf_counter() - start, ok=False)
+            return 400, {'error': 'body is not valid JSON'}
+        if not isinstance(record, dict):
+            self.stats.record_request(time.perf_counter() - start, ok=False)
+            return 400, {'error': 'body must be a JSON object with the fields of one employee'}
+        try:
+            probability = await self.batcher.submit(record)
+        except Exception as e:
+            self.stats.record_request(time.perf_counter() - start, ok=False)
+            return 422, {'error': f'{type(e).__name__}: {e}'}
+        self.stats.record_request(time.perf_counter() - start)
+        return 200, {'EmployeeID': record.get('EmployeeID'), 'AttritionProbability': probability}
+    
+    async def dispatch(self, method, path, body):
+        path = path.split('?', 1)[0]
+        routes = {'/score': 'POST', '/stats': 'GET', '/health': 'GET'}
+        if path not in routes:
+            return 404, {'error': f'no route {path}'}
+        if method != routes[path]:
+            return 405, {'error': f'{path} expects {routes[path]}'}
+        if path == '/score':
+            return await self.handle_score(body)
+        if path == '/stats':
+            return 200, {**self.stats.snapshot(), **self.settings, 'model': self.scorer.meta['model_name']}
+        return 200, {'status': 'ok', 'model': self.scorer.meta['model_name'],
+                     'required_fields': self.scorer.required_columns}
+    
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b'\r\n\r\n')
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                except asyncio.LimitOverrunError:
+                    await _write_response(writer, 413, {'error': 'headers too large'}, keep_alive=False)
+                    break
+                
+                lines = head.decode('latin-1').split('\r\n')
+                try:
+                    method, path, version = lines[0].split(' ', 2)
+                except ValueError:
+                    await _write_response(writer, 400, {'error': 'malformed request line'}, keep_alive=False)
+                    break
+                headers = {}
+                for line in lines[1:]:
+                    if ':' in line:
+                        name, value = line.split(':', 1)
+                        headers[name.strip().lower()] = value.strip()
+                connection = headers.get('connection', '').lower()
+                keep_alive = connection == 'keep-alive' if version == 'HTTP/1.0' else connection != 'close'
+                
+                try:
+                    length = int(headers.get('content-length', 0))
+                except ValueError:
+                    length = -1
+                if not 0 <= length <= MAX_BODY_BYTES:
+                    await _write_response(writer, 413, {'error': 'missing or oversized body'}, keep_alive=False)
+                    break
+                try:
+                    body = await reader.readexactly(length)
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                
+                try:
+                    status, payload = await self.dispatch(method, path, body)
+                except Exception as e:
+                    status, payload = 500, {'error': f'{type(e).__name__}: {e}'}
+                await _write_response(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+    
+    async def serve(self, host='127.0.0.1', port=8080, ready=None):
+        """
+        Run until cancelled or until SIGINT/SIGTERM.
+        
+        Parameters:
+        -----------
+        host, port :
+            Address to listen on (port 0 picks a free port)
+        ready : callable, optional
+            Called with the bound (host, port) once the server accepts connections
+        """
+        self.batcher.start()
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, stop.set)
+            except (NotImplementedError, RuntimeError):
+                pass
+        if ready is not None:
+            ready(server.sockets[0].getsockname()[:2])
+        try:
+            async with server:
+                await stop.wait()
+        finally:
+            await self.batcher.stop()
+
+
+async def _write_response(writer, status, payload, keep_alive=True):
+    body = json.dumps(payload).encode()
+    head = (f'HTTP/1.1 {status} {_REASONS.get(status, "")}\r\n'
+            f'Content-Type: application/json\r\n'
+            f'Content-Length: {len(body)}\r\n'
+            f'Connection: {"keep-alive" if keep_alive else "close"}\r\n\r\n')
+    writer.write(head.encode('latin-1') + body)
+    await writer.drain()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Serve attrition scores for single employees over HTTP')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--model-dir', default='models')
+    parser.add_argument('--max-batch-size', type=int, default=64,
+                        help='requests scored together in one predict_proba call at most')
+    parser.add_argument('--max-latency-ms', type=float, default=5.0,
+                        help='longest a request waits for others to join its batch')
+    parser.add_argument('--compiled', action='store_true',
+                        help='score tree models with their compiled NumPy version instead of the pickled model')
+    args = parser.parse_args(argv)
+    
+    start = time.perf_counter()
+    scorer = ScoringModel(args.model_dir, compiled=args.compiled)
+    # Warm up the model and preprocessing so the first request does not pay for it
+    scorer.predict([{col: 0.0 for col in scorer.required_columns}])
+    print(f"Loaded {scorer.meta['model_name']} from {args.model_dir} in {time.perf_counter() - start:.2f}s")
+    
+    server = ScoringServer(scorer, args.max_batch_size, args.max_latency_ms)
+    
+    def ready(address):
+        print(f"Serving on http://{address[0]}:{address[1]} "
+              f"(batches of up to {args.max_batch_size}, {args.max_latency_ms:g} ms max wait)", flush=True)
+    
+    asyncio.run(server.serve(args.host, args.port, ready))
+    
+    stats = server.stats.snapshot()
+    print(f"Served {stats['requests']} requests ({stats['errors']} errors) in {stats['batches']} batches, "
+          f"p50 {stats['latency_p50_ms']} ms, p99 {stats['latency_p99_ms']} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,339 @@
+"""
+Tree ensembles compiled to packed NumPy arrays for dependency-free scoring.
+
+compile_model flattens a fitted Random Forest, Extra Trees, Gradient
+Boosting, XGBoost or LightGBM classifier into one set of node arrays
+(feature, threshold, first child, missing direction, value) shared by all
+trees. CompiledTrees.predict_proba walks every tree of a batch one level
+at a time with vectorized gathers, so it needs only NumPy, and a saved
+model is memory-mapped on load.
+
+Conventions of the packed format:
+- nodes are numbered breadth-first, so the right child of a node
+  directly follows its left child;
+- a sample moves to the right child when ``x > threshold`` (strict ``<``
+  splits are stored with the next lower threshold) or when x is NaN and
+  the node sends missing values right;
+- leaves point to themselves with an infinite threshold, so extra levels
+  leave them in place;
+- leaf values already include tree weights (1 / n_trees for forests, the
+  learning rate for gradient boosting), so the raw score is base_score
+  plus the sum of the reached leaves, followed by the output transform.
+"""
+
+import os
+import json
+
+import numpy as np
+
+
+FORMAT_VERSION = 1
+
+_ARRAYS = ['feature', 'threshold', 'left', 'missing_left', 'value', 'roots']
+
+
+class CompiledTrees:
+    """
+    A tree ensemble as packed node arrays, with a vectorized predictor.
+    
+    Parameters:
+    -----------
+    arrays : dict
+        Node arrays (see _ARRAYS); roots holds the root node of every tree
+    meta : dict
+        n_features, max_depth, input_dtype ('float32' or 'float64'),
+        transform ('identity' or 'sigmoid'), base_score and model_class
+    """
+    
+    def __init__(self, arrays, meta):
+        for name in _ARRAYS:
+            setattr(self, name, arrays[name])
+        self.meta = meta
+        self.n_features = meta['n_features']
+        self.max_depth = meta['max_depth']
+        self.classes_ = np.array([0, 1])
+    
+    @property
+    def n_trees(self):
+        return len(self.roots)
+    
+    def raw_score(self, X, batch_size=None):
+        """
+        Base score plus the sum of the leaf values reached by each row.
+        
+        Parameters:
+        -----------
+        X : array-like
+            (n_samples, n_features) feature matrix
+        batch_size : int, optional
+            Rows walked at once (default: about 200k row-tree pairs per batch,
+            small enough to stay in cache)
+        
+        Returns:
+        --------
+        np.ndarray
+        """
+        # Compare in the precision the original library uses
+        X = np.asarray(X, dtype=self.meta['input_dtype']).astype(np.float64, copy=False)
+        if X.ndim != 2 or X.shape[1] != self.n_features:
+            raise ValueError(f'Expected {self.n_features} features, got shape {X.shape}')
+        if batch_size is None:
+            batch_size = max(1, 200_000 // max(self.n_trees, 1))
+        
+        scores = np.empty(len(X))
+        for start in range(0, len(X), batch_size):
+            batch = X[start:start + batch_size]
+            has_missing = np.isnan(batch).any()
+            flat = batch.ravel()
+            row_offsets = (np.arange(len(batch)) * self.n_features)[:, np.newaxis]
+            nodes = np.broadcast_to(self.roots, (len(batch), self.n_trees))
+            for _ in range(self.max_depth):
+                values = flat[row_offsets + self.feature[nodes]]
+                go_right = values > self.threshold[nodes]
+                if has_missing:
+                    go_right |= np.isnan(values) & ~self.missing_left[nodes]
+                next_nodes = self.left[nodes] + go_right
+                # Stop early once every row has reached a leaf in every tree
+                if np.array_equal(next_nodes, nodes):
+                    break
+                nodes = next_nodes
+            scores[start:start + len(batch)] = self.value[nodes].sum(axis=1)
+        return scores + self.meta['base_score']
+    
+    def predict_proba(self, X, batch_size=None):
+        """
+        Class probabilities, shaped (n_samples, 2) like sklearn's predict_proba.
+        """
+        score = self.raw_score(X, batch_size)
+        if self.meta['transform'] == 'sigmoid':
+            positive = 1.0 / (1.0 + np.exp(-score))
+        else:
+            positive = score
+        return np.column_stack([1.0 - positive, positive])
+    
+    def predict(self, X, batch_size=None):
+        return (self.predict_proba(X, batch_size)[:, 1] > 0.5).astype(np.int64)
+    
+    def save(self, path):
+        """
+        Write the model as one .npy file per array plus meta.json, readable by load_compiled.
+        """
+        os.makedirs(path, exist_ok=True)
+        for name in _ARRAYS:
+            np.save(os.path.join(path, f'{name}.npy'), np.ascontiguousarray(getattr(self, name)))
+        with open(os.path.join(path, 'meta.json'), 'w') as f:
+            json.dump(dict(self.meta, format_version=FORMAT_VERSION), f, indent=2)
+
+
+def load_compiled(path, mmap=True):
+    """
+    Load a model written by CompiledTrees.save.
+    
+    Parameters:
+    -----------
+    path : str
+        Directory of the compiled model
+    mmap : bool
+        Memory-map the arrays instead of reading them
+    
+    Returns:
+    --------
+    CompiledTrees
+    """
+    with open(os.path.join(path, 'meta.json')) as f:
+        meta = json.load(f)
+    if meta.get('format_version') != FORMAT_VERSION:
+        raise ValueError(f"Unsupported compiled model format: {meta.get('format_version')}")
+    arrays = {name: np.load(os.path.join(path, f'{name}.npy'), mmap_mode='r' if mmap else None)
+              for name in _ARRAYS}
+    return CompiledTrees(arrays, meta)
+
+
+class _Packer:
+    """
+    Accumulates trees into shared node arrays.
+    """
+    
+    def __init__(self):
+        self.parts = {name: [] for name in _ARRAYS if name != 'roots'}
+        self.roots = []
+        self.n_nodes = 0
+        self.max_depth = 0
+    
+    def add_tree(self, feature, threshold, left, right, missing_left, value, is_leaf):
+        """
+        Add one tree given per-node arrays with tree-local child indices (root = node 0).
+        """
+        # Breadth-first order puts both children of a node next to each other
+        order = [0]
+        depth = {0: 0}
+        first_child = np.zeros(len(is_leaf), dtype=np.int64)
+        for node in order:
+            if not is_leaf[node]:
+                first_child[node] = len(order)
+                order.extend((left[node], right[node]))
+                depth[left[node]] = depth[right[node]] = depth[node] + 1
+        order = np.array(order)
+        
+        leaf = np.asarray(is_leaf, dtype=bool)[order]
+        offset = self.n_nodes
+        self.parts['feature'].append(np.where(leaf, 0, np.asarray(feature)[order]).astype(np.int32))
+        self.parts['threshold'].append(np.where(leaf, np.inf, np.asarray(threshold, dtype=np.float64)[order]))
+        self.parts['left'].append((np.where(leaf, np.arange(len(order)), first_child[order]) + offset).astype(np.int32))
+        self.parts['missing_left'].append(np.asarray(missing_left, dtype=bool)[order] | leaf)
+        self.parts['value'].append(np.where(leaf, np.asarray(value, dtype=np.float64)[order], 0.0))
+        self.roots.append(offset)
+        self.n_nodes += len(order)
+        self.max_depth = max(self.max_depth, max(depth.values()))
+    
+    def build(self, meta):
+        arrays = {name: np.concatenate(parts) for name, parts in self.parts.items()}
+        arrays['roots'] = np.array(self.roots, dtype=np.int32)
+        return CompiledTrees(arrays, dict(meta, max_depth=int(self.max_depth)))
+
+
+def _below_float32(threshold):
+    # x < t on float32 values is x <= (the float32 just below t)
+    threshold = np.asarray(threshold, dtype=np.float32)
+    return np.nextafter(threshold, np.float32(-np.inf)).astype(np.float64)
+
+
+def _compile_sklearn_tree(packer, tree, scale, positive_proba):
+    is_leaf = tree.children_left == -1
+    if positive_proba:
+        # Forest trees vote with the class distribution of the leaf
+        counts = tree.value[:, 0, :]
+        value = counts[:, 1] / np.maximum(counts.sum(axis=1), 1e-300)
+    else:
+        value = tree.value[:, 0, 0]
+    packer.add_tree(tree.feature, tree.threshold, tree.children_left, tree.children_right,
+                    np.zeros(len(is_leaf), dtype=bool), value * scale, is_leaf)
+
+
+def _compile_forest(model):
+    packer = _Packer()
+    for estimator in model.estimators_:
+        _compile_sklearn_tree(packer, estimator.tree_, 1.0 / len(model.estimators_), positive_proba=True)
+    return packer.build({'n_features': int(model.n_features_in_), 'input_dtype': 'float32',
+                         'transform': 'identity', 'base_score': 0.0})
+
+
+def _compile_gradient_boosting(model):
+    if model.n_classes_ != 2:
+        raise ValueError('Only binary gradient boosting models can be compiled')
+    packer = _Packer()
+    for estimator in model.estimators_[:, 0]:
+        _compile_sklearn_tree(packer, estimator.tree_, model.learning_rate, positive_proba=False)
+    base_score = float(model._raw_predict_init(np.zeros((1, model.n_features_in_), dtype=np.float32))[0, 0])
+    return packer.build({'n_features': int(model.n_features_in_), 'input_dtype': 'float32',
+                         'transform': 'sigmoid', 'base_score': base_score})
+
+
+def _compile_xgboost(model):
+    booster = model.get_booster()
+    config = json.loads(booster.save_raw('json'))['learner']
+    objective = config['objective']['name']
+    if objective not in ('binary:logistic', 'reg:logistic'):
+        raise ValueError(f'Unsupported XGBoost objective: {objective}')
+    # base_score is stored as a probability
+    base_probability = float(config['learner_model_param']['base_score'])
+    trees = config['gradient_booster']['model']['trees']
+    best_iteration = getattr(model, 'best_iteration', None)
+    if best_iteration is not None:
+        # predict_proba stops at the best iteration of early stopping
+        trees = trees[:(best_iteration + 1) * int(config['gradient_booster']['model']['gbtree_model_param']
+                                                    .get('num_parallel_tree', 1))]
+    
+    packer = _Packer()
+    for tree in trees:
+        if any(int(split_type) != 0 for split_type in tree.get('split_type', [])):
+            raise ValueError('Categorical XGBoost splits are not supported')
+        left = np.array(tree['left_children'])
+        is_leaf = left == -1
+        conditions = np.array(tree['split_conditions'], dtype=np.float32)
+        packer.add_tree(np.array(tree['split_indices']), _below_float32(conditions), left,
+                        np.array(tree['right_children']), np.array(tree['default_left'], dtype=bool),
+                        conditions.astype(np.float64), is_leaf)
+    return packer.build({'n_features': int(config['learner_model_param']['num_feature']),
+                         'input_dtype': 'float32', 'transform': 'sigmoid',
+                         'base_score': float(np.log(base_probability / (1.0 - base_probability)))})
+
+
+def _flatten_lightgbm_tree(structure):
+    nodes = []
+    
+    def visit(node):
+        index = len(nodes)
+        nodes.append(None)
+        if 'leaf_value' in node:
+            nodes[index] = (0, 0.0, -1, -1, False, node['leaf_value'], True)
+            return index
+        if node['decision_type'] != '<=':
+            raise ValueError('Categorical LightGBM splits are not supported')
+        if node['missing_type'] == 'Zero':
+            raise ValueError('LightGBM models trained with zero_as_missing are not supported')
+        left = visit(node['left_child'])
+        right = visit(node['right_child'])
+        # Without a missing type, NaN is scored as 0.0
+        missing_left = node['default_left'] if node['missing_type'] == 'NaN' else 0.0 <= node['threshold']
+        nodes[index] = (node['split_feature'], node['threshold'], left, right, missing_left, 0.0, False)
+        return index
+    
+    visit(structure)
+    return [np.array(column) for column in zip(*nodes)]
+
+
+def _compile_lightgbm(model):
+    dump = model.booster_.dump_model()
+    if dump['objective'].split()[0] != 'binary':
+        raise ValueError(f"Unsupported LightGBM objective: {dump['objective']}")
+    sigmoid = float(dump['objective'].split('sigmoid:')[1]) if 'sigmoid:' in dump['objective'] else 1.0
+    trees = dump['tree_info']
+    # Random forest mode averages the trees instead of adding them
+    scale = 1.0 / len(trees) if dump.get('average_output') else 1.0
+    
+    packer = _Packer()
+    for tree in trees:
+        feature, threshold, left, right, missing_left, value, is_leaf = _flatten_lightgbm_tree(tree['tree_structure'])
+        packer.add_tree(feature, threshold.astype(np.float64), left, right, missing_left,
+                        value.astype(np.float64) * scale * sigmoid, is_leaf.astype(bool))
+    return packer.build({'n_features': int(dump['max_feature_idx']) + 1, 'input_dtype': 'float64',
+                         'transform': 'sigmoid', 'base_score': 0.0})
+
+
+_COMPILERS = {
+    'RandomForestClassifier': _compile_forest,
+    'ExtraTreesClassifier': _compile_forest,
+    'GradientBoostingClassifier': _compile_gradient_boosting,
+    'XGBClassifier': _compile_xgboost,
+    'LGBMClassifier': _compile_lightgbm
+}
+
+
+def can_compile(model):
+    return type(model).__name__ in _COMPILERS
+
+
+def compile_model(model):
+    """
+    Flatten a fitted binary tree-ensemble classifier into packed NumPy arrays.
+    
+    Parameters:
+    -----------
+    model : estimator
+        Fitted RandomForestClassifier, ExtraTreesClassifier,
+        GradientBoostingClassifier, XGBClassifier or LGBMClassifier
+    
+    Returns:
+    --------
+    CompiledTrees
+        Predictor whose probabilities match model.predict_proba within 1e-6
+    """
+    model_class = type(model).__name__
+    if model_class not in _COMPILERS:
+        raise ValueError(f"Cannot compile {model_class} (supported: {', '.join(_COMPILERS)})")
+    if len(getattr(model, 'classes_', [0, 1])) != 2:
+        raise ValueError('Only binary classifiers can be compiled')
+    compiled = _COMPILERS[model_class](model)
+    compiled.meta['model_class'] = model_class
+    return compiled
@@ -4,11 +4,101 @@ Data loading utilities for HumanForYou employee turnover analysis.
 
 import pandas as pd
 import numpy as np
+import hashlib
+import json
 import zipfile
 import os
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from itertools import zip_longest
 from pathlib import Path
 
+from instrumentation import instrumented
 
+try:
+    import pyarrow  # noqa: F401
+    CSV_ENGINE = 'pyarrow'
+except ImportError:
+    CSV_ENGINE = 'c'
+
+
+# Declared dtypes for the HR sources: small ordinals as int8/int16, columns
+# that can be missing as float32 and text columns as pandas categories
+GENERAL_DATA_SCHEMA = {
+    'Age': 'int8',
+    'Attrition': 'category',
+    'BusinessTravel': 'category',
+    'Department': 'category',
+    'DistanceFromHome': 'int16',
+    'Education': 'int8',
+    'EducationField': 'category',
+    'EmployeeCount': 'int8',
+    'EmployeeID': 'int32',
+    'Gender': 'category',
+    'JobLevel': 'int8',
+    'JobRole': 'category',
+    'MaritalStatus': 'category',
+    'MonthlyIncome': 'int32',
+    'NumCompaniesWorked': 'float32',
+    'Over18': 'category',
+    'PercentSalaryHike': 'int8',
+    'StandardHours': 'int8',
+    'StockOptionLevel': 'int8',
+    'TotalWorkingYears': 'float32',
+    'TrainingTimesLastYear': 'int8',
+    'YearsAtCompany': 'int16',
+    'YearsSinceLastPromotion': 'int16',
+    'YearsWithCurrManager': 'int16'
+}
+
+MANAGER_SURVEY_SCHEMA = {
+    'EmployeeID': 'int32',
+    'JobInvolvement': 'int8',
+    'PerformanceRating': 'int8'
+}
+
+EMPLOYEE_SURVEY_SCHEMA = {
+    'EmployeeID': 'int32',
+    'EnvironmentSatisfaction': 'float32',
+    'JobSatisfaction': 'float32',
+    'WorkLifeBalance': 'float32'
+}
+
+
+def read_csv_with_schema(data_path, schema, engine=None, chunksize=None):
+    """
+    Read a CSV file with declared column dtypes.
+    
+    'NA' and empty fields become nulls at parse time. Columns missing from
+    the schema keep the dtype pandas infers.
+    
+    Parameters:
+    -----------
+    data_path : str
+        Path to the CSV file
+    schema : dict
+        Column name to dtype mapping
+    engine : str, optional
+        pandas CSV engine (defaults to pyarrow when installed, else the C engine)
+    chunksize : int, optional
+        Return an iterator of frames with this many rows (uses the C engine)
+    
+    Returns:
+    --------
+    pd.DataFrame
+        Loaded data with compact dtypes (an iterator of frames with chunksize)
+    """
+    columns = pd.read_csv(data_path, nrows=0).columns
+    dtype = {col: schema[col] for col in columns if col in schema}
+    if chunksize is not None:
+        engine = 'c'
+    return pd.read_csv(data_path, dtype=dtype, na_values=['NA', ''], keep_default_na=False,
+                       engine=engine or CSV_ENGINE, chunksize=chunksize)
+
+
+@instrumented()
 def load_general_data(data_path='data/general_data.csv'):
     """
     Load the general HR data.
@@ -17,17 +107,18 @@ def load_general_data(data_path='data/general_data.csv'):
     -----------
     data_path : str
         Path to the general_data.csv file
-        
+    
     Returns:
     --------
     pd.DataFrame
         Loaded general data
     """
-    df = pd.read_csv(data_path)
+    df = read_csv_with_schema(data_path, GENERAL_DATA_SCHEMA)
     print(f"Loaded general_data.csv: {df.shape[0]} rows, {df.shape[1]} columns")
     return df
 
 
+@instrumented()
 def load_manager_survey(data_path='data/manager_survey_data.csv'):
     """
     Load manager survey data.
@@ -36,17 +127,18 @@ def load_manager_survey(data_path='data/manager_survey_data.csv'):
     -----------
     data_path : str
         Path to the manager_survey_data.csv file
-        
+    
     Returns:
     --------
     pd.DataFrame
         Loaded manager survey data
     """
-    df = pd.read_csv(data_path)
+    df = read_csv_with_schema(data_path, MANAGER_SURVEY_SCHEMA)
     print(f"Loaded manager_survey_data.csv: {df.shape[0]} rows, {df.shape[1]} columns")
     return df
 
 
+@instrumented()
 def load_employee_survey(data_path='data/employee_survey_data.csv'):
     """
     Load employee survey data.
@@ -55,17 +147,39 @@ def load_employee_survey(data_path='data/employee_survey_data.csv'):
     -----------
     data_path : str
         Path to the employee_survey_data.csv file
-        
+    
     Returns:
     --------
     pd.DataFrame
         Loaded employee survey data
     """
-    df = pd.read_csv(data_path)
+    df = read_csv_with_schema(data_path, EMPLOYEE_SURVEY_SCHEMA)
     print(f"Loaded employee_survey_data.csv: {df.shape[0]} rows, {df.shape[1]} columns")
     return df
 
 
+def _fix_employee_id_column(df):
+    """
+    Name the unnamed first column of a badge frame EmployeeID and make it integer, in place.
+    """
+    if df.columns[0] == '' or df.columns[0].startswith('Unnamed'):
+        df.rename(columns={df.columns[0]: 'EmployeeID'}, inplace=True)
+    if df['EmployeeID'].dtype == 'object':
+        df['EmployeeID'] = df['EmployeeID'].astype(str).str.strip('"').astype(int)
+
+
+def _read_zip_member(zip_path, member):
+    """
+    Read one CSV member of a ZIP archive through its own handle, so members can be read concurrently.
+    """
+    with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+        with zip_ref.open(member) as f:
+            df = pd.read_csv(f)
+    _fix_employee_id_column(df)
+    return df
+
+
+@instrumented()
 def load_working_hours_data(zip_path='data/in_out_time.zip', in_time_path=None, out_time_path=None):
     """
     Load working hours data from ZIP file or individual CSV files.
@@ -78,7 +192,7 @@ def load_working_hours_data(zip_path='data/in_out_time.zip', in_time_path=None,
         Path to in_time.csv file (if not in ZIP)
     out_time_path : str, optional
         Path to out_time.csv file (if not in ZIP)
-        
+    
     Returns:
     --------
     tuple
@@ -94,17 +208,9 @@ def load_working_hours_data(zip_path='data/in_out_time.zip', in_time_path=None,
             in_time_df = pd.read_csv(in_time_path)
             out_time_df = pd.read_csv(out_time_path)
             
-            # Fix EmployeeID column if it has empty name
-            if in_time_df.columns[0] == '' or in_time_df.columns[0].startswith('Unnamed'):
-                in_time_df.rename(columns={in_time_df.columns[0]: 'EmployeeID'}, inplace=True)
-            if out_time_df.columns[0] == '' or out_time_df.columns[0].startswith('Unnamed'):
-                out_time_df.rename(columns={out_time_df.columns[0]: 'EmployeeID'}, inplace=True)
-            
-            # Convert EmployeeID to int if it's a string
-            if in_time_df['EmployeeID'].dtype == 'object':
-                in_time_df['EmployeeID'] = in_time_df['EmployeeID'].astype(str).str.strip('"').astype(int)
-            if out_time_df['EmployeeID'].dtype == 'object':
-                out_time_df['EmployeeID'] = out_time_df['EmployeeID'].astype(str).str.strip('"').astype(int)
+            # Fix EmployeeID column if it has empty name or string values
+            _fix_employee_id_column(in_time_df)
+            _fix_employee_id_column(out_time_df)
             
             print(f"Loaded in_time.csv: {in_time_df.shape}")
             print(f"Loaded out_time.csv: {out_time_df.shape}")
@@ -121,14 +227,20 @@ def load_working_hours_data(zip_path='data/in_out_time.zip', in_time_path=None,
                 # List files in zip
                 file_list = zip_ref.namelist()
                 print(f"Files in ZIP: {file_list}")
-                
-                for file_name in file_list:
-                    if 'in_time' in file_name.lower():
-                        in_time_df = pd.read_csv(zip_ref.open(file_name))
-                        print(f"Loaded {file_name}: {in_time_df.shape}")
-                    elif 'out_time' in file_name.lower():
-                        out_time_df = pd.read_csv(zip_ref.open(file_name))
-                        print(f"Loaded {file_name}: {out_time_df.shape}")
+            
+            in_member = next((f for f in file_list if 'in_time' in f.lower()), None)
+            out_member = next((f for f in file_list if 'out_time' in f.lower()), None)
+            
+            # Decompress and parse both members in parallel
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                in_future = executor.submit(_read_zip_member, zip_path, in_member) if in_member else None
+                out_future = executor.submit(_read_zip_member, zip_path, out_member) if out_member else None
+                if in_future is not None:
+                    in_time_df = in_future.result()
+                    print(f"Loaded {in_member}: {in_time_df.shape}")
+                if out_future is not None:
+                    out_time_df = out_future.result()
+                    print(f"Loaded {out_member}: {out_time_df.shape}")
         except Exception as e:
             print(f"Could not load from ZIP file: {e}")
     
@@ -137,17 +249,11 @@ def load_working_hours_data(zip_path='data/in_out_time.zip', in_time_path=None,
         try:
             if os.path.exists('data/in_time.csv'):
                 in_time_df = pd.read_csv('data/in_time.csv')
-                if in_time_df.columns[0] == '' or in_time_df.columns[0].startswith('Unnamed'):
-                    in_time_df.rename(columns={in_time_df.columns[0]: 'EmployeeID'}, inplace=True)
-                if in_time_df['EmployeeID'].dtype == 'object':
-                    in_time_df['EmployeeID'] = in_time_df['EmployeeID'].astype(str).str.strip('"').astype(int)
+                _fix_employee_id_column(in_time_df)
                 print(f"Loaded data/in_time.csv: {in_time_df.shape}")
             if os.path.exists('data/out_time.csv'):
                 out_time_df = pd.read_csv('data/out_time.csv')
-                if out_time_df.columns[0] == '' or out_time_df.columns[0].startswith('Unnamed'):
-                    out_time_df.rename(columns={out_time_df.columns[0]: 'EmployeeID'}, inplace=True)
-                if out_time_df['EmployeeID'].dtype == 'object':
-                    out_time_df['EmployeeID'] = out_time_df['EmployeeID'].astype(str).str.strip('"').astype(int)
+                _fix_employee_id_column(out_time_df)
                 print(f"Loaded data/out_time.csv: {out_time_df.shape}")
         except Exception as e:
             print(f"Could not load default CSV files: {e}")
@@ -157,7 +263,103 @@ def load_working_hours_data(zip_path='data/in_out_time.zip', in_time_path=None,
     return in_time_df, out_time_df
 
 
-def merge_all_data(general_df, manager_df, employee_df, in_time_df=None, out_time_df=None):
+def _timed_call(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def load_all(data_dir='data', use_badge_cache=True, rebuild_cache=False, max_workers=4):
+    """
+    Load all HR sources concurrently.
+    
+    The three survey/HR CSVs and the badge data are read on a thread pool
+    (the pandas CSV parser and zlib release the GIL), so the wall-clock time
+    is roughly that of the slowest source instead of the sum of all of them.
+    
+    Parameters:
+    -----------
+    data_dir : str
+        Directory holding the data files
+    use_badge_cache : bool
+        Load the badge data through load_badge_matrices (parsed, cached
+        matrices) instead of load_working_hours_data (raw frames)
+    rebuild_cache : bool
+        Force a rebuild of the badge cache
+    max_workers : int
+        Number of loader threads
+    
+    Returns:
+    --------
+    dict, dict
+        Loaded data keyed by source ('general', 'manager', 'employee' and
+        either 'badge' or 'in_time'/'out_time'), and the wall time in seconds
+        spent loading each source
+    """
+    data_dir = Path(data_dir)
+    in_time_path = data_dir / 'in_time.csv'
+    out_time_path = data_dir / 'out_time.csv'
+    has_csv_pair = in_time_path.exists() and out_time_path.exists()
+    badge_kwargs = {
+        'zip_path': str(data_dir / 'in_out_time.zip'),
+        'in_time_path': str(in_time_path) if has_csv_pair else None,
+        'out_time_path': str(out_time_path) if has_csv_pair else None
+    }
+    
+    tasks = {
+        'general': (load_general_data, str(data_dir / 'general_data.csv')),
+        'manager': (load_manager_survey, str(data_dir / 'manager_survey_data.csv')),
+        'employee': (load_employee_survey, str(data_dir / 'employee_survey_data.csv'))
+    }
+    
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {name: executor.submit(_timed_call, *task) for name, task in tasks.items()}
+        if use_badge_cache:
+            futures['badge'] = executor.submit(
+                _timed_call, load_badge_matrices, rebuild_cache=rebuild_cache, **badge_kwargs
+            )
+        else:
+            futures['working_hours'] = executor.submit(_timed_call, load_working_hours_data, **badge_kwargs)
+        
+        data = {}
+        timings = {}
+        for name, future in futures.items():
+            data[name], timings[name] = future.result()
+    
+    if 'working_hours' in data:
+        data['in_time'], data['out_time'] = data.pop('working_hours')
+    
+    timings['total'] = time.perf_counter() - start
+    print("Load timings: " + ", ".join(f"{name} {seconds:.2f}s" for name, seconds in timings.items()))
+    return data, timings
+
+
+def data_source_files(data_dir='data'):
+    """
+    List the files load_all reads from a data directory.
+    
+    Parameters:
+    -----------
+    data_dir : str
+        Directory holding the data files
+    
+    Returns:
+    --------
+    list
+        Paths of the HR CSVs and of the badge source(s) that exist
+    """
+    data_dir = Path(data_dir)
+    files = [str(data_dir / name) for name in
+             ('general_data.csv', 'manager_survey_data.csv', 'employee_survey_data.csv')]
+    files = [path for path in files if os.path.exists(path)]
+    return files + _badge_sources(str(data_dir / 'in_out_time.zip'),
+                                  str(data_dir / 'in_time.csv'), str(data_dir / 'out_time.csv'))
+
+
+@instrumented()
+def merge_all_data(general_df, manager_df, employee_df, in_time_df=None, out_time_df=None, badge=None,
+                   hours_features=None, join='index'):
     """
     Merge all data sources on EmployeeID.
     
@@ -173,32 +375,341 @@ def merge_all_data(general_df, manager_df, employee_df, in_time_df=None, out_tim
         Arrival times data
     out_time_df : pd.DataFrame, optional
         Departure times data
-        
+    badge : BadgeMatrices, optional
+        Parsed badge data (e.g. from load_badge_matrices), used instead of
+        in_time_df/out_time_df
+    hours_features : pd.DataFrame, optional
+        Precomputed working-hours features (e.g. from
+        process_working_hours_streaming), used instead of the badge inputs
+    join : str
+        'index' (default) validates one-to-one EmployeeID cardinality and
+        assembles the sources by index alignment, see join_on_employee_id;
+        'merge' chains left merges as before
+    
     Returns:
     --------
     pd.DataFrame
         Merged dataset
     """
-    # Start with general data
-    merged_df = general_df.copy()
-    
-    # Merge manager survey
-    merged_df = merged_df.merge(manager_df, on='EmployeeID', how='left')
-    
-    # Merge employee survey
-    merged_df = merged_df.merge(employee_df, on='EmployeeID', how='left')
-    
-    # If working hours data is provided, merge it
-    if in_time_df is not None and out_time_df is not None:
+    # If working hours data is provided, derive its features
+    if hours_features is None and badge is not None:
+        hours_features = badge_features(badge)
+    elif hours_features is None and in_time_df is not None and out_time_df is not None:
         # Process working hours data (calculate features)
         hours_features = process_working_hours(in_time_df, out_time_df)
-        merged_df = merged_df.merge(hours_features, on='EmployeeID', how='left')
+    
+    sources = {'manager_survey': manager_df, 'employee_survey': employee_df}
+    if hours_features is not None:
+        sources['working_hours'] = hours_features
+    
+    if join == 'index':
+        merged_df = join_on_employee_id(general_df, sources)
+    elif join == 'merge':
+        # Start with general data and left-merge each source
+        merged_df = general_df.copy()
+        for source_df in sources.values():
+            merged_df = merged_df.merge(source_df, on='EmployeeID', how='left')
+    else:
+        raise ValueError(f"Unknown join mode: {join!r} (expected 'index' or 'merge')")
     
     print(f"Merged dataset shape: {merged_df.shape}")
     return merged_df
 
 
-def process_working_hours(in_time_df, out_time_df):
+def _index_by_employee_id(df, name):
+    """
+    Return df indexed by a sorted, unique EmployeeID, failing on duplicates.
+    """
+    ids = df['EmployeeID']
+    if not ids.is_unique:
+        duplicates = ids[ids.duplicated()].unique()
+        raise ValueError(f"{name}: {len(duplicates)} duplicated EmployeeID values, e.g. {duplicates[:5].tolist()}")
+    indexed = df.set_index('EmployeeID')
+    if not indexed.index.is_monotonic_increasing:
+        indexed = indexed.sort_index()
+    return indexed
+
+
+def join_on_employee_id(general_df, sources, verbose=True):
+    """
+    Join sources onto the general data by EmployeeID index alignment.
+    
+    Every frame is indexed once by a sorted unique EmployeeID and the
+    sources are reindexed onto the general index and concatenated column-wise,
+    instead of re-hashing EmployeeID in a chain of merges. Cardinality is
+    checked up front: duplicated IDs or source rows without a matching
+    general row raise ValueError. Employees missing from a source are kept
+    (with nulls) and reported.
+    
+    Parameters:
+    -----------
+    general_df : pd.DataFrame
+        General HR data, one row per employee
+    sources : dict
+        Source name to DataFrame with an EmployeeID column
+    verbose : bool
+        Print the number of employees each source matched
+    
+    Returns:
+    --------
+    pd.DataFrame
+        Joined dataset in EmployeeID order, with the per-source matched row
+        counts in ``attrs['match_counts']``
+    """
+    general = _index_by_employee_id(general_df, 'general_data')
+    employee_position = general_df.columns.get_loc('EmployeeID')
+    
+    parts = [general]
+    columns = general.columns
+    match_counts = {}
+    for name, source_df in sources.items():
+        source = _index_by_employee_id(source_df, name)
+        
+        overlap = source.columns.intersection(columns)
+        if len(overlap):
+            raise ValueError(f"{name}: columns already present in the merged data: {overlap.tolist()}")
+        
+        orphans = source.index.difference(general.index)
+        if len(orphans):
+            raise ValueError(f"{name}: {len(orphans)} EmployeeID values not in general_data, "
+                             f"e.g. {orphans[:5].tolist()}")
+        
+        matched = len(source)
+        match_counts[name] = matched
+        if verbose:
+            print(f"  {name}: {matched}/{len(general)} employees matched")
+        if matched < len(general):
+            source = source.reindex(general.index)
+        parts.append(source)
+        columns = columns.append(source.columns)
+    
+    merged_df = pd.concat(parts, axis=1, copy=False)
+    merged_df.insert(employee_position, 'EmployeeID', merged_df.index.to_numpy())
+    merged_df.reset_index(drop=True, inplace=True)
+    merged_df.attrs['match_counts'] = match_counts
+    return merged_df
+
+
+def _rows_for(source, employee_ids):
+    """
+    Rows of an EmployeeID-indexed source for the given employees, as a frame with an EmployeeID column.
+    """
+    return source.loc[source.index.intersection(employee_ids)].reset_index()
+
+
+def iter_merged_chunks(general_path, manager_path, employee_path, zip_path=None, in_time_path=None,
+                       out_time_path=None, chunk_rows=100_000, max_memory_mb=256):
+    """
+    Stream an HR extract as merged frames of at most chunk_rows employees.
+    
+    general_data is read in chunks; the surveys and badge features, a few
+    columns per employee, are held indexed by EmployeeID and joined onto
+    each chunk, so memory is dominated by one chunk of the wide table.
+    
+    Parameters:
+    -----------
+    general_path : str
+        Path to general_data.csv
+    manager_path : str
+        Path to manager_survey_data.csv
+    employee_path : str
+        Path to employee_survey_data.csv
+    zip_path, in_time_path, out_time_path : str, optional
+        Badge sources, as for load_working_hours_data (no badge features when omitted)
+    chunk_rows : int
+        Employees per chunk
+    max_memory_mb : float
+        Memory ceiling per chunk when streaming the badge files
+    
+    Yields:
+    -------
+    pd.DataFrame
+        Merged data of one chunk of employees, as from join_on_employee_id
+    
+    Raises ValueError, like join_on_employee_id, when a survey or the badge
+    features list an EmployeeID twice.
+    """
+    # Indexed once, failing on duplicated EmployeeIDs like the in-memory join
+    manager = read_csv_with_schema(manager_path, MANAGER_SURVEY_SCHEMA)
+    manager = _index_by_employee_id(manager, 'manager_survey')
+    employee = read_csv_with_schema(employee_path, EMPLOYEE_SURVEY_SCHEMA)
+    employee = _index_by_employee_id(employee, 'employee_survey')
+    hours = None
+    if zip_path or (in_time_path and out_time_path):
+        hours = _index_by_employee_id(process_working_hours_streaming(
+            zip_path=zip_path, in_time_path=in_time_path, out_time_path=out_time_path,
+            max_memory_mb=max_memory_mb
+        ), 'working_hours')
+    
+    for chunk in read_csv_with_schema(general_path, GENERAL_DATA_SCHEMA, chunksize=chunk_rows):
+        chunk_ids = chunk['EmployeeID'].to_numpy()
+        sources = {'manager_survey': _rows_for(manager, chunk_ids),
+                   'employee_survey': _rows_for(employee, chunk_ids)}
+        if hours is not None:
+            sources['working_hours'] = _rows_for(hours, chunk_ids)
+        yield join_on_employee_id(chunk, sources, verbose=False)
+
+
+BADGE_TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+SECONDS_PER_DAY = 86400
+
+# Per-employee features derived from the badge data
+WORKING_HOURS_FEATURES = ['AvgWorkingHours', 'StdWorkingHours', 'TotalWorkingDays', 'LateArrivals',
+                          'EarlyDepartures', 'LateArrivalRate', 'EarlyDepartureRate']
+
+
+def _cutoff_minutes(cutoff):
+    """
+    Convert an 'HH:MM' cut-off (or a minute-of-day integer) to minutes after midnight.
+    """
+    if isinstance(cutoff, str):
+        hours, minutes = cutoff.split(':')
+        return int(hours) * 60 + int(minutes)
+    return int(cutoff)
+
+
+def parse_badge_matrices(in_time_df, out_time_df, time_format=BADGE_TIME_FORMAT):
+    """
+    Parse arrival and departure frames into aligned 2-D arrays of seconds.
+    
+    Both frames are parsed in a single ``pd.to_datetime`` call each and the
+    departure frame is aligned to the arrival frame on EmployeeID by index.
+    Times are expressed in seconds after midnight of the day each column
+    belongs to, so a departure after midnight yields a value above 86400.
+    
+    Parameters:
+    -----------
+    in_time_df : pd.DataFrame
+        Arrival times (EmployeeID column plus one column per day)
+    out_time_df : pd.DataFrame
+        Departure times with the same layout
+    time_format : str or None
+        strftime format of the badge timestamps (None lets pandas infer it)
+    
+    Returns:
+    --------
+    np.ndarray, np.ndarray, np.ndarray, np.ndarray
+        Employee IDs, day index (days since epoch per column), arrival
+        seconds and departure seconds (float64, NaN where missing)
+    """
+    time_cols = [col for col in in_time_df.columns if col != 'EmployeeID']
+    employee_ids = in_time_df['EmployeeID'].to_numpy()
+    
+    # Join on EmployeeID by index; duplicated IDs raise ValueError
+    out_aligned = (_index_by_employee_id(out_time_df, 'out_time')
+                   .reindex(index=employee_ids, columns=time_cols))
+    
+    shape = (len(employee_ids), len(time_cols))
+    in_ns = _parse_time_values(in_time_df[time_cols].to_numpy().ravel(), time_format).reshape(shape)
+    out_ns = _parse_time_values(out_aligned.to_numpy().ravel(), time_format).reshape(shape)
+    
+    day_index = _column_day_index(in_ns, out_ns)
+    day_base = day_index.astype(np.float64) * SECONDS_PER_DAY
+    in_seconds = in_ns / 1e9 - day_base
+    out_seconds = out_ns / 1e9 - day_base
+    
+    return employee_ids, day_index, in_seconds, out_seconds
+
+
+def _parse_time_values(values, time_format):
+    """
+    Parse a flat array of timestamp strings to float nanoseconds since epoch (NaN for missing).
+    """
+    parsed = pd.to_datetime(pd.Series(values, dtype=object), format=time_format, errors='coerce')
+    ns = parsed.to_numpy(dtype='datetime64[ns]').view(np.int64).astype(np.float64)
+    ns[parsed.isna().to_numpy()] = np.nan
+    return ns
+
+
+def _column_day_index(in_ns, out_ns):
+    """
+    Day of each column, taken as the earliest timestamp seen in it (days since epoch).
+    """
+    ns_per_day = SECONDS_PER_DAY * 1e9
+    with np.errstate(invalid='ignore'):
+        first = np.fmin(np.nanmin(np.where(np.isnan(in_ns), np.inf, in_ns), axis=0),
+                        np.nanmin(np.where(np.isnan(out_ns), np.inf, out_ns), axis=0))
+    first[~np.isfinite(first)] = 0
+    return np.floor(first / ns_per_day).astype(np.int32)
+
+
+def compute_badge_features(employee_ids, in_seconds, out_seconds,
+                           late_cutoff='09:30', early_cutoff='17:30'):
+    """
+    Compute working-hours features from parsed badge matrices.
+    
+    Parameters:
+    -----------
+    employee_ids : array-like
+        Employee IDs, one per matrix row
+    in_seconds : np.ndarray
+        Arrival seconds after midnight (employees x days, NaN where missing)
+    out_seconds : np.ndarray
+        Departure seconds after midnight (employees x days, NaN where missing)
+    late_cutoff : str or int
+        Arrivals after this minute ('HH:MM' or minutes after midnight) count as late
+    early_cutoff : str or int
+        Departures before this minute count as early
+    
+    Returns:
+    --------
+    pd.DataFrame
+        Features derived from working hours
+    """
+    total_days, avg_hours, m2_hours, late_arrivals, early_departures = _badge_statistics(
+        in_seconds, out_seconds, late_cutoff, early_cutoff
+    )
+    return _badge_feature_frame(employee_ids, total_days, avg_hours, m2_hours,
+                                late_arrivals, early_departures)
+
+
+def _badge_statistics(in_seconds, out_seconds, late_cutoff, early_cutoff):
+    """
+    Per-row day count, mean hours, sum of squared deviations (M2) and late/early counts.
+    """
+    valid = ~np.isnan(in_seconds) & ~np.isnan(out_seconds)
+    total_days = valid.sum(axis=1)
+    
+    hours = np.where(valid, (out_seconds - in_seconds) / 3600, 0.0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        avg_hours = hours.sum(axis=1) / total_days
+        deviations = np.where(valid, hours - avg_hours[:, None], 0.0)
+    m2_hours = (deviations ** 2).sum(axis=1)
+    
+    # Compare at minute resolution, as the cut-offs are given in minutes
+    with np.errstate(invalid='ignore'):
+        in_minute = np.floor(np.mod(in_seconds, SECONDS_PER_DAY) / 60)
+        out_minute = np.floor(np.mod(out_seconds, SECONDS_PER_DAY) / 60)
+    late_arrivals = (valid & (in_minute > _cutoff_minutes(late_cutoff))).sum(axis=1)
+    early_departures = (valid & (out_minute < _cutoff_minutes(early_cutoff))).sum(axis=1)
+    
+    return total_days, avg_hours, m2_hours, late_arrivals, early_departures
+
+
+def _badge_feature_frame(employee_ids, total_days, avg_hours, m2_hours, late_arrivals, early_departures):
+    """
+    Assemble the working-hours feature frame from per-employee statistics.
+    """
+    days = np.maximum(total_days, 1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        std_hours = np.sqrt(m2_hours / total_days)
+    
+    return pd.DataFrame({
+        'EmployeeID': np.asarray(employee_ids),
+        'AvgWorkingHours': np.where(total_days > 0, avg_hours, np.nan),
+        'StdWorkingHours': std_hours,
+        'TotalWorkingDays': total_days.astype(np.int64),
+        'LateArrivals': late_arrivals.astype(np.int64),
+        'EarlyDepartures': early_departures.astype(np.int64),
+        'LateArrivalRate': np.where(total_days > 0, late_arrivals / days, 0.0),
+        'EarlyDepartureRate': np.where(total_days > 0, early_departures / days, 0.0)
+    })
+
+
+@instrumented()
+def process_working_hours(in_time_df, out_time_df, late_cutoff='09:30', early_cutoff='17:30',
+                          time_format=BADGE_TIME_FORMAT):
     """
     Process working hours data to extract features.
     
@@ -208,56 +719,550 @@ def process_working_hours(in_time_df, out_time_df):
         Arrival times
     out_time_df : pd.DataFrame
         Departure times
+    late_cutoff : str or int
+        Arrivals after this time ('HH:MM') count as late arrivals
+    early_cutoff : str or int
+        Departures before this time ('HH:MM') count as early departures
+    time_format : str or None
+        strftime format of the badge timestamps (None lets pandas infer it)
+    
+    Returns:
+    --------
+    pd.DataFrame
+        Features derived from working hours
+    """
+    employee_ids, _, in_seconds, out_seconds = parse_badge_matrices(
+        in_time_df, out_time_df, time_format=time_format
+    )
+    return compute_badge_features(employee_ids, in_seconds, out_seconds,
+                                  late_cutoff=late_cutoff, early_cutoff=early_cutoff)
+
+
+BADGE_MISSING = np.iinfo(np.int32).min
+
+BADGE_CACHE_ARRAYS = ('employee_ids', 'day_index', 'in_seconds', 'out_seconds')
+
+BadgeMatrices = namedtuple('BadgeMatrices', BADGE_CACHE_ARRAYS)
+BadgeMatrices.__doc__ = """
+Parsed badge data: employee IDs, day index (days since epoch per column) and
+arrival/departure times as int32 seconds after midnight (BADGE_MISSING where absent).
+"""
+
+
+def _to_seconds(values):
+    """
+    Return badge seconds as float64 with NaN for missing entries.
+    """
+    if np.issubdtype(values.dtype, np.integer):
+        seconds = values.astype(np.float64)
+        seconds[values == BADGE_MISSING] = np.nan
+        return seconds
+    return values
+
+
+def _to_badge_int32(seconds):
+    """
+    Pack float seconds (NaN for missing) into int32 whole seconds.
+    """
+    packed = np.full(seconds.shape, BADGE_MISSING, dtype=np.int32)
+    present = ~np.isnan(seconds)
+    packed[present] = np.rint(seconds[present]).astype(np.int32)
+    return packed
+
+
+def _badge_sources(zip_path, in_time_path, out_time_path):
+    """
+    Resolve the files load_working_hours_data would read, in the same order of preference.
+    """
+    if in_time_path and out_time_path and os.path.exists(in_time_path) and os.path.exists(out_time_path):
+        return [in_time_path, out_time_path]
+    if zip_path and os.path.exists(zip_path):
+        return [zip_path]
+    if os.path.exists('data/in_time.csv') and os.path.exists('data/out_time.csv'):
+        return ['data/in_time.csv', 'data/out_time.csv']
+    return []
+
+
+def _file_digest(path, chunk_size=1 << 20):
+    """
+    SHA-256 of a file's content, read in chunks.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _source_fingerprint(path, with_digest=False):
+    stat = os.stat(path)
+    fingerprint = {'path': os.path.abspath(path), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+    if with_digest:
+        fingerprint['sha256'] = _file_digest(path)
+    return fingerprint
+
+
+def _cache_is_valid(meta, sources):
+    """
+    Check cached fingerprints against the sources.
+    
+    A source is unchanged when its size and mtime match; when only the mtime
+    differs the content hash decides, so touched-but-identical files still hit.
+    """
+    cached = meta.get('sources', [])
+    if len(cached) != len(sources):
+        return False, False
+    refreshed = False
+    for fingerprint, path in zip(cached, sources):
+        current = _source_fingerprint(path)
+        if current['path'] != fingerprint['path'] or current['size'] != fingerprint['size']:
+            return False, False
+        if current['mtime_ns'] != fingerprint['mtime_ns']:
+            if _file_digest(path) != fingerprint.get('sha256'):
+                return False, False
+            fingerprint['mtime_ns'] = current['mtime_ns']
+            refreshed = True
+    return True, refreshed
+
+
+def _write_badge_cache(cache_path, badge, meta):
+    """
+    Write the cache arrays and then its metadata, each via an atomic rename.
+    """
+    cache_path.mkdir(parents=True, exist_ok=True)
+    for name, values in zip(BADGE_CACHE_ARRAYS, badge):
+        tmp_path = cache_path / f'{name}.tmp.npy'
+        np.save(tmp_path, values)
+        os.replace(tmp_path, cache_path / f'{name}.npy')
+    _write_cache_meta(cache_path, meta)
+
+
+def _write_cache_meta(cache_path, meta):
+    tmp_path = cache_path / 'meta.json.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(meta, f, indent=2)
+    os.replace(tmp_path, cache_path / 'meta.json')
+
+
+@instrumented()
+def load_badge_matrices(zip_path='data/in_out_time.zip', in_time_path=None, out_time_path=None,
+                        cache_dir='data/.badge_cache', rebuild_cache=False,
+                        time_format=BADGE_TIME_FORMAT):
+    """
+    Load parsed badge matrices, using an on-disk cache keyed on the source files.
+    
+    On a cache miss the sources are read with load_working_hours_data, parsed
+    with parse_badge_matrices and stored as .npy arrays (int32 seconds after
+    midnight plus an int32 day index). Later calls memory-map those arrays as
+    long as the source files are unchanged.
+    
+    Parameters:
+    -----------
+    zip_path : str, optional
+        Path to the in_out_time.zip file
+    in_time_path : str, optional
+        Path to in_time.csv file (if not in ZIP)
+    out_time_path : str, optional
+        Path to out_time.csv file (if not in ZIP)
+    cache_dir : str or None
+        Directory holding the cache (None disables caching)
+    rebuild_cache : bool
+        Ignore any existing cache entry and re-parse the sources
+    time_format : str or None
+        strftime format of the badge timestamps
+    
+    Returns:
+    --------
+    BadgeMatrices or None
+        Parsed badge data, or None if no badge files were found
+    """
+    sources = _badge_sources(zip_path, in_time_path, out_time_path)
+    if not sources:
+        print("No badge data found")
+        return None
+    
+    cache_path = None
+    if cache_dir is not None:
+        key = hashlib.sha256('|'.join(os.path.abspath(s) for s in sources).encode()).hexdigest()[:16]
+        cache_path = Path(cache_dir) / key
+        meta_path = cache_path / 'meta.json'
         
+        if meta_path.exists() and not rebuild_cache:
+            with open(meta_path) as f:
+                meta = json.load(f)
+            valid, refreshed = _cache_is_valid(meta, sources)
+            if valid and meta.get('time_format') == time_format:
+                if refreshed:
+                    _write_cache_meta(cache_path, meta)
+                badge = BadgeMatrices(*(np.load(cache_path / f'{name}.npy', mmap_mode='r')
+                                        for name in BADGE_CACHE_ARRAYS))
+                print(f"Badge cache hit: {cache_path} {badge.in_seconds.shape}")
+                return badge
+        
+        reason = 'rebuild requested' if rebuild_cache else 'sources changed or not cached'
+        print(f"Badge cache miss ({reason}): {cache_path}")
+    
+    in_time_df, out_time_df = load_working_hours_data(
+        zip_path=zip_path, in_time_path=in_time_path, out_time_path=out_time_path
+    )
+    if in_time_df is None or out_time_df is None:
+        return None
+    
+    employee_ids, day_index, in_seconds, out_seconds = parse_badge_matrices(
+        in_time_df, out_time_df, time_format=time_format
+    )
+    badge = BadgeMatrices(employee_ids.astype(np.int64), day_index,
+                          _to_badge_int32(in_seconds), _to_badge_int32(out_seconds))
+    
+    if cache_path is not None:
+        meta = {
+            'time_format': time_format,
+            'sources': [_source_fingerprint(s, with_digest=True) for s in sources],
+            'shape': list(badge.in_seconds.shape)
+        }
+        _write_badge_cache(cache_path, badge, meta)
+        print(f"Badge cache written: {cache_path}")
+    
+    return badge
+
+
+@instrumented()
+def badge_features(badge, late_cutoff='09:30', early_cutoff='17:30'):
+    """
+    Compute working-hours features from BadgeMatrices.
+    
+    Parameters:
+    -----------
+    badge : BadgeMatrices
+        Parsed badge data, e.g. from load_badge_matrices
+    late_cutoff : str or int
+        Arrivals after this time ('HH:MM') count as late arrivals
+    early_cutoff : str or int
+        Departures before this time ('HH:MM') count as early departures
+    
     Returns:
     --------
     pd.DataFrame
         Features derived from working hours
     """
-    # Convert time columns to datetime
-    time_cols = [col for col in in_time_df.columns if col != 'EmployeeID']
+    return compute_badge_features(badge.employee_ids, _to_seconds(badge.in_seconds),
+                                  _to_seconds(badge.out_seconds),
+                                  late_cutoff=late_cutoff, early_cutoff=early_cutoff)
+
+
+# Rough bytes held per badge cell while a chunk is processed: the object
+# strings of both files plus the float work arrays of the feature engine
+BADGE_BYTES_PER_CELL = 256
+
+
+def _open_badge_streams(sources, stack):
+    """
+    Open the arrival and departure CSVs (plain files or ZIP members) as binary streams.
+    """
+    if len(sources) == 2:
+        return stack.enter_context(open(sources[0], 'rb')), stack.enter_context(open(sources[1], 'rb'))
+    
+    zip_ref = stack.enter_context(zipfile.ZipFile(sources[0], 'r'))
+    in_member = next((n for n in zip_ref.namelist() if 'in_time' in n.lower()), None)
+    out_member = next((n for n in zip_ref.namelist() if 'out_time' in n.lower()), None)
+    if in_member is None or out_member is None:
+        raise ValueError(f"{sources[0]} does not contain both in_time and out_time files")
+    return stack.enter_context(zip_ref.open(in_member)), stack.enter_context(zip_ref.open(out_member))
+
+
+def iter_working_hours_features(zip_path='data/in_out_time.zip', in_time_path=None, out_time_path=None,
+                                max_memory_mb=256, chunksize=None, late_cutoff='09:30',
+                                early_cutoff='17:30', time_format=BADGE_TIME_FORMAT):
+    """
+    Stream working-hours features from the badge files in aligned row chunks.
+    
+    Both files (read straight from the ZIP members when no CSV pair is given)
+    are consumed in lockstep, so only one chunk of each is held in memory.
+    The two files must list the same employees in the same row blocks, as the
+    badge export does; rows within a block may be in any order.
+    
+    Parameters:
+    -----------
+    zip_path : str, optional
+        Path to the in_out_time.zip file
+    in_time_path : str, optional
+        Path to in_time.csv file (if not in ZIP)
+    out_time_path : str, optional
+        Path to out_time.csv file (if not in ZIP)
+    max_memory_mb : float
+        Approximate memory ceiling for one chunk, used to size the chunks
+    chunksize : int, optional
+        Rows per chunk (overrides max_memory_mb)
+    late_cutoff : str or int
+        Arrivals after this time ('HH:MM') count as late arrivals
+    early_cutoff : str or int
+        Departures before this time ('HH:MM') count as early departures
+    time_format : str or None
+        strftime format of the badge timestamps
     
-    # Calculate working hours per day
-    working_hours_features = []
+    Yields:
+    -------
+    pd.DataFrame
+        Features derived from working hours for each chunk of employees
+    """
+    sources = _badge_sources(zip_path, in_time_path, out_time_path)
+    if not sources:
+        raise FileNotFoundError("No badge data found")
     
-    for emp_id in in_time_df['EmployeeID']:
-        emp_in = in_time_df[in_time_df['EmployeeID'] == emp_id].iloc[0]
-        emp_out = out_time_df[out_time_df['EmployeeID'] == emp_id].iloc[0]
+    with ExitStack() as stack:
+        in_stream, out_stream = _open_badge_streams(sources, stack)
+        
+        if chunksize is None:
+            n_days = len(pd.read_csv(in_stream, nrows=0).columns) - 1
+            in_stream.seek(0)
+            chunksize = max_memory_mb * 2**20 // (max(n_days, 1) * BADGE_BYTES_PER_CELL)
+        chunksize = max(int(chunksize), 1)
         
-        daily_hours = []
-        late_arrivals = 0
-        early_departures = 0
+        in_reader = pd.read_csv(in_stream, chunksize=chunksize)
+        out_reader = pd.read_csv(out_stream, chunksize=chunksize)
         
-        for col in time_cols:
-            in_time = pd.to_datetime(emp_in[col], errors='coerce')
-            out_time = pd.to_datetime(emp_out[col], errors='coerce')
+        for in_chunk, out_chunk in zip_longest(in_reader, out_reader):
+            if in_chunk is None or out_chunk is None:
+                raise ValueError("in_time and out_time files have different numbers of rows")
+            _fix_employee_id_column(in_chunk)
+            _fix_employee_id_column(out_chunk)
+            if set(in_chunk['EmployeeID']) != set(out_chunk['EmployeeID']):
+                raise ValueError("in_time and out_time rows are not aligned; "
+                                 "use process_working_hours on the full frames instead")
             
-            if pd.notna(in_time) and pd.notna(out_time):
-                hours = (out_time - in_time).total_seconds() / 3600
-                daily_hours.append(hours)
-                
-                # Check for late arrival (after 9:30 AM)
-                if in_time.hour > 9 or (in_time.hour == 9 and in_time.minute > 30):
-                    late_arrivals += 1
-                
-                # Check for early departure (before 5:30 PM)
-                if out_time.hour < 17 or (out_time.hour == 17 and out_time.minute < 30):
-                    early_departures += 1
+            employee_ids, _, in_seconds, out_seconds = parse_badge_matrices(
+                in_chunk, out_chunk, time_format=time_format
+            )
+            yield compute_badge_features(employee_ids, in_seconds, out_seconds,
+                                         late_cutoff=late_cutoff, early_cutoff=early_cutoff)
+
+
+def process_working_hours_streaming(zip_path='data/in_out_time.zip', in_time_path=None,
+                                    out_time_path=None, max_memory_mb=256, chunksize=None,
+                                    late_cutoff='09:30', early_cutoff='17:30',
+                                    time_format=BADGE_TIME_FORMAT):
+    """
+    Compute working-hours features from the badge files with bounded memory.
+    
+    Equivalent to load_working_hours_data followed by process_working_hours,
+    but the string frames are never held in full; see iter_working_hours_features.
+    
+    Parameters:
+    -----------
+    zip_path, in_time_path, out_time_path : str, optional
+        Badge sources, as for load_working_hours_data
+    max_memory_mb : float
+        Approximate memory ceiling for one chunk
+    chunksize : int, optional
+        Rows per chunk (overrides max_memory_mb)
+    late_cutoff, early_cutoff : str or int
+        Late arrival / early departure cut-offs ('HH:MM')
+    time_format : str or None
+        strftime format of the badge timestamps
+    
+    Returns:
+    --------
+    pd.DataFrame
+        Features derived from working hours
+    """
+    chunks = list(iter_working_hours_features(
+        zip_path=zip_path, in_time_path=in_time_path, out_time_path=out_time_path,
+        max_memory_mb=max_memory_mb, chunksize=chunksize, late_cutoff=late_cutoff,
+        early_cutoff=early_cutoff, time_format=time_format
+    ))
+    features = pd.concat(chunks, ignore_index=True)
+    print(f"Processed badge data in {len(chunks)} chunks: {features.shape}")
+    return features
+
+
+WORKING_HOURS_STATE_COLUMNS = ['TotalWorkingDays', 'MeanHours', 'M2Hours', 'LateArrivals', 'EarlyDepartures']
+
+
+def init_working_hours_state(in_time_df, out_time_df, late_cutoff='09:30', early_cutoff='17:30',
+                             time_format=BADGE_TIME_FORMAT):
+    """
+    Build the running working-hours state from the full badge history.
+    
+    The state holds, per employee, the number of worked days, the running
+    mean of daily hours, M2 (sum of squared deviations from the mean) and the
+    late/early counters, so that new days can be folded in with
+    update_working_hours_state instead of recomputing everything.
+    
+    Parameters:
+    -----------
+    in_time_df : pd.DataFrame
+        Arrival times (EmployeeID column plus one column per day)
+    out_time_df : pd.DataFrame
+        Departure times with the same layout
+    late_cutoff : str or int
+        Arrivals after this time ('HH:MM') count as late arrivals
+    early_cutoff : str or int
+        Departures before this time ('HH:MM') count as early departures
+    time_format : str or None
+        strftime format of the badge timestamps
+    
+    Returns:
+    --------
+    pd.DataFrame
+        State indexed by EmployeeID; the cut-offs and the day columns
+        already included are kept in ``state.attrs``
+    """
+    employee_ids, _, in_seconds, out_seconds = parse_badge_matrices(
+        in_time_df, out_time_df, time_format=time_format
+    )
+    total_days, avg_hours, m2_hours, late_arrivals, early_departures = _badge_statistics(
+        in_seconds, out_seconds, late_cutoff, early_cutoff
+    )
+    
+    state = pd.DataFrame({
+        'TotalWorkingDays': total_days.astype(np.int64),
+        'MeanHours': np.where(total_days > 0, avg_hours, 0.0),
+        'M2Hours': m2_hours,
+        'LateArrivals': late_arrivals.astype(np.int64),
+        'EarlyDepartures': early_departures.astype(np.int64)
+    }, index=pd.Index(employee_ids, name='EmployeeID'))
+    state.attrs = {
+        'late_cutoff': late_cutoff,
+        'early_cutoff': early_cutoff,
+        'days': [str(col) for col in in_time_df.columns if col != 'EmployeeID']
+    }
+    return state
+
+
+def update_working_hours_state(state, in_day_df, out_day_df, time_format=BADGE_TIME_FORMAT):
+    """
+    Fold one or more new badge days into the running state, in place.
+    
+    Each day is applied with Welford's update, which is O(employees) and
+    needs none of the earlier days. Employees seen for the first time are
+    added to the state.
+    
+    Parameters:
+    -----------
+    state : pd.DataFrame
+        State from init_working_hours_state or load_working_hours_state
+    in_day_df : pd.DataFrame
+        Arrival times for the new day(s): EmployeeID plus one column per day
+    out_day_df : pd.DataFrame
+        Departure times with the same layout
+    time_format : str or None
+        strftime format of the badge timestamps
+    
+    Returns:
+    --------
+    pd.DataFrame
+        The updated state
+    """
+    new_days = [str(col) for col in in_day_df.columns if col != 'EmployeeID']
+    already_applied = sorted(set(new_days) & set(state.attrs['days']))
+    if already_applied:
+        raise ValueError(f"Days already included in the working hours state: {already_applied}")
+    
+    employee_ids, _, in_seconds, out_seconds = parse_badge_matrices(
+        in_day_df, out_day_df, time_format=time_format
+    )
+    
+    new_ids = pd.Index(employee_ids).difference(state.index)
+    if len(new_ids):
+        attrs = state.attrs
+        additions = pd.DataFrame(0, index=new_ids, columns=WORKING_HOURS_STATE_COLUMNS)
+        additions[['MeanHours', 'M2Hours']] = 0.0
+        state = pd.concat([state, additions])
+        state.index.name = 'EmployeeID'
+        state.attrs = attrs
+    
+    rows = state.index.get_indexer(employee_ids)
+    count = state['TotalWorkingDays'].to_numpy()[rows]
+    mean = state['MeanHours'].to_numpy()[rows]
+    m2 = state['M2Hours'].to_numpy()[rows]
+    late = state['LateArrivals'].to_numpy()[rows]
+    early = state['EarlyDepartures'].to_numpy()[rows]
+    
+    late_minute = _cutoff_minutes(state.attrs['late_cutoff'])
+    early_minute = _cutoff_minutes(state.attrs['early_cutoff'])
+    
+    for day in range(in_seconds.shape[1]):
+        day_in = in_seconds[:, day]
+        day_out = out_seconds[:, day]
+        valid = ~np.isnan(day_in) & ~np.isnan(day_out)
         
-        avg_hours = np.mean(daily_hours) if daily_hours else np.nan
-        std_hours = np.std(daily_hours) if daily_hours else np.nan
-        total_days = len(daily_hours)
+        hours = np.where(valid, (day_out - day_in) / 3600, 0.0)
+        count = count + valid
+        delta = np.where(valid, hours - mean, 0.0)
+        mean = mean + delta / np.maximum(count, 1)
+        m2 = m2 + delta * np.where(valid, hours - mean, 0.0)
         
-        working_hours_features.append({
-            'EmployeeID': emp_id,
-            'AvgWorkingHours': avg_hours,
-            'StdWorkingHours': std_hours,
-            'TotalWorkingDays': total_days,
-            'LateArrivals': late_arrivals,
-            'EarlyDepartures': early_departures,
-            'LateArrivalRate': late_arrivals / total_days if total_days > 0 else 0,
-            'EarlyDepartureRate': early_departures / total_days if total_days > 0 else 0
-        })
-    
-    return pd.DataFrame(working_hours_features)
+        with np.errstate(invalid='ignore'):
+            late = late + (valid & (np.floor(np.mod(day_in, SECONDS_PER_DAY) / 60) > late_minute))
+            early = early + (valid & (np.floor(np.mod(day_out, SECONDS_PER_DAY) / 60) < early_minute))
+    
+    state.iloc[rows, state.columns.get_loc('TotalWorkingDays')] = count
+    state.iloc[rows, state.columns.get_loc('MeanHours')] = mean
+    state.iloc[rows, state.columns.get_loc('M2Hours')] = m2
+    state.iloc[rows, state.columns.get_loc('LateArrivals')] = late
+    state.iloc[rows, state.columns.get_loc('EarlyDepartures')] = early
+    state.attrs['days'] = state.attrs['days'] + new_days
+    
+    return state
 
+
+def working_hours_state_features(state):
+    """
+    Working-hours features (as returned by process_working_hours) from a running state.
+    
+    Parameters:
+    -----------
+    state : pd.DataFrame
+        State from init_working_hours_state or update_working_hours_state
+    
+    Returns:
+    --------
+    pd.DataFrame
+        Features derived from working hours
+    """
+    return _badge_feature_frame(
+        state.index.to_numpy(), state['TotalWorkingDays'].to_numpy(), state['MeanHours'].to_numpy(),
+        state['M2Hours'].to_numpy(), state['LateArrivals'].to_numpy(), state['EarlyDepartures'].to_numpy()
+    )
+
+
+def save_working_hours_state(state, path='data/working_hours_state.npz'):
+    """
+    Persist a running working-hours state.
+    
+    Parameters:
+    -----------
+    state : pd.DataFrame
+        State to save
+    path : str
+        Destination .npz file
+    """
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = f'{path}.tmp.npz'
+    np.savez(tmp_path, EmployeeID=state.index.to_numpy(),
+             attrs=np.array(json.dumps(state.attrs)),
+             **{col: state[col].to_numpy() for col in WORKING_HOURS_STATE_COLUMNS})
+    os.replace(tmp_path, path)
+    print(f"Saved working hours state: {path} ({len(state)} employees, {len(state.attrs['days'])} days)")
+
+
+def load_working_hours_state(path='data/working_hours_state.npz'):
+    """
+    Load a running working-hours state saved by save_working_hours_state.
+    
+    Parameters:
+    -----------
+    path : str
+        Path to the .npz file
+    
+    Returns:
+    --------
+    pd.DataFrame
+        State indexed by EmployeeID
+    """
+    with np.load(path) as saved:
+        state = pd.DataFrame({col: saved[col] for col in WORKING_HOURS_STATE_COLUMNS},
+                             index=pd.Index(saved['EmployeeID'], name='EmployeeID'))
+        state.attrs = json.loads(str(saved['attrs']))
+    print(f"Loaded working hours state: {path} ({len(state)} employees, {len(state.attrs['days'])} days)")
+    return state
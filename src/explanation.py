@@ -0,0 +1,264 @@
+"""
+Per-employee SHAP explanations for tree models, cached by model and feature row.
+
+TreeSHAP values are computed against a sampled background set, in chunks
+of rows on a forked process pool, so memory stays bounded by the chunk
+size. Results are cached on disk under a hash of the model and background
+and looked up by a hash of each feature row, so a nightly run only
+explains the employees whose features changed.
+"""
+
+import os
+import time
+import pickle
+import hashlib
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from training import SharedArrays, attach_shared_arrays, thread_budget, THREAD_ENV_VARS
+
+
+# Model classes shap.TreeExplainer supports natively
+TREE_MODELS = ['RandomForestClassifier', 'ExtraTreesClassifier', 'GradientBoostingClassifier',
+               'XGBClassifier', 'LGBMClassifier']
+
+
+def is_tree_model(model):
+    return type(model).__name__ in TREE_MODELS
+
+
+def sample_background(X, n_samples=100, random_state=42):
+    """
+    Rows of X used as the background (reference) distribution of the explanations.
+    """
+    if len(X) <= n_samples:
+        return X.copy()
+    return X.sample(n=n_samples, random_state=random_state)
+
+
+def row_hashes(X):
+    """
+    One 64-bit hash per row of feature values (the index is ignored).
+    """
+    return pd.util.hash_pandas_object(X, index=False).to_numpy(dtype=np.uint64)
+
+
+def explanation_key(model, background):
+    """
+    Hash of everything an explanation depends on besides the row itself.
+    """
+    import shap
+    
+    digest = hashlib.sha256()
+    digest.update(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL))
+    digest.update(np.ascontiguousarray(background.to_numpy(dtype=np.float64)).tobytes())
+    digest.update(repr((list(background.columns), shap.__version__)).encode())
+    return digest.hexdigest()[:32]
+
+
+class ExplanationCache:
+    """
+    SHAP values of one model and background, stored by feature-row hash.
+    
+    Parameters:
+    -----------
+    cache_dir : str
+        Directory holding one <key>.npz file per model and background
+    key : str
+        explanation_key of the model and background
+    enabled : bool
+        When False nothing is read or written
+    """
+    
+    def __init__(self, cache_dir, key, enabled=True):
+        self.path = Path(cache_dir) / f'{key}.npz'
+        self.enabled = enabled
+        self.hashes = np.empty(0, dtype=np.uint64)
+        self.values = None
+        self.expected_value = None
+        if enabled and self.path.exists():
+            with np.load(self.path) as stored:
+                self.hashes = stored['hashes']
+                self.values = stored['values']
+                self.expected_value = float(stored['expected_value'])
+    
+    def lookup(self, hashes):
+        """
+        Positions of the cached rows.
+        
+        Returns:
+        --------
+        np.ndarray, np.ndarray
+            Boolean mask of the hashes found and, for those, their row in self.values
+        """
+        if len(self.hashes) == 0:
+            return np.zeros(len(hashes), dtype=bool), np.empty(0, dtype=np.int64)
+        # hashes are kept sorted, so a lookup is a binary search
+        positions = np.minimum(np.searchsorted(self.hashes, hashes), len(self.hashes) - 1)
+        found = self.hashes[positions] == hashes
+        return found, positions[found]
+    
+    def update(self, hashes, values, expected_value):
+        """
+        Add newly explained rows and write the cache.
+        """
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        if self.values is not None:
+            hashes = np.concatenate([self.hashes, hashes])
+            values = np.concatenate([self.values, values])
+        hashes, first = np.unique(hashes, return_index=True)
+        self.hashes, self.values = hashes, np.asarray(values, dtype=np.float32)[first]
+        self.expected_value = float(expected_value)
+        if not self.enabled:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.stem + '.tmp.npz')
+        np.savez(tmp_path, hashes=self.hashes, values=self.values, expected_value=self.expected_value)
+        os.replace(tmp_path, self.path)
+
+
+def _positive_class(values):
+    # Classifiers may explain both classes: keep the attrition class
+    if isinstance(values, list):
+        return values[-1]
+    values = np.asarray(values)
+    return values[..., -1] if values.ndim == 3 else values
+
+
+_EXPLAINER = {}
+
+
+def _init_explainer(model, background, threads):
+    import shap
+    
+    for var in THREAD_ENV_VARS:
+        os.environ[var] = str(threads)
+    _EXPLAINER['explainer'] = shap.TreeExplainer(model, data=background,
+                                                 feature_perturbation='interventional')
+    _EXPLAINER['blocks'] = {}
+
+
+def _explain_rows(X_rows):
+    explainer = _EXPLAINER['explainer']
+    values = _positive_class(explainer.shap_values(X_rows, check_additivity=False))
+    expected_value = float(np.ravel(explainer.expected_value)[-1])
+    return np.asarray(values, dtype=np.float32), expected_value
+
+
+def _explain_worker(spec, start, stop):
+    key = tuple(block_name for block_name, _, _ in spec.values())
+    if key not in _EXPLAINER['blocks']:
+        _EXPLAINER['blocks'] = {key: attach_shared_arrays(spec)}
+    arrays, _ = _EXPLAINER['blocks'][key]
+    return _explain_rows(arrays['X'][start:stop])
+
+
+def explain_model(model, X, background=None, n_background=50, chunk_size=200, n_workers=None,
+                  cache_dir='data/.stage_cache/shap', use_cache=True, random_state=42):
+    """
+    SHAP values of a tree model for every row of X, reusing cached rows.
+    
+    Parameters:
+    -----------
+    model : estimator
+        Fitted tree model (see TREE_MODELS)
+    X : pd.DataFrame
+        Feature rows to explain, with the columns the model was trained on
+    background : pd.DataFrame, optional
+        Reference rows, e.g. sampled from the training data (default:
+        n_background rows sampled from X). Cached values are only reused
+        with the same model and background, so pass a fixed one when X
+        changes between runs
+    n_background : int
+        Size of the sampled background set
+    chunk_size : int
+        Rows explained per task; bounds the memory of each worker (the
+        cost per row grows with the background size)
+    n_workers : int, optional
+        Worker processes (default: one per core)
+    cache_dir : str
+        Directory of the explanation cache
+    use_cache : bool
+        Read and write the cache
+    random_state : int
+        Seed of the background sample
+    
+    Returns:
+    --------
+    pd.DataFrame, float, dict
+        SHAP values (same index and columns as X, in the model's raw output
+        units: probability for forests, log-odds for boosted trees), the
+        expected value they add up from, and the number of rows read from
+        the cache and of distinct rows computed
+    """
+    if not is_tree_model(model):
+        raise ValueError(f'{type(model).__name__} is not a supported tree model ({", ".join(TREE_MODELS)})')
+    if background is None:
+        background = sample_background(X, n_background, random_state)
+    
+    cache = ExplanationCache(cache_dir, explanation_key(model, background), enabled=use_cache)
+    hashes = row_hashes(X)
+    found, positions = cache.lookup(hashes)
+    values = np.empty(X.shape, dtype=np.float32)
+    if found.any():
+        values[found] = cache.values[positions]
+    
+    start_time = time.perf_counter()
+    missing = np.flatnonzero(~found)
+    # Employees with identical feature rows are explained once
+    new_hashes, first, inverse = np.unique(hashes[missing], return_index=True, return_inverse=True)
+    expected_value = cache.expected_value
+    if len(missing):
+        X_new = np.ascontiguousarray(X.to_numpy(dtype=np.float64)[missing[first]])
+        chunks = [(start, min(start + chunk_size, len(X_new))) for start in range(0, len(X_new), chunk_size)]
+        n_workers, threads = thread_budget(len(chunks), n_workers)
+        if n_workers == 1 or 'fork' not in mp.get_all_start_methods():
+            _init_explainer(model, background, threads)
+            results = [_explain_rows(X_new[start:stop]) for start, stop in chunks]
+        else:
+            # Forked workers inherit the model and background instead of unpickling them per chunk
+            with SharedArrays({'X': X_new}) as shared:
+                with ProcessPoolExecutor(max_workers=n_workers, mp_context=mp.get_context('fork'),
+                                         initializer=_init_explainer,
+                                         initargs=(model, background, threads)) as executor:
+                    results = list(executor.map(_explain_worker, [shared.spec] * len(chunks),
+                                                *zip(*chunks)))
+        new_values = np.concatenate([chunk_values for chunk_values, _ in results])
+        expected_value = results[-1][1]
+        values[missing] = new_values[inverse]
+        cache.update(new_hashes, new_values, expected_value)
+    
+    stats = {'cached': int(found.sum()), 'computed': len(new_hashes), 'seconds': time.perf_counter() - start_time}
+    return pd.DataFrame(values, index=X.index, columns=X.columns), expected_value, stats
+
+
+def top_reasons(shap_values, n_reasons=3):
+    """
+    The features pushing each employee's attrition risk up the most.
+    
+    Parameters:
+    -----------
+    shap_values : pd.DataFrame
+        Output of explain_model
+    n_reasons : int
+        Reasons per employee
+    
+    Returns:
+    --------
+    pd.DataFrame
+        'Reason i' (feature name) and 'Impact i' (SHAP value) columns, same index
+    """
+    values = shap_values.to_numpy()
+    n_reasons = min(n_reasons, values.shape[1])
+    top = np.argsort(-values, axis=1)[:, :n_reasons]
+    impacts = np.take_along_axis(values, top, axis=1)
+    features = np.asarray(shap_values.columns)[top]
+    reasons = {}
+    for i in range(n_reasons):
+        reasons[f'Reason {i + 1}'] = features[:, i]
+        reasons[f'Impact {i + 1}'] = impacts[:, i]
+    return pd.DataFrame(reasons, index=shap_values.index)
@@ -0,0 +1,356 @@
+"""
+Class-imbalance strategies for the training split, and a benchmark comparing them.
+
+A strategy either resamples the training rows (SMOTE, SMOTE with
+approximate neighbours, random undersampling) or leaves them as they are
+and weights the classes inside the models instead (class_weight /
+scale_pos_weight), which costs nothing before training and keeps the
+training matrix at its original size.
+"""
+
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+
+IMBALANCE_STRATEGIES = {
+    'smote': 'SMOTE oversampling of the minority class (exact k-NN)',
+    'smote_approx': 'SMOTE with neighbours from an approximate (IVF) index, see ClusteredNeighbors',
+    'undersample': 'random undersampling of the majority class',
+    'class_weight': 'no resampling; balanced class weights or scale_pos_weight in the models',
+    'none': 'no resampling and no weights'
+}
+
+
+class ClusteredNeighbors:
+    """
+    Approximate k-nearest neighbours from an inverted-file (IVF) index.
+    
+    The fitted rows are grouped into n_cells clusters by a few k-means
+    iterations. A query is compared with the rows of its n_probe nearest
+    clusters only, instead of every row, so the cost per query is about
+    n_probe * n / n_cells distances. Implements the interface SMOTE accepts
+    as ``k_neighbors``.
+    
+    Parameters:
+    -----------
+    n_neighbors : int
+        Neighbours returned per query (SMOTE asks for k + 1, the row itself included)
+    n_cells : int, optional
+        Clusters of the index (default: about the square root of the rows)
+    n_probe : int
+        Clusters searched per query; more raise recall and cost
+    n_iter : int
+        k-means iterations
+    random_state : int, optional
+        Seed of the k-means initialization
+    """
+    
+    def __init__(self, n_neighbors=6, n_cells=None, n_probe=4, n_iter=10, random_state=None):
+        self.n_neighbors = n_neighbors
+        self.n_cells = n_cells
+        self.n_probe = n_probe
+        self.n_iter = n_iter
+        self.random_state = random_state
+    
+    def get_params(self, deep=True):
+        return {'n_neighbors': self.n_neighbors, 'n_cells': self.n_cells, 'n_probe': self.n_probe,
+                'n_iter': self.n_iter, 'random_state': self.random_state}
+    
+    def set_params(self, **params):
+        for name, value in params.items():
+            if name not in self.get_params():
+                raise ValueError(f"Invalid parameter {name} for ClusteredNeighbors")
+            setattr(self, name, value)
+        return self
+    
+    def fit(self, X, y=None):
+        X = np.asarray(X, dtype=np.float64)
+        rng = np.random.default_rng(self.random_state)
+        n_cells = min(len(X), self.n_cells or max(1, int(np.sqrt(len(X)))))
+        # k-means on a sample of at most 256 rows per cell bounds the fitting cost
+        sample = X[rng.choice(len(X), min(len(X), 256 * n_cells), replace=False)]
+        centroids = sample[rng.choice(len(sample), n_cells, replace=False)]
+        for _ in range(self.n_iter):
+            cells = _nearest_centroids(sample, centroids, 1)[:, 0]
+            counts = np.bincount(cells, minlength=n_cells)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, cells, sample)
+            filled = counts > 0
+            centroids[filled] = sums[filled] / counts[filled, None]
+        
+        cells = _nearest_centroids(X, centroids, 1)[:, 0]
+        order = np.argsort(cells, kind='stable')
+        self.cell_members_ = np.split(order, np.cumsum(np.bincount(cells, minlength=n_cells))[:-1])
+        self.centroids_ = centroids
+        self.fit_X_ = X
+        self.fit_norms_ = np.einsum('ij,ij->i', X, X)
+        return self
+    
+    def kneighbors(self, X=None, n_neighbors=None, return_distance=True):
+        """
+        Approximate nearest fitted rows of each query row, closest first.
+        
+        Parameters:
+        -----------
+        X : array-like, optional
+            Query rows; without X the fitted rows are queried and each row
+            is excluded from its own neighbours, as in scikit-learn
+        n_neighbors : int, optional
+            Defaults to the n_neighbors parameter
+        return_distance : bool
+            Also return the distances
+        
+        Returns:
+        --------
+        np.ndarray, np.ndarray
+            Distances (with return_distance) and indices, shape (n_queries, n_neighbors)
+        """
+        exclude_self = X is None
+        X = self.fit_X_ if exclude_self else np.asarray(X, dtype=np.float64)
+        k = (n_neighbors or self.n_neighbors) + exclude_self
+        if k > len(self.fit_X_):
+            raise ValueError(f"Expected n_neighbors <= {len(self.fit_X_) - exclude_self}, got {k - exclude_self}")
+        
+        n_probe = min(self.n_probe, len(self.centroids_))
+        probes = _nearest_centroids(X, self.centroids_, n_probe)
+        query_norms = np.einsum('ij,ij->i', X, X)
+        best_squared = np.full((len(X), k), np.inf)
+        best_indices = np.full((len(X), k), -1, dtype=np.int64)
+        
+        # Queries grouped by probed cell: each cell is compared with the queries that probe it
+        flat_order = np.argsort(probes.ravel(), kind='stable')
+        bounds = np.searchsorted(probes.ravel()[flat_order], np.arange(len(self.centroids_) + 1))
+        for cell, members in enumerate(self.cell_members_):
+            queries = flat_order[bounds[cell]:bounds[cell + 1]] // n_probe
+            if not len(queries) or not len(members):
+                continue
+            squared = (query_norms[queries, None] - 2 * X[queries] @ self.fit_X_[members].T
+                       + self.fit_norms_[members])
+            squared = np.concatenate([best_squared[queries], np.maximum(squared, 0)], axis=1)
+            indices = np.concatenate([best_indices[queries], np.broadcast_to(members, (len(queries), len(members)))],
+                                     axis=1)
+            nearest = np.argpartition(squared, k - 1, axis=1)[:, :k] if squared.shape[1] > k else \
+                np.broadcast_to(np.arange(k), (len(queries), k))
+            best_squared[queries] = np.take_along_axis(squared, nearest, axis=1)
+            best_indices[queries] = np.take_along_axis(indices, nearest, axis=1)
+        
+        if (best_indices < 0).any():
+            raise ValueError(f"Fewer than {k} rows in the probed cells; raise n_probe or lower n_cells")
+        ranked = np.argsort(best_squared, axis=1, kind='stable')
+        indices = np.take_along_axis(best_indices, ranked, axis=1)
+        distances = np.sqrt(np.take_along_axis(best_squared, ranked, axis=1))
+        
+        if exclude_self:
+            # Drop each row itself (or the farthest neighbour if a duplicate row displaced it)
+            is_self = indices == np.arange(len(X))[:, None]
+            is_self[~is_self.any(axis=1), -1] = True
+            keep = ~is_self
+            indices = indices[keep].reshape(len(X), k - 1)
+            distances = distances[keep].reshape(len(X), k - 1)
+        return (distances, indices) if return_distance else indices
+    
+    def kneighbors_graph(self, X=None, n_neighbors=None, mode='connectivity'):
+        """
+        Sparse (n_queries, n_fitted) matrix of the neighbours, as in scikit-learn.
+        """
+        from scipy.sparse import csr_matrix
+        
+        distances, indices = self.kneighbors(X, n_neighbors)
+        values = np.ones(indices.size) if mode == 'connectivity' else distances.ravel()
+        indptr = np.arange(0, indices.size + 1, indices.shape[1])
+        return csr_matrix((values, indices.ravel(), indptr), shape=(len(indices), len(self.fit_X_)))
+
+
+def _nearest_centroids(X, centroids, n_nearest, block_rows=65536):
+    """
+    Indices of the n_nearest centroids of each row, closest first.
+    """
+    centroid_norms = np.einsum('ij,ij->i', centroids, centroids)
+    nearest = np.empty((len(X), n_nearest), dtype=np.int64)
+    for start in range(0, len(X), block_rows):
+        rows = X[start:start + block_rows]
+        # ||x||^2 is the same for every centroid, so it does not change the ranking
+        squared = centroid_norms - 2 * rows @ centroids.T
+        if n_nearest < len(centroids):
+            candidates = np.argpartition(squared, n_nearest - 1, axis=1)[:, :n_nearest]
+        else:
+            candidates = np.broadcast_to(np.arange(len(centroids)), squared.shape)
+        ranked = np.argsort(np.take_along_axis(squared, candidates, axis=1), axis=1, kind='stable')
+        nearest[start:start + block_rows] = np.take_along_axis(candidates, ranked, axis=1)
+    return nearest
+
+
+def resample(X, y, strategy='smote', random_state=42):
+    """
+    Apply an imbalance strategy to the training rows.
+    
+    Parameters:
+    -----------
+    X : pd.DataFrame or np.ndarray
+        Training features
+    y : pd.Series or np.ndarray
+        Training labels
+    strategy : str
+        One of IMBALANCE_STRATEGIES; 'class_weight' and 'none' return the
+        rows unchanged (see apply_class_weights)
+    random_state : int
+        Seed of the sampler
+    
+    Returns:
+    --------
+    X, y
+        Resampled features and labels
+    """
+    if strategy not in IMBALANCE_STRATEGIES:
+        raise ValueError(f"Unknown imbalance strategy {strategy!r}; choose from {', '.join(IMBALANCE_STRATEGIES)}")
+    if strategy in ('class_weight', 'none'):
+        return X, y
+    if strategy == 'undersample':
+        from imblearn.under_sampling import RandomUnderSampler
+        sampler = RandomUnderSampler(random_state=random_state)
+    else:
+        from imblearn.over_sampling import SMOTE
+        k_neighbors = 5
+        if strategy == 'smote_approx':
+            k_neighbors = ClusteredNeighbors(n_neighbors=k_neighbors + 1, random_state=random_state)
+        sampler = SMOTE(k_neighbors=k_neighbors, random_state=random_state)
+    return sampler.fit_resample(X, y)
+
+
+def apply_class_weights(models, y):
+    """
+    Weight the classes inside every model that supports it (in place).
+    
+    Models with a class_weight parameter get 'balanced'; boosters with
+    only scale_pos_weight get the negative to positive ratio of y. Other
+    models (Gradient Boosting, KNN) are left unweighted.
+    
+    Parameters:
+    -----------
+    models : dict
+        Model name to (estimator, use_scaled), see build_model_zoo
+    y : array-like
+        Training labels
+    
+    Returns:
+    --------
+    list
+        Names of the weighted models
+    """
+    y = np.asarray(y)
+    positives = int((y == 1).sum())
+    ratio = (len(y) - positives) / max(positives, 1)
+    weighted = []
+    for name, (estimator, _) in models.items():
+        params = estimator.get_params()
+        if 'class_weight' in params:
+            estimator.set_params(class_weight='balanced')
+        elif 'scale_pos_weight' in params:
+            estimator.set_params(scale_pos_weight=ratio)
+        else:
+            continue
+        weighted.append(name)
+    return weighted
+
+
+def _measure_resample(X, y, strategy, random_state):
+    start = time.perf_counter()
+    X_res, y_res = resample(X, y, strategy, random_state)
+    seconds = time.perf_counter() - start
+    
+    # A second run under tracemalloc, so its overhead does not inflate the timing
+    tracing = not tracemalloc.is_tracing()
+    if tracing:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    baseline = tracemalloc.get_traced_memory()[0]
+    resample(X, y, strategy, random_state)
+    peak_mb = (tracemalloc.get_traced_memory()[1] - baseline) / 2**20
+    if tracing:
+        tracemalloc.stop()
+    return X_res, y_res, seconds, peak_mb
+
+
+def compare_strategies(build_models, X_train, y_train, X_test, y_test, strategies=None, n_workers=None,
+                       random_state=42):
+    """
+    Train the model zoo under each imbalance strategy and measure cost and accuracy.
+    
+    Parameters:
+    -----------
+    build_models : callable
+        Returns a fresh dict of name to (estimator, use_scaled), e.g. build_model_zoo
+    X_train, y_train :
+        Training split (before any resampling)
+    X_test, y_test :
+        Test split
+    strategies : list, optional
+        Strategies to compare (default: all of IMBALANCE_STRATEGIES)
+    n_workers : int, optional
+        Models trained concurrently, see train_models
+    random_state : int
+        Seed of the samplers
+    
+    Returns:
+    --------
+    pd.DataFrame
+        One row per strategy and model: Strategy, Model, Weighted, Train Rows,
+        Resample s, Resample MB (allocation peak of the resampling), Train MB
+        (raw and scaled training matrices), Fit s and ROC-AUC
+    """
+    from preprocessing import scale_features
+    from training import train_models
+    from metrics import roc_auc
+    
+    rows = []
+    for strategy in strategies or list(IMBALANCE_STRATEGIES):
+        X_res, y_res, resample_seconds, resample_mb = _measure_resample(X_train, y_train, strategy, random_state)
+        X_res = np.asarray(X_res, dtype=np.float64)
+        X_train_scaled, X_test_scaled, _ = scale_features(X_res, np.asarray(X_test, dtype=np.float64))
+        
+        models = build_models()
+        weighted = apply_class_weights(models, y_res) if strategy == 'class_weight' else []
+        trained = train_models(models, X_train_scaled, X_res, y_res, X_test_scaled, np.asarray(X_test),
+                               n_workers=n_workers)
+        for name, result in trained.items():
+            rows.append({
+                'Strategy': strategy,
+                'Model': name,
+                'Weighted': name in weighted,
+                'Train Rows': len(y_res),
+                'Resample s': resample_seconds,
+                'Resample MB': resample_mb,
+                'Train MB': (X_res.nbytes + X_train_scaled.nbytes) / 2**20,
+                'Fit s': result.get('fit_seconds', np.nan),
+                'ROC-AUC': roc_auc(y_test, result['y_pred_proba']) if 'error' not in result else np.nan
+            })
+    return pd.DataFrame(rows)
+
+
+def summarize_strategies(comparison):
+    """
+    One row per strategy: training size, resampling cost, total fit time and ROC-AUC.
+    
+    Parameters:
+    -----------
+    comparison : pd.DataFrame
+        Output of compare_strategies
+    
+    Returns:
+    --------
+    pd.DataFrame
+        Sorted by total fit time
+    """
+    summary = comparison.groupby('Strategy', sort=False).agg(**{
+        'Train Rows': ('Train Rows', 'first'),
+        'Resample s': ('Resample s', 'first'),
+        'Resample MB': ('Resample MB', 'first'),
+        'Train MB': ('Train MB', 'first'),
+        'Total Fit s': ('Fit s', 'sum'),
+        'Best ROC-AUC': ('ROC-AUC', 'max'),
+        'Mean ROC-AUC': ('ROC-AUC', 'mean')
+    })
+    return summary.sort_values('Total Fit s').reset_index()
@@ -0,0 +1,295 @@
+"""
+Per-stage timing and memory instrumentation with a JSONL run log.
+
+Stages are wrapped in ``with stage('merge') as record:`` blocks or decorated
+with ``@instrumented('load_general_data')``. While a run log is active each
+stage appends one JSON line with its wall time, CPU time, peak RSS and any
+fields the caller sets on ``record`` (such as row counts). Without an active
+run log a stage costs one attribute check.
+
+One stage can additionally be run under cProfile and/or tracemalloc.
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import threading
+from functools import wraps
+from contextlib import contextmanager
+
+
+def _read_status_kb(field):
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith(field + ':'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def _peak_rss_mb():
+    peak_kb = _read_status_kb('VmHWM')
+    if peak_kb is not None:
+        return peak_kb / 1024
+    try:
+        import resource
+    except ImportError:
+        # No resource module on Windows: psutil reports the peak working set there
+        try:
+            import psutil
+        except ImportError:
+            return float('nan')
+        memory = psutil.Process().memory_info()
+        return getattr(memory, 'peak_wset', memory.rss) / (1024 * 1024)
+    # ru_maxrss is in KB on Linux and in bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def _reset_peak_rss():
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+class RunLog:
+    """
+    Writes one JSON line per instrumented stage.
+    
+    Parameters:
+    -----------
+    path : str, optional
+        JSONL file the records are appended to (None keeps them in memory only)
+    enabled : bool
+        When False stages are not measured at all
+    profile_stage : str, optional
+        Stage run under cProfile; the stats are written next to the log
+    trace_memory_stage : str, optional
+        Stage run under tracemalloc; its allocation peak, block count and
+        top allocation sites are added to the record
+    run_id : str, optional
+        Identifier shared by the records of one run (random by default)
+    """
+    
+    def __init__(self, path=None, enabled=True, profile_stage=None, trace_memory_stage=None, run_id=None):
+        self.path = path
+        self.enabled = enabled
+        self.profile_stage = profile_stage
+        self.trace_memory_stage = trace_memory_stage
+        self.run_id = run_id or uuid.uuid4().hex[:12]
+        self.records = []
+        self._open = []
+        self._stacks = {}
+        self._lock = threading.Lock()
+        self._can_reset_peak = None
+        if path and enabled:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    
+    def _stack(self, thread=None):
+        return self._stacks.setdefault((thread or threading.current_thread()).ident, [])
+    
+    def _fold_peak(self):
+        """
+        Credit the current peak RSS to every open stage.
+        """
+        peak = _peak_rss_mb()
+        for record in self._open:
+            record['peak_rss_mb'] = max(record['peak_rss_mb'], peak)
+        return peak
+    
+    def write(self, record):
+        """
+        Append a finished record to the log.
+        """
+        record.setdefault('run_id', self.run_id)
+        with self._lock:
+            self.records.append(record)
+            if self.path:
+                with open(self.path, 'a') as f:
+                    f.write(json.dumps(record, default=str) + '\n')
+    
+    def log(self, name, **fields):
+        """
+        Log a stage measured elsewhere (e.g. a model fitted in a worker process).
+        """
+        if self.enabled:
+            self.write(dict({'stage': name, 'time': time.strftime('%Y-%m-%dT%H:%M:%S')}, **fields))
+    
+    @contextmanager
+    def stage(self, name, **fields):
+        """
+        Measure a block of code as one stage.
+        
+        Yields the record dict; fields set on it (e.g. ``record['rows']``)
+        are written with the measurements.
+        """
+        if not self.enabled:
+            yield {}
+            return
+        
+        stack = self._stack()
+        record = dict(fields, stage=name, time=time.strftime('%Y-%m-%dT%H:%M:%S'))
+        with self._lock:
+            # Stages started on helper threads (e.g. load_all's loaders) nest under the main thread's stage
+            main_stack = self._stack(threading.main_thread())
+            parent = stack[-1] if stack else (main_stack[-1] if main_stack else None)
+            if parent is not None:
+                record['parent'] = parent['stage']
+            self._fold_peak()
+            if self._can_reset_peak is None or self._can_reset_peak:
+                self._can_reset_peak = _reset_peak_rss()
+            record['peak_rss_mb'] = _peak_rss_mb()
+            self._open.append(record)
+        stack.append(record)
+        
+        profiler = tracing = None
+        if name == self.profile_stage:
+            import cProfile
+            profiler = cProfile.Profile()
+        if name == self.trace_memory_stage:
+            import tracemalloc
+            tracing = not tracemalloc.is_tracing()
+            if tracing:
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+        
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        if profiler is not None:
+            profiler.enable()
+        try:
+            yield record
+        except BaseException as e:
+            record['error'] = f'{type(e).__name__}: {e}'
+            raise
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            record['wall_seconds'] = time.perf_counter() - wall_start
+            record['cpu_seconds'] = time.process_time() - cpu_start
+            if tracing is not None:
+                self._add_allocations(record, tracing)
+            if profiler is not None:
+                record['profile'] = self._dump_profile(name, profiler)
+            
+            stack.pop()
+            with self._lock:
+                self._fold_peak()
+                self._open.remove(record)
+            if not self._can_reset_peak:
+                record['peak_rss_is_process_max'] = True
+            self.write(record)
+    
+    def _add_allocations(self, record, started_here):
+        import tracemalloc
+        snapshot = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        statistics = snapshot.statistics('lineno')
+        record['traced_peak_mb'] = peak / 1e6
+        record['traced_blocks'] = sum(stat.count for stat in statistics)
+        record['top_allocations'] = [
+            {'site': str(stat.traceback[0]), 'size_mb': stat.size / 1e6, 'blocks': stat.count}
+            for stat in statistics[:10]
+        ]
+        if started_here:
+            tracemalloc.stop()
+    
+    def _dump_profile(self, name, profiler):
+        import io
+        import pstats
+        
+        stats_path = None
+        if self.path:
+            safe_name = ''.join(c if c.isalnum() else '_' for c in name)
+            stats_path = os.path.join(os.path.dirname(os.path.abspath(self.path)),
+                                      f'profile-{self.run_id}-{safe_name}.prof')
+            profiler.dump_stats(stats_path)
+        text = io.StringIO()
+        pstats.Stats(profiler, stream=text).sort_stats('cumulative').print_stats(15)
+        print(f"\nProfile of stage '{name}' (top 15 by cumulative time):")
+        print(text.getvalue())
+        return stats_path
+
+
+# Disabled until configure() is called, so library code pays nothing by default
+_ACTIVE = RunLog(enabled=False)
+
+
+def configure(path=None, enabled=True, profile_stage=None, trace_memory_stage=None, run_id=None):
+    """
+    Set the run log used by stage() and @instrumented.
+    
+    Returns:
+    --------
+    RunLog
+    """
+    global _ACTIVE
+    _ACTIVE = RunLog(path, enabled=enabled, profile_stage=profile_stage,
+                     trace_memory_stage=trace_memory_stage, run_id=run_id)
+    return _ACTIVE
+
+
+def get_run_log():
+    return _ACTIVE
+
+
+def stage(name, **fields):
+    """
+    Measure a block as one stage of the active run log, see RunLog.stage.
+    """
+    return _ACTIVE.stage(name, **fields)
+
+
+def log(name, **fields):
+    """
+    Log a stage measured elsewhere to the active run log.
+    """
+    _ACTIVE.log(name, **fields)
+
+
+def _row_count(result):
+    if hasattr(result, 'shape'):
+        return int(result.shape[0])
+    if isinstance(result, tuple) and result and hasattr(result[0], 'shape'):
+        return int(result[0].shape[0])
+    return None
+
+
+def instrumented(name=None):
+    """
+    Decorator measuring every call of a function as a stage; row counts are taken from the returned frame.
+    """
+    def decorate(func):
+        stage_name = name or func.__name__
+        
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _ACTIVE.enabled:
+                return func(*args, **kwargs)
+            with _ACTIVE.stage(stage_name) as record:
+                result = func(*args, **kwargs)
+                rows = _row_count(result)
+                if rows is not None:
+                    record['rows'] = rows
+                return result
+        return wrapper
+    return decorate
+
+
+def summarize(records):
+    """
+    Print the stages of a run sorted by wall time.
+    """
+    if not records:
+        return
+    print(f"\n{'stage':<32} {'wall s':>8} {'cpu s':>8} {'peak MB':>8} {'rows':>9}")
+    for record in sorted(records, key=lambda r: r.get('wall_seconds', 0), reverse=True):
+        rows = record.get('rows')
+        print(f"{record['stage']:<32} {record.get('wall_seconds', 0):8.2f} {record.get('cpu_seconds', 0):8.2f} "
+              f"{record.get('peak_rss_mb', float('nan')):8.0f} {rows if rows is not None else '':>9}")
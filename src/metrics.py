@@ -0,0 +1,307 @@
+"""
+Vectorized binary classification metrics with bootstrap confidence intervals.
+
+All threshold metrics come from one confusion-matrix pass and ROC-AUC from
+one sort of the scores. Bootstrap resamples are represented as per-sample
+weights, so thousands of them reduce to matrix products over the same
+sorted order instead of a Python loop of metric calls.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+# Resample weights kept in memory at once (n_resamples x n_samples)
+BOOTSTRAP_BLOCK_CELLS = 4_000_000
+
+
+def _as_binary(y):
+    # Positive class is 1, as with pos_label=1 in sklearn
+    return np.asarray(y).ravel() == 1
+
+
+def _divide(numerator, denominator):
+    # 0 where the denominator is 0, like zero_division=0
+    numerator = np.asarray(numerator, dtype=np.float64)
+    denominator = np.asarray(denominator, dtype=np.float64)
+    return np.divide(numerator, denominator, out=np.zeros(np.broadcast(numerator, denominator).shape),
+                     where=denominator != 0)
+
+
+def confusion_counts(y_true, y_pred, weights=None):
+    """
+    True/false positive/negative counts in one pass.
+    
+    Parameters:
+    -----------
+    y_true, y_pred : array-like
+        Labels (1 is the positive class)
+    weights : np.ndarray, optional
+        Sample weights, or a (n_resamples, n_samples) matrix of them
+    
+    Returns:
+    --------
+    tuple
+        tp, fp, fn, tn (scalars, or one per row of weights)
+    """
+    actual, predicted = _as_binary(y_true), _as_binary(y_pred)
+    cell = 2 * actual.astype(np.int64) + predicted
+    if weights is None:
+        tn, fp, fn, tp = np.bincount(cell, minlength=4)
+        return tp, fp, fn, tn
+    # One-hot cells, so every resample is a single matrix product
+    indicators = np.zeros((len(cell), 4))
+    indicators[np.arange(len(cell)), cell] = 1.0
+    counts = np.asarray(weights) @ indicators
+    return counts[..., 3], counts[..., 1], counts[..., 2], counts[..., 0]
+
+
+def threshold_metrics(tp, fp, fn, tn):
+    """
+    Accuracy, precision, recall and F1 from confusion counts (scalars or arrays).
+    """
+    precision = _divide(tp, tp + fp)
+    recall = _divide(tp, tp + fn)
+    return {
+        'Accuracy': _divide(tp + tn, tp + fp + fn + tn),
+        'Precision': precision,
+        'Recall': recall,
+        'F1-Score': _divide(2 * tp, 2 * tp + fp + fn)
+    }
+
+
+class _RankedScores:
+    """
+    Scores sorted once, with their tie groups, for weighted AUC evaluation.
+    """
+    
+    def __init__(self, y_true, y_score):
+        order = np.argsort(np.asarray(y_score, dtype=np.float64).ravel(), kind='mergesort')
+        sorted_scores = np.asarray(y_score, dtype=np.float64).ravel()[order]
+        self.order = order
+        self.positive = _as_binary(y_true)[order]
+        # First position of every group of tied scores
+        self.group_starts = np.flatnonzero(np.r_[True, sorted_scores[1:] != sorted_scores[:-1]])
+    
+    def auc(self, weights=None):
+        """
+        ROC-AUC for unit weights, or for every row of a weight matrix.
+        """
+        if weights is None:
+            weights = np.ones(len(self.order))
+        weights = np.asarray(weights, dtype=np.float64)[..., self.order]
+        positive_weights = np.where(self.positive, weights, 0.0)
+        negative_weights = weights - positive_weights
+        
+        # Per tie group: positives score against all lower negatives and half of the tied ones
+        group_pos = np.add.reduceat(positive_weights, self.group_starts, axis=-1)
+        group_neg = np.add.reduceat(negative_weights, self.group_starts, axis=-1)
+        neg_below = np.cumsum(group_neg, axis=-1) - group_neg
+        concordant = np.sum(group_pos * (neg_below + 0.5 * group_neg), axis=-1)
+        
+        total_pos, total_neg = group_pos.sum(axis=-1), group_neg.sum(axis=-1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where((total_pos > 0) & (total_neg > 0), concordant / (total_pos * total_neg), np.nan)
+
+
+def roc_auc(y_true, y_score):
+    """
+    ROC-AUC from a single sort of the scores (ties count one half).
+    
+    Raises ValueError when y_true holds a single class, like roc_auc_score.
+    """
+    actual = _as_binary(y_true)
+    if actual.all() or not actual.any():
+        raise ValueError('Only one class present in y_true. ROC AUC score is not defined in that case.')
+    return float(_RankedScores(actual, y_score).auc())
+
+
+def compute_metrics(y_true, y_pred=None, y_score=None):
+    """
+    Threshold metrics and ROC-AUC of one model.
+    
+    Parameters:
+    -----------
+    y_true : array-like
+        True labels
+    y_pred : array-like, optional
+        Predicted labels
+    y_score : array-like, optional
+        Predicted probabilities of the positive class
+    
+    Returns:
+    --------
+    dict
+        Accuracy, Precision, Recall and F1-Score (with y_pred) and ROC-AUC (with y_score)
+    """
+    metrics = {}
+    if y_pred is not None:
+        metrics.update({name: float(value) for name, value in
+                        threshold_metrics(*confusion_counts(y_true, y_pred)).items()})
+    if y_score is not None:
+        metrics['ROC-AUC'] = roc_auc(y_true, y_score)
+    return metrics
+
+
+def bootstrap_weights(n_samples, n_resamples, random_state=42):
+    """
+    Yield blocks of bootstrap resamples as (block_size, n_samples) count matrices.
+    
+    Each row counts how often every sample is drawn in one resample of
+    n_samples draws with replacement.
+    """
+    rng = np.random.default_rng(random_state)
+    block = max(1, min(n_resamples, BOOTSTRAP_BLOCK_CELLS // max(n_samples, 1)))
+    for start in range(0, n_resamples, block):
+        size = min(block, n_resamples - start)
+        draws = rng.integers(0, n_samples, size=(size, n_samples))
+        draws += np.arange(size)[:, np.newaxis] * n_samples
+        yield np.bincount(draws.ravel(), minlength=size * n_samples).reshape(size, n_samples).astype(np.float64)
+
+
+def evaluate_models(y_true, predictions, n_resamples=0, ci=0.95, random_state=42):
+    """
+    Metrics of many models on the same test set, with paired bootstrap confidence intervals.
+    
+    Every model is evaluated on the same resamples, so their intervals are
+    comparable. The scores of each model are sorted once and reused for all
+    resamples.
+    
+    Parameters:
+    -----------
+    y_true : array-like
+        True labels
+    predictions : dict
+        Model name to (y_pred, y_score); either may be None
+    n_resamples : int
+        Bootstrap resamples (0 for point estimates only)
+    ci : float
+        Confidence level of the percentile intervals
+    random_state : int
+        Seed of the resampling
+    
+    Returns:
+    --------
+    pd.DataFrame
+        One row per model and metric with Value and, when resampling,
+        CI Low, CI High and Std
+    """
+    y_true = np.asarray(y_true).ravel()
+    prepared = {}
+    for name, (y_pred, y_score) in predictions.items():
+        prepared[name] = (y_pred, _RankedScores(y_true, y_score) if y_score is not None else None)
+    
+    samples = {name: {} for name in predictions}
+    if n_resamples > 0:
+        for weights in bootstrap_weights(len(y_true), n_resamples, random_state):
+            for name, (y_pred, ranked) in prepared.items():
+                if y_pred is not None:
+                    for metric, values in threshold_metrics(*confusion_counts(y_true, y_pred, weights)).items():
+                        samples[name].setdefault(metric, []).append(values)
+                if ranked is not None:
+                    samples[name].setdefault('ROC-AUC', []).append(ranked.auc(weights))
+    
+    alpha = (1 - ci) / 2
+    rows = []
+    for name, (y_pred, ranked) in prepared.items():
+        point = compute_metrics(y_true, y_pred)
+        if ranked is not None:
+            point['ROC-AUC'] = float(ranked.auc())
+        for metric, value in point.items():
+            row = {'Model': name, 'Metric': metric, 'Value': value}
+            if n_resamples > 0:
+                values = np.concatenate(samples[name][metric])
+                row['CI Low'], row['CI High'] = np.nanquantile(values, [alpha, 1 - alpha])
+                row['Std'] = np.nanstd(values)
+            rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def threshold_sweep(y_true, y_score, cost_fn=1.0, cost_fp=1.0, cost_tp=0.0, cost_tn=0.0):
+    """
+    Metrics at every distinct threshold from one sort of the scores.
+    
+    A sample is flagged when its score is >= the threshold. The first row
+    (threshold inf) flags nobody, so every alert volume from 0 to n_samples
+    is covered. Runs in O(n log n), which keeps millions of scored rows fast.
+    
+    Parameters:
+    -----------
+    y_true : array-like
+        True labels
+    y_score : array-like
+        Predicted probabilities of the positive class
+    cost_fn : float
+        Cost of a missed leaver
+    cost_fp : float
+        Cost of an unnecessary retention intervention
+    cost_tp, cost_tn : float
+        Cost of a correct alert (e.g. the intervention itself) and of a
+        correct non-alert
+    
+    Returns:
+    --------
+    pd.DataFrame
+        One row per threshold in decreasing order, with TP, FP, FN, TN,
+        Precision, Recall, F1-Score, Alerts, Alert Rate and Cost (total
+        expected cost over the scored rows)
+    """
+    actual = _as_binary(y_true)
+    scores = np.asarray(y_score, dtype=np.float64).ravel()
+    order = np.argsort(scores, kind='stable')[::-1]
+    scores, actual = scores[order], actual[order]
+    
+    # Last position of every group of tied scores: all of them are flagged together
+    ends = np.flatnonzero(np.r_[scores[1:] != scores[:-1], True])
+    tp = np.r_[0, np.cumsum(actual)[ends]]
+    alerts = np.r_[0, ends + 1]
+    fp = alerts - tp
+    fn = actual.sum() - tp
+    tn = len(actual) - alerts - fn
+    
+    sweep = pd.DataFrame({'Threshold': np.r_[np.inf, scores[ends]], 'TP': tp, 'FP': fp, 'FN': fn, 'TN': tn})
+    sweep['Precision'] = _divide(tp, alerts)
+    sweep['Recall'] = _divide(tp, tp + fn)
+    sweep['F1-Score'] = _divide(2 * tp, 2 * tp + fp + fn)
+    sweep['Alerts'] = alerts
+    sweep['Alert Rate'] = alerts / max(len(actual), 1)
+    sweep['Cost'] = cost_tp * tp + cost_fp * fp + cost_fn * fn + cost_tn * tn
+    return sweep
+
+
+def select_threshold(sweep, objective='Cost', max_alerts=None, max_alert_rate=None, min_recall=None):
+    """
+    Pick the operating point of a threshold sweep.
+    
+    Parameters:
+    -----------
+    sweep : pd.DataFrame
+        Output of threshold_sweep
+    objective : str
+        'Cost' is minimized; any other column (e.g. 'F1-Score') is maximized
+    max_alerts : int, optional
+        Capacity limit: most employees that can be followed up
+    max_alert_rate : float, optional
+        Capacity limit as a fraction of the scored employees
+    min_recall : float, optional
+        Smallest acceptable share of leavers caught
+    
+    Returns:
+    --------
+    pd.Series
+        The chosen row; among equally good thresholds the highest (fewest alerts) wins
+    """
+    feasible = np.ones(len(sweep), dtype=bool)
+    if max_alerts is not None:
+        feasible &= sweep['Alerts'].to_numpy() <= max_alerts
+    if max_alert_rate is not None:
+        feasible &= sweep['Alert Rate'].to_numpy() <= max_alert_rate
+    if min_recall is not None:
+        feasible &= sweep['Recall'].to_numpy() >= min_recall
+    if not feasible.any():
+        raise ValueError('No threshold satisfies the given constraints')
+    
+    values = sweep[objective].to_numpy(dtype=np.float64)
+    values = np.where(feasible, values if objective == 'Cost' else -values, np.inf)
+    # argmin returns the first (highest) threshold among ties
+    return sweep.iloc[int(np.argmin(values))]
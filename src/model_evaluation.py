@@ -4,13 +4,14 @@ Model evaluation utilities for employee turnover analysis.
 
 import numpy as np
 import pandas as pd
-from sklearn.metrics import (
-    accuracy_score, precision_score, recall_score, f1_score,
-    roc_auc_score, confusion_matrix, classification_report,
-    roc_curve, precision_recall_curve
-)
-import matplotlib.pyplot as plt
-import seaborn as sns
+
+# matplotlib, seaborn and sklearn.metrics are imported by the functions that
+# draw or report, so computing metrics does not pay for loading them
+from metrics import compute_metrics, roc_auc, threshold_sweep, select_threshold
+
+
+# Curves are drawn with at most 4 points per column of this grid (about one column per pixel)
+CURVE_COLUMNS = 1000
 
 
 def evaluate_model(y_true, y_pred, y_pred_proba=None, model_name='Model'):
@@ -27,24 +28,65 @@ def evaluate_model(y_true, y_pred, y_pred_proba=None, model_name='Model'):
         Predicted probabilities for positive class
     model_name : str
         Name of the model
-        
+    
     Returns:
     --------
     dict
         Dictionary of evaluation metrics
     """
-    metrics = {
-        'Model': model_name,
-        'Accuracy': accuracy_score(y_true, y_pred),
-        'Precision': precision_score(y_true, y_pred, zero_division=0),
-        'Recall': recall_score(y_true, y_pred, zero_division=0),
-        'F1-Score': f1_score(y_true, y_pred, zero_division=0)
-    }
+    # One confusion-matrix pass for the threshold metrics and one sort for ROC-AUC
+    metrics = {'Model': model_name}
+    metrics.update(compute_metrics(y_true, y_pred, y_pred_proba))
+    return metrics
+
+
+def downsample_curve(x, y, n_columns=CURVE_COLUMNS):
+    """
+    Reduce a curve with monotone x to at most 4 points per column.
     
-    if y_pred_proba is not None:
-        metrics['ROC-AUC'] = roc_auc_score(y_true, y_pred_proba)
+    The x range is split into n_columns equal columns and each column keeps
+    its first, last, lowest and highest point, in curve order. The drawn
+    line then covers the same vertical extent in every column, so it
+    differs from the full curve by at most one column width horizontally
+    (below a pixel for n_columns at least the plot width in pixels).
     
-    return metrics
+    Parameters:
+    -----------
+    x : array-like
+        Monotone (increasing or decreasing) x coordinates, e.g. FPR or recall
+    y : array-like
+        y coordinates
+    n_columns : int
+        Number of columns; the result has at most 4 * n_columns points
+    
+    Returns:
+    --------
+    np.ndarray, np.ndarray
+        The kept x and y coordinates
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    if len(x) <= 4 * n_columns:
+        return x, y
+    
+    low, high = np.nanmin(x), np.nanmax(x)
+    span = high - low if high > low else 1.0
+    column = np.minimum(((x - low) / span * n_columns).astype(np.int64), n_columns - 1)
+    # x is monotone, so every column is one contiguous run
+    starts = np.flatnonzero(np.r_[True, column[1:] != column[:-1]])
+    ends = np.r_[starts[1:] - 1, len(x) - 1]
+    run = np.repeat(np.arange(len(starts)), np.diff(np.r_[starts, len(x)]))
+    
+    lowest = np.minimum.reduceat(y, starts)
+    highest = np.maximum.reduceat(y, starts)
+    at_low = np.flatnonzero(y == lowest[run])
+    at_high = np.flatnonzero(y == highest[run])
+    keep = np.unique(np.concatenate([
+        starts, ends,
+        at_low[np.unique(run[at_low], return_index=True)[1]],
+        at_high[np.unique(run[at_high], return_index=True)[1]]
+    ]))
+    return x[keep], y[keep]
 
 
 def plot_confusion_matrix(y_true, y_pred, model_name='Model', ax=None):
@@ -62,6 +104,10 @@ def plot_confusion_matrix(y_true, y_pred, model_name='Model', ax=None):
     ax : matplotlib.axes, optional
         Axes to plot on
     """
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    from sklearn.metrics import confusion_matrix
+    
     cm = confusion_matrix(y_true, y_pred)
     
     if ax is None:
@@ -77,7 +123,7 @@ def plot_confusion_matrix(y_true, y_pred, model_name='Model', ax=None):
     return ax
 
 
-def plot_roc_curve(y_true, y_pred_proba, model_name='Model', ax=None):
+def plot_roc_curve(y_true, y_pred_proba, model_name='Model', ax=None, n_columns=CURVE_COLUMNS):
     """
     Plot ROC curve.
     
@@ -91,9 +137,15 @@ def plot_roc_curve(y_true, y_pred_proba, model_name='Model', ax=None):
         Name of the model
     ax : matplotlib.axes, optional
         Axes to plot on
+    n_columns : int
+        Long curves are downsampled to at most 4 points per column (see downsample_curve)
     """
+    import matplotlib.pyplot as plt
+    from sklearn.metrics import roc_curve
+    
     fpr, tpr, _ = roc_curve(y_true, y_pred_proba)
-    auc_score = roc_auc_score(y_true, y_pred_proba)
+    fpr, tpr = downsample_curve(fpr, tpr, n_columns)
+    auc_score = roc_auc(y_true, y_pred_proba)
     
     if ax is None:
         fig, ax = plt.subplots(figsize=(8, 6))
@@ -109,7 +161,7 @@ def plot_roc_curve(y_true, y_pred_proba, model_name='Model', ax=None):
     return ax
 
 
-def plot_precision_recall_curve(y_true, y_pred_proba, model_name='Model', ax=None):
+def plot_precision_recall_curve(y_true, y_pred_proba, model_name='Model', ax=None, n_columns=CURVE_COLUMNS):
     """
     Plot Precision-Recall curve.
     
@@ -123,8 +175,14 @@ def plot_precision_recall_curve(y_true, y_pred_proba, model_name='Model', ax=Non
         Name of the model
     ax : matplotlib.axes, optional
         Axes to plot on
+    n_columns : int
+        Long curves are downsampled to at most 4 points per column (see downsample_curve)
     """
+    import matplotlib.pyplot as plt
+    from sklearn.metrics import precision_recall_curve
+    
     precision, recall, _ = precision_recall_curve(y_true, y_pred_proba)
+    recall, precision = downsample_curve(recall, precision, n_columns)
     
     if ax is None:
         fig, ax = plt.subplots(figsize=(8, 6))
@@ -139,7 +197,66 @@ def plot_precision_recall_curve(y_true, y_pred_proba, model_name='Model', ax=Non
     return ax
 
 
-def compare_models(results_df):
+def plot_threshold_analysis(y_true, y_pred_proba, model_name='Model', cost_fn=1.0, cost_fp=1.0,
+                            max_alerts=None, ax=None, n_columns=CURVE_COLUMNS):
+    """
+    Plot precision, recall and expected cost against the decision threshold
+    and mark the cheapest operating point.
+    
+    Parameters:
+    -----------
+    y_true : array-like
+        True labels
+    y_pred_proba : array-like
+        Predicted probabilities for positive class
+    model_name : str
+        Name of the model
+    cost_fn : float
+        Cost of a missed leaver
+    cost_fp : float
+        Cost of an unnecessary retention intervention
+    max_alerts : int, optional
+        Most employees HR can follow up
+    ax : matplotlib.axes, optional
+        Axes to plot on
+    n_columns : int
+        Long curves are downsampled to at most 4 points per column (see downsample_curve)
+    
+    Returns:
+    --------
+    matplotlib.axes, pd.Series
+        The axes and the chosen operating point (see select_threshold)
+    """
+    import matplotlib.pyplot as plt
+    
+    sweep = threshold_sweep(y_true, y_pred_proba, cost_fn=cost_fn, cost_fp=cost_fp)
+    point = select_threshold(sweep, max_alerts=max_alerts)
+    curve = sweep.iloc[1:]
+    
+    if ax is None:
+        fig, ax = plt.subplots(figsize=(8, 6))
+    
+    for metric in ['Precision', 'Recall', 'F1-Score']:
+        ax.plot(*downsample_curve(curve['Threshold'], curve[metric], n_columns), label=metric)
+    ax.axvline(point['Threshold'], color='k', linestyle='--',
+               label=f"Chosen threshold {point['Threshold']:.3f}")
+    ax.set_xlabel('Threshold')
+    ax.set_ylabel('Score')
+    ax.set_title(f'Threshold Analysis - {model_name}')
+    
+    cost_ax = ax.twinx()
+    cost_ax.plot(*downsample_curve(curve['Threshold'], curve['Cost'], n_columns), color='tab:red', alpha=0.6, label='Expected cost')
+    cost_ax.set_ylabel('Expected cost')
+    
+    handles, labels = ax.get_legend_handles_labels()
+    cost_handles, cost_labels = cost_ax.get_legend_handles_labels()
+    ax.legend(handles + cost_handles, labels + cost_labels, loc='best')
+    ax.grid(True, alpha=0.3)
+    
+    return ax, point
+
+
+def compare_models(results_df, fig=None):
     """
     Compare multiple models and create visualization.
     
@@ -147,7 +264,9 @@ def compare_models(results_df):
     -----------
     results_df : pd.DataFrame
         DataFrame with model evaluation results
-        
+    fig : matplotlib.figure.Figure, optional
+        Figure to draw on (a new pyplot figure by default)
+    
     Returns:
     --------
     matplotlib.figure.Figure
@@ -156,10 +275,10 @@ def compare_models(results_df):
     metrics = ['Accuracy', 'Precision', 'Recall', 'F1-Score', 'ROC-AUC']
     available_metrics = [m for m in metrics if m in results_df.columns]
     
-    fig, axes = plt.subplots(1, len(available_metrics), figsize=(5*len(available_metrics), 5))
-    
-    if len(available_metrics) == 1:
-        axes = [axes]
+    if fig is None:
+        import matplotlib.pyplot as plt
+        fig = plt.figure(figsize=(5*len(available_metrics), 5))
+    axes = fig.subplots(1, len(available_metrics), squeeze=False)[0]
     
     for idx, metric in enumerate(available_metrics):
         results_df.plot(x='Model', y=metric, kind='bar', ax=axes[idx], legend=False)
@@ -168,7 +287,7 @@ def compare_models(results_df):
         axes[idx].tick_params(axis='x', rotation=45)
         axes[idx].grid(True, alpha=0.3, axis='y')
     
-    plt.tight_layout()
+    fig.tight_layout()
     return fig
 
 
@@ -185,6 +304,8 @@ def print_classification_report(y_true, y_pred, model_name='Model'):
     model_name : str
         Name of the model
     """
+    from sklearn.metrics import classification_report
+    
     print(f"\n{'='*60}")
     print(f"Classification Report - {model_name}")
     print(f"{'='*60}")
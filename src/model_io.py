@@ -0,0 +1,80 @@
+"""
+Model persistence utilities for employee turnover analysis.
+"""
+
+import json
+import os
+import pickle
+from pathlib import Path
+
+from compiled_trees import can_compile, compile_model, load_compiled
+
+
+def save_model(model, model_name, use_scaled, model_dir='models'):
+    """
+    Save a trained model and its metadata.
+    
+    Tree ensembles are also written in the NumPy format of compiled_trees,
+    under model_dir/compiled, for scoring without their library.
+    
+    Parameters:
+    -----------
+    model : estimator
+        Fitted classifier with predict_proba
+    model_name : str
+        Name of the model
+    use_scaled : bool
+        Whether the model was trained on scaled features
+    model_dir : str
+        Directory for model.pkl, model.json and compiled/
+    """
+    model_dir = Path(model_dir)
+    model_dir.mkdir(parents=True, exist_ok=True)
+    
+    tmp_path = model_dir / 'model.pkl.tmp'
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(model, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, model_dir / 'model.pkl')
+    
+    compiled = False
+    if can_compile(model):
+        try:
+            compile_model(model).save(model_dir / 'compiled')
+            compiled = True
+        except ValueError as e:
+            print(f"  Compiled model not written: {e}")
+    
+    with open(model_dir / 'model.json', 'w') as f:
+        json.dump({'model_name': model_name, 'use_scaled': bool(use_scaled),
+                   'model_class': type(model).__name__, 'compiled': compiled}, f, indent=2)
+    print(f"Saved model: {model_dir / 'model.pkl'} ({model_name})")
+
+
+def load_model(model_dir='models', compiled=False):
+    """
+    Load a model saved with save_model.
+    
+    Only the library the model itself belongs to is imported while unpickling.
+    
+    Parameters:
+    -----------
+    model_dir : str
+        Directory holding model.pkl and model.json
+    compiled : bool
+        Return the memory-mapped compiled model (see compiled_trees) instead
+        of unpickling the original; falls back to the original when the
+        model was not compiled
+    
+    Returns:
+    --------
+    estimator, dict
+        Fitted classifier and its metadata
+    """
+    model_dir = Path(model_dir)
+    with open(model_dir / 'model.json') as f:
+        meta = json.load(f)
+    if compiled and meta.get('compiled'):
+        return load_compiled(model_dir / 'compiled'), meta
+    with open(model_dir / 'model.pkl', 'rb') as f:
+        model = pickle.load(f)
+    return model, meta
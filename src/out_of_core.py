@@ -0,0 +1,328 @@
+"""
+Out-of-core training for HR extracts that do not fit in memory.
+
+The extract is streamed in chunks of employees (see
+data_loader.iter_merged_chunks). One pass transforms each chunk with a
+fitted PreprocessingPipeline, writes the feature rows to on-disk chunk
+files, split into training and test employees by a hash of EmployeeID,
+and accumulates the StandardScaler statistics and class counts of the
+training rows. Models are then fitted chunk by chunk: linear models with
+partial_fit and XGBoost through its external-memory data iterator, so
+peak memory depends on the chunk size rather than the number of employees.
+
+SMOTE needs the whole minority class in memory, so the class imbalance
+is handled with class weights (scale_pos_weight for XGBoost) instead.
+"""
+
+import json
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from preprocessing import PreprocessingPipeline, prepare_features_for_modeling
+
+
+class FeatureChunks:
+    """
+    Feature matrix and labels stored on disk as one pair of .npy files per chunk.
+    
+    Parameters:
+    -----------
+    path : str
+        Directory of the chunk files and manifest.json
+    """
+    
+    def __init__(self, path):
+        self.path = Path(path)
+        self.columns = []
+        self.chunks = []
+        manifest = self.path / 'manifest.json'
+        if manifest.exists():
+            with open(manifest) as f:
+                state = json.load(f)
+            self.columns, self.chunks = state['columns'], state['chunks']
+    
+    @classmethod
+    def create(cls, path, columns):
+        """
+        Start an empty store, removing the chunks of a previous run.
+        """
+        path = Path(path)
+        if path.exists():
+            shutil.rmtree(path)
+        path.mkdir(parents=True)
+        store = cls(path)
+        store.columns = list(columns)
+        return store
+    
+    def append(self, X, y):
+        """
+        Write one chunk (features as float32, labels as int8).
+        """
+        name = f'{len(self.chunks):05d}'
+        np.save(self.path / f'{name}-X.npy', np.ascontiguousarray(X, dtype=np.float32))
+        np.save(self.path / f'{name}-y.npy', np.asarray(y, dtype=np.int8))
+        self.chunks.append({'name': name, 'rows': len(y), 'positives': int(np.sum(y))})
+        with open(self.path / 'manifest.json', 'w') as f:
+            json.dump({'columns': self.columns, 'chunks': self.chunks}, f)
+    
+    def __len__(self):
+        return sum(chunk['rows'] for chunk in self.chunks)
+    
+    @property
+    def class_counts(self):
+        positives = sum(chunk['positives'] for chunk in self.chunks)
+        return len(self) - positives, positives
+    
+    def iter_chunks(self, shuffle=False, random_state=None):
+        """
+        Yield (X, y) per chunk, memory-mapped, or loaded and shuffled with shuffle=True.
+        
+        Parameters:
+        -----------
+        shuffle : bool
+            Visit the chunks, and the rows within each chunk, in random order
+        random_state : int or np.random.Generator, optional
+            Seed of the shuffle
+        """
+        rng = np.random.default_rng(random_state)
+        order = rng.permutation(len(self.chunks)) if shuffle else range(len(self.chunks))
+        for i in order:
+            name = self.chunks[i]['name']
+            X = np.load(self.path / f'{name}-X.npy', mmap_mode='r')
+            y = np.load(self.path / f'{name}-y.npy', mmap_mode='r')
+            if shuffle:
+                rows = rng.permutation(len(y))
+                X, y = X[rows], y[rows]
+            yield X, y
+    
+    def __iter__(self):
+        return self.iter_chunks()
+
+
+def fit_preprocessor_on_sample(merged_chunks, sample_rows=100_000, strategy='median', target_col='Attrition',
+                               random_state=42):
+    """
+    Fit the imputation and encoding state on a uniform sample of a chunk stream.
+    
+    The sample keeps the sample_rows rows with the smallest random keys
+    seen so far, so it is uniform over the whole stream while only one
+    chunk and the sample are in memory.
+    
+    Parameters:
+    -----------
+    merged_chunks : iterable of pd.DataFrame
+        Merged data chunks, e.g. from iter_merged_chunks
+    sample_rows : int
+        Rows the state is fitted on
+    strategy : str
+        Numeric imputation strategy of the PreprocessingPipeline
+    target_col : str
+        Target column
+    random_state : int
+        Seed of the sample
+    
+    Returns:
+    --------
+    PreprocessingPipeline, list, int
+        Fitted pipeline, model feature columns and the number of rows seen
+    """
+    rng = np.random.default_rng(random_state)
+    sample, keys = None, np.empty(0)
+    n_rows = 0
+    for chunk in merged_chunks:
+        n_rows += len(chunk)
+        chunk_keys = rng.random(len(chunk))
+        if sample is None:
+            sample, keys = chunk, chunk_keys
+        else:
+            sample = pd.concat([sample, chunk], ignore_index=True)
+            keys = np.concatenate([keys, chunk_keys])
+        if len(sample) > sample_rows:
+            keep = np.sort(np.argpartition(keys, sample_rows)[:sample_rows])
+            sample, keys = sample.iloc[keep].reset_index(drop=True), keys[keep]
+    if sample is None:
+        raise ValueError("The extract has no rows")
+    
+    preprocessor = PreprocessingPipeline(strategy=strategy, target_col=target_col)
+    X, _ = prepare_features_for_modeling(preprocessor.fit_transform(sample), target_col=target_col)
+    return preprocessor, list(X.columns), n_rows
+
+
+def holdout_mask(employee_ids, test_size=0.2):
+    """
+    Deterministic test-set membership of each employee, from a hash of its EmployeeID.
+    """
+    hashes = pd.util.hash_array(np.asarray(employee_ids, dtype=np.int64))
+    return hashes % 10_000 < int(round(test_size * 10_000))
+
+
+def write_feature_chunks(merged_chunks, preprocessor, feature_columns, output_dir, test_size=0.2):
+    """
+    Transform a chunk stream into on-disk training and test chunks in one pass.
+    
+    Parameters:
+    -----------
+    merged_chunks : iterable of pd.DataFrame
+        Merged data chunks with the target column
+    preprocessor : PreprocessingPipeline
+        Fitted pipeline
+    feature_columns : list
+        Model feature columns, in order
+    output_dir : str
+        Directory receiving train/ and test/ chunk stores
+    test_size : float
+        Share of employees held out for testing
+    
+    Returns:
+    --------
+    FeatureChunks, FeatureChunks, StandardScaler
+        Training and test chunks, and the scaler fitted on the training rows
+    """
+    from sklearn.preprocessing import StandardScaler
+    
+    train = FeatureChunks.create(Path(output_dir) / 'train', feature_columns)
+    test = FeatureChunks.create(Path(output_dir) / 'test', feature_columns)
+    scaler = StandardScaler()
+    target_col = preprocessor.target_col
+    
+    for chunk in merged_chunks:
+        if target_col not in chunk.columns:
+            raise ValueError(f"Training data needs the target column {target_col}")
+        encoded = preprocessor.transform(chunk)
+        X = np.column_stack([np.asarray(encoded[col], dtype=np.float64) for col in feature_columns])
+        y = np.asarray(encoded[target_col])
+        in_test = holdout_mask(chunk['EmployeeID'].to_numpy(), test_size)
+        if (~in_test).any():
+            # Scaler statistics are merged chunk by chunk (mean and variance of all training rows)
+            scaler.partial_fit(X[~in_test])
+            train.append(X[~in_test], y[~in_test])
+        if in_test.any():
+            test.append(X[in_test], y[in_test])
+    if len(train) == 0:
+        raise ValueError("No training rows were written")
+    return train, test, scaler
+
+
+def balanced_class_weight(store):
+    """
+    Class weights of sklearn's 'balanced' mode, from the chunk class counts.
+    """
+    negatives, positives = store.class_counts
+    if not negatives or not positives:
+        raise ValueError("The training chunks contain a single class")
+    n_rows = negatives + positives
+    return {0: n_rows / (2 * negatives), 1: n_rows / (2 * positives)}
+
+
+def train_incremental(estimator, train, scaler=None, epochs=5, random_state=42):
+    """
+    Fit a partial_fit-capable model over the training chunks.
+    
+    Parameters:
+    -----------
+    estimator : estimator
+        Model with partial_fit (e.g. SGDClassifier)
+    train : FeatureChunks
+        Training chunks
+    scaler : StandardScaler, optional
+        Applied to each chunk before fitting
+    epochs : int
+        Passes over the chunks, each in a new random order
+    random_state : int
+        Seed of the chunk and row order
+    
+    Returns:
+    --------
+    estimator
+        The fitted model
+    """
+    rng = np.random.default_rng(random_state)
+    for _ in range(epochs):
+        for X, y in train.iter_chunks(shuffle=True, random_state=rng):
+            if scaler is not None:
+                X = scaler.transform(X)
+            estimator.partial_fit(X, y, classes=np.array([0, 1]))
+    return estimator
+
+
+def train_xgboost_external_memory(train, cache_dir, num_boost_round=100, params=None, random_state=42):
+    """
+    Fit XGBoost from the training chunks through an external-memory DMatrix.
+    
+    XGBoost pulls the chunks through a data iterator and pages its own
+    representation to cache_dir, so neither the features nor the booster's
+    matrix are held in memory at once.
+    
+    Parameters:
+    -----------
+    train : FeatureChunks
+        Training chunks
+    cache_dir : str
+        Directory of the external-memory pages
+    num_boost_round : int
+        Boosting rounds
+    params : dict, optional
+        Booster parameters overriding the defaults (those of XGBClassifier,
+        with scale_pos_weight set from the class counts)
+    random_state : int
+        Booster seed
+    
+    Returns:
+    --------
+    xgb.XGBClassifier
+        Classifier wrapping the trained booster
+    """
+    import xgboost as xgb
+    
+    class ChunkIterator(xgb.DataIter):
+        def __init__(self):
+            self._chunks = None
+            super().__init__(cache_prefix=str(Path(cache_dir) / 'xgb'))
+        
+        def next(self, input_data):
+            if self._chunks is None:
+                self._chunks = train.iter_chunks()
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                return 0
+            X, y = chunk
+            input_data(data=np.asarray(X), label=np.asarray(y, dtype=np.float32))
+            return 1
+        
+        def reset(self):
+            self._chunks = None
+    
+    Path(cache_dir).mkdir(parents=True, exist_ok=True)
+    negatives, positives = train.class_counts
+    booster_params = {'objective': 'binary:logistic', 'eval_metric': 'logloss', 'tree_method': 'hist',
+                      'max_depth': 6, 'eta': 0.3, 'seed': random_state,
+                      'scale_pos_weight': negatives / max(positives, 1)}
+    booster_params.update(params or {})
+    
+    booster = xgb.train(booster_params, xgb.DMatrix(ChunkIterator()), num_boost_round=num_boost_round)
+    model = xgb.XGBClassifier()
+    model.load_model(bytearray(booster.save_raw('ubj')))
+    return model
+
+
+def predict_chunks(model, store, scaler=None):
+    """
+    Labels and positive-class probabilities of every row of a chunk store.
+    
+    Returns:
+    --------
+    np.ndarray, np.ndarray
+        True labels and predicted probabilities, in chunk order
+    """
+    labels, scores = [], []
+    for X, y in store:
+        if scaler is not None:
+            X = scaler.transform(X)
+        scores.append(model.predict_proba(np.asarray(X))[:, 1])
+        labels.append(np.asarray(y))
+    if not labels:
+        return np.array([], dtype=np.int8), np.array([])
+    return np.concatenate(labels), np.concatenate(scores)
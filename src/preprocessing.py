@@ -4,10 +4,16 @@ Data preprocessing utilities for employee turnover analysis.
 
 import pandas as pd
 import numpy as np
-from sklearn.preprocessing import LabelEncoder, StandardScaler
-from sklearn.impute import SimpleImputer
+import json
+from pathlib import Path
 
+from instrumentation import instrumented
 
+
+SURVEY_COLUMNS = ['EnvironmentSatisfaction', 'JobSatisfaction', 'WorkLifeBalance']
+
+
+@instrumented()
 def handle_missing_values(df, strategy='median'):
     """
     Handle missing values in the dataset.
@@ -18,7 +24,7 @@ def handle_missing_values(df, strategy='median'):
         Input dataframe
     strategy : str
         Imputation strategy ('mean', 'median', 'most_frequent', 'constant')
-        
+    
     Returns:
     --------
     pd.DataFrame
@@ -27,15 +33,15 @@ def handle_missing_values(df, strategy='median'):
     df_clean = df.copy()
     
     # Handle 'NA' strings in survey data
-    survey_cols = ['EnvironmentSatisfaction', 'JobSatisfaction', 'WorkLifeBalance']
-    for col in survey_cols:
+    for col in SURVEY_COLUMNS:
         if col in df_clean.columns:
             df_clean[col] = df_clean[col].replace('NA', np.nan)
             df_clean[col] = pd.to_numeric(df_clean[col], errors='coerce')
     
-    # Separate numeric and categorical columns
+    # Separate numeric and categorical columns (text may be object or category dtype)
     numeric_cols = df_clean.select_dtypes(include=[np.number]).columns.tolist()
     categorical_cols = df_clean.select_dtypes(include=['object']).columns.tolist()
+    category_cols = df_clean.select_dtypes(include=['category']).columns.tolist()
     
     # Remove EmployeeID from processing
     if 'EmployeeID' in numeric_cols:
@@ -43,17 +49,25 @@ def handle_missing_values(df, strategy='median'):
     
     # Impute numeric columns
     if numeric_cols:
+        from sklearn.impute import SimpleImputer
         numeric_imputer = SimpleImputer(strategy=strategy)
         df_clean[numeric_cols] = numeric_imputer.fit_transform(df_clean[numeric_cols])
     
     # Impute categorical columns with mode
     if categorical_cols:
+        from sklearn.impute import SimpleImputer
         categorical_imputer = SimpleImputer(strategy='most_frequent')
         df_clean[categorical_cols] = categorical_imputer.fit_transform(df_clean[categorical_cols])
     
+    # Category columns keep their compact dtype; ties go to the smallest value, as in SimpleImputer
+    for col in category_cols:
+        if df_clean[col].isna().any():
+            df_clean[col] = df_clean[col].fillna(df_clean[col].mode().iloc[0])
+    
     return df_clean
 
 
+@instrumented()
 def encode_categorical_variables(df, target_col='Attrition'):
     """
     Encode categorical variables.
@@ -64,17 +78,19 @@ def encode_categorical_variables(df, target_col='Attrition'):
         Input dataframe
     target_col : str
         Name of target variable column
-        
+    
     Returns:
     --------
     pd.DataFrame, dict
         Encoded dataframe and label encoders dictionary
     """
+    from sklearn.preprocessing import LabelEncoder
+    
     df_encoded = df.copy()
     encoders = {}
     
     # Identify categorical columns (excluding target if it exists)
-    categorical_cols = df_encoded.select_dtypes(include=['object']).columns.tolist()
+    categorical_cols = df_encoded.select_dtypes(include=['object', 'category']).columns.tolist()
     if target_col in categorical_cols:
         categorical_cols.remove(target_col)
     
@@ -93,6 +109,7 @@ def encode_categorical_variables(df, target_col='Attrition'):
     return df_encoded, encoders
 
 
+@instrumented()
 def create_features(df):
     """
     Create additional features from existing data.
@@ -101,7 +118,7 @@ def create_features(df):
     -----------
     df : pd.DataFrame
         Input dataframe
-        
+    
     Returns:
     --------
     pd.DataFrame
@@ -109,39 +126,367 @@ def create_features(df):
     """
     df_feat = df.copy()
     
+    for name, values in _derived_features(df_feat).items():
+        df_feat[name] = values
+    
+    return df_feat
+
+
+def _derived_features(columns):
+    """
+    Compute the create_features columns from a column mapping (DataFrame or dict of arrays).
+    """
+    new = {}
+    
     # Salary-related features
-    if 'MonthlyIncome' in df_feat.columns and 'PercentSalaryHike' in df_feat.columns:
-        df_feat['SalaryHikeAmount'] = df_feat['MonthlyIncome'] * df_feat['PercentSalaryHike'] / 100
-        df_feat['SalaryHikeRatio'] = df_feat['PercentSalaryHike'] / 100
+    if 'MonthlyIncome' in columns and 'PercentSalaryHike' in columns:
+        new['SalaryHikeAmount'] = columns['MonthlyIncome'] * columns['PercentSalaryHike'] / 100
+        new['SalaryHikeRatio'] = columns['PercentSalaryHike'] / 100
     
     # Experience-related features
-    if 'TotalWorkingYears' in df_feat.columns and 'YearsAtCompany' in df_feat.columns:
-        df_feat['YearsBeforeCompany'] = df_feat['TotalWorkingYears'] - df_feat['YearsAtCompany']
-        df_feat['CompanyTenureRatio'] = df_feat['YearsAtCompany'] / (df_feat['TotalWorkingYears'] + 1)
+    if 'TotalWorkingYears' in columns and 'YearsAtCompany' in columns:
+        new['YearsBeforeCompany'] = columns['TotalWorkingYears'] - columns['YearsAtCompany']
+        new['CompanyTenureRatio'] = columns['YearsAtCompany'] / (columns['TotalWorkingYears'] + 1)
     
     # Promotion-related features
-    if 'YearsSinceLastPromotion' in df_feat.columns and 'YearsAtCompany' in df_feat.columns:
-        df_feat['PromotionFrequency'] = df_feat['YearsAtCompany'] / (df_feat['YearsSinceLastPromotion'] + 1)
-        df_feat['RecentlyPromoted'] = (df_feat['YearsSinceLastPromotion'] <= 2).astype(int)
+    if 'YearsSinceLastPromotion' in columns and 'YearsAtCompany' in columns:
+        new['PromotionFrequency'] = columns['YearsAtCompany'] / (columns['YearsSinceLastPromotion'] + 1)
+        new['RecentlyPromoted'] = (columns['YearsSinceLastPromotion'] <= 2).astype(int)
     
     # Manager relationship
-    if 'YearsWithCurrentManager' in df_feat.columns and 'YearsAtCompany' in df_feat.columns:
-        df_feat['ManagerStability'] = df_feat['YearsWithCurrentManager'] / (df_feat['YearsAtCompany'] + 1)
+    if 'YearsWithCurrentManager' in columns and 'YearsAtCompany' in columns:
+        new['ManagerStability'] = columns['YearsWithCurrentManager'] / (columns['YearsAtCompany'] + 1)
     
     # Job level and income
-    if 'JobLevel' in df_feat.columns and 'MonthlyIncome' in df_feat.columns:
-        df_feat['IncomePerLevel'] = df_feat['MonthlyIncome'] / df_feat['JobLevel']
+    if 'JobLevel' in columns and 'MonthlyIncome' in columns:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            new['IncomePerLevel'] = columns['MonthlyIncome'] / columns['JobLevel']
     
     # Age and experience
-    if 'Age' in df_feat.columns and 'TotalWorkingYears' in df_feat.columns:
-        df_feat['CareerStartAge'] = df_feat['Age'] - df_feat['TotalWorkingYears']
+    if 'Age' in columns and 'TotalWorkingYears' in columns:
+        new['CareerStartAge'] = columns['Age'] - columns['TotalWorkingYears']
     
     # Overtime indicator (if working hours > standard hours)
-    if 'AvgWorkingHours' in df_feat.columns and 'StandardHours' in df_feat.columns:
-        df_feat['OvertimeHours'] = df_feat['AvgWorkingHours'] - df_feat['StandardHours']
-        df_feat['HasOvertime'] = (df_feat['OvertimeHours'] > 0).astype(int)
+    if 'AvgWorkingHours' in columns and 'StandardHours' in columns:
+        new['OvertimeHours'] = columns['AvgWorkingHours'] - columns['StandardHours']
+        new['HasOvertime'] = (new['OvertimeHours'] > 0).astype(int)
     
-    return df_feat
+    return new
+
+
+class PreprocessingPipeline:
+    """
+    Fused missing-value imputation, feature creation and categorical encoding.
+    
+    Equivalent to handle_missing_values -> create_features ->
+    encode_categorical_variables, but fitted once and applied in a single
+    pass over the column buffers: each column is imputed and encoded as a
+    NumPy array and the frame is assembled once (or updated in place), so no
+    intermediate DataFrame copies are made.
+    
+    Parameters:
+    -----------
+    strategy : str
+        Numeric imputation strategy ('mean', 'median', 'most_frequent', 'constant')
+    target_col : str
+        Name of target variable column
+    handle_unknown : str
+        'mode' encodes categories unseen in fit as the training mode,
+        'error' raises ValueError
+    """
+    
+    def __init__(self, strategy='median', target_col='Attrition', handle_unknown='mode'):
+        self.strategy = strategy
+        self.target_col = target_col
+        self.handle_unknown = handle_unknown
+    
+    @instrumented('PreprocessingPipeline.fit')
+    def fit(self, df):
+        """
+        Learn fill values and category codes from a dataframe.
+        
+        Parameters:
+        -----------
+        df : pd.DataFrame
+            Training dataframe
+        
+        Returns:
+        --------
+        PreprocessingPipeline
+            The fitted pipeline
+        """
+        self.numeric_fill_ = {}
+        self.categorical_fill_ = {}
+        self.categories_ = {}
+        self.target_classes_ = None
+        
+        for col in df.columns:
+            if col == 'EmployeeID':
+                continue
+            values = _survey_numeric(df, col)
+            
+            if col == self.target_col:
+                self.target_classes_ = np.unique(values.to_numpy())
+            elif _is_categorical(values):
+                fill = _most_frequent(values)
+                self.categorical_fill_[col] = fill
+                classes = values.dropna().astype(str).unique()
+                if values.isna().any():
+                    classes = np.append(classes, str(fill))
+                self.categories_[col] = np.unique(classes.astype(str))
+            elif pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+                self.numeric_fill_[col] = self._numeric_fill_value(values)
+        
+        self.columns_ = list(df.columns)
+        return self
+    
+    def _numeric_fill_value(self, values):
+        values = values.to_numpy(dtype=np.float64)
+        if self.strategy == 'mean':
+            return np.nanmean(values)
+        if self.strategy == 'median':
+            return np.nanmedian(values)
+        if self.strategy == 'most_frequent':
+            return _most_frequent(pd.Series(values))
+        if self.strategy == 'constant':
+            return 0.0
+        raise ValueError(f"Unknown imputation strategy: {self.strategy!r}")
+    
+    @instrumented('PreprocessingPipeline.transform')
+    def transform(self, df, inplace=False):
+        """
+        Impute, derive features and encode a dataframe with the fitted state.
+        
+        Parameters:
+        -----------
+        df : pd.DataFrame
+            Dataframe with the columns seen in fit
+        inplace : bool
+            Replace the columns of df itself instead of building a new frame
+        
+        Returns:
+        --------
+        pd.DataFrame
+            Imputed, feature-enriched and encoded dataframe
+        """
+        columns = df if inplace else {}
+        for col in list(df.columns):
+            if col in self.numeric_fill_:
+                values = _survey_numeric(df, col).to_numpy(dtype=np.float64, na_value=np.nan)
+                columns[col] = np.where(np.isnan(values), self.numeric_fill_[col], values)
+            elif col in self.categories_:
+                columns[col] = self._encode(df[col], col)
+            elif col == self.target_col and self.target_classes_ is not None:
+                columns[col] = np.searchsorted(self.target_classes_, df[col].to_numpy()).astype(np.int64)
+            elif not inplace:
+                columns[col] = df[col].to_numpy()
+        
+        for name, values in _derived_features(columns).items():
+            columns[name] = values
+        
+        if inplace:
+            return df
+        return pd.DataFrame(columns, index=df.index, copy=False)
+    
+    def fit_transform(self, df, inplace=False):
+        """
+        Fit the pipeline on a dataframe and transform it.
+        
+        Parameters:
+        -----------
+        df : pd.DataFrame
+            Training dataframe
+        inplace : bool
+            Replace the columns of df itself instead of building a new frame
+        
+        Returns:
+        --------
+        pd.DataFrame
+            Imputed, feature-enriched and encoded dataframe
+        """
+        return self.fit(df).transform(df, inplace=inplace)
+    
+    def _encode(self, values, col):
+        """
+        Map a text column to the integer codes LabelEncoder would assign.
+        
+        Missing values get the code of the training mode; unseen categories
+        too, unless handle_unknown='error'.
+        """
+        classes = self.categories_[col]
+        fill_code = np.searchsorted(classes, str(self.categorical_fill_[col]))
+        
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            # Translate the category codes once instead of every row
+            category_codes = self._lookup_codes(classes, values.cat.categories.astype(str).to_numpy(), col, fill_code)
+            codes = values.cat.codes.to_numpy()
+            encoded = np.where(codes >= 0, category_codes[codes], fill_code)
+        else:
+            present = values.notna().to_numpy()
+            encoded = np.full(len(values), fill_code, dtype=np.int64)
+            encoded[present] = self._lookup_codes(classes, values[present].astype(str).to_numpy(), col, fill_code)
+        return encoded.astype(np.int64)
+    
+    def _lookup_codes(self, classes, labels, col, fill_code):
+        positions = np.minimum(np.searchsorted(classes, labels), len(classes) - 1)
+        unseen = classes[positions] != labels
+        if unseen.any():
+            if self.handle_unknown == 'error':
+                raise ValueError(f"{col}: unseen categories {sorted(set(labels[unseen]))[:5]}")
+            positions[unseen] = fill_code
+        return positions
+    
+    def set_model_inputs(self, feature_columns, scaler=None):
+        """
+        Record the model feature columns and the fitted scaler, so that
+        transform_features reproduces the training inputs.
+        
+        Parameters:
+        -----------
+        feature_columns : list
+            Columns of X as returned by prepare_features_for_modeling
+        scaler : StandardScaler, optional
+            Scaler fitted by scale_features
+        
+        Returns:
+        --------
+        PreprocessingPipeline
+            The pipeline
+        """
+        self.feature_columns_ = list(feature_columns)
+        if scaler is not None:
+            self.scale_mean_ = np.asarray(scaler.mean_, dtype=np.float64)
+            self.scale_ = np.asarray(scaler.scale_, dtype=np.float64)
+        return self
+    
+    def transform_features(self, df, scaled=False):
+        """
+        Turn raw merged data into the model feature matrix without refitting.
+        
+        Parameters:
+        -----------
+        df : pd.DataFrame
+            Merged data for the employees to score (target column optional)
+        scaled : bool
+            Apply the recorded StandardScaler statistics
+        
+        Returns:
+        --------
+        np.ndarray
+            Feature matrix with columns in feature_columns_ order
+        """
+        encoded = self.transform(df)
+        missing = [col for col in self.feature_columns_ if col not in encoded.columns]
+        if missing:
+            raise ValueError(f"Missing feature columns: {missing}")
+        
+        X = np.column_stack([np.asarray(encoded[col], dtype=np.float64) for col in self.feature_columns_])
+        if scaled:
+            if getattr(self, 'scale_', None) is None:
+                raise ValueError("No scaler recorded; call set_model_inputs with a scaler first")
+            X -= self.scale_mean_
+            X /= self.scale_
+        return X
+    
+    def save(self, path):
+        """
+        Save the fitted state as JSON.
+        
+        Parameters:
+        -----------
+        path : str
+            Destination file
+        """
+        state = {
+            'strategy': self.strategy,
+            'target_col': self.target_col,
+            'handle_unknown': self.handle_unknown,
+            'columns': self.columns_,
+            'numeric_fill': {col: float(value) for col, value in self.numeric_fill_.items()},
+            'categorical_fill': {col: str(value) for col, value in self.categorical_fill_.items()},
+            'categories': {col: classes.tolist() for col, classes in self.categories_.items()},
+            'target_classes': None if self.target_classes_ is None else self.target_classes_.tolist(),
+            'feature_columns': getattr(self, 'feature_columns_', None),
+            'scale_mean': None if getattr(self, 'scale_', None) is None else self.scale_mean_.tolist(),
+            'scale': None if getattr(self, 'scale_', None) is None else self.scale_.tolist()
+        }
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(state, f)
+    
+    @classmethod
+    def load(cls, path):
+        """
+        Load a pipeline saved with save.
+        
+        Parameters:
+        -----------
+        path : str
+            Path to the saved JSON state
+        
+        Returns:
+        --------
+        PreprocessingPipeline
+            Fitted pipeline, ready for transform/transform_features
+        """
+        with open(path) as f:
+            state = json.load(f)
+        
+        pipeline = cls(strategy=state['strategy'], target_col=state['target_col'],
+                       handle_unknown=state['handle_unknown'])
+        pipeline.columns_ = state['columns']
+        pipeline.numeric_fill_ = state['numeric_fill']
+        pipeline.categorical_fill_ = state['categorical_fill']
+        pipeline.categories_ = {col: np.array(classes, dtype=object)
+                                for col, classes in state['categories'].items()}
+        pipeline.target_classes_ = (None if state['target_classes'] is None
+                                    else np.array(state['target_classes'], dtype=object))
+        if state['feature_columns'] is not None:
+            pipeline.feature_columns_ = state['feature_columns']
+        if state['scale'] is not None:
+            pipeline.scale_mean_ = np.array(state['scale_mean'])
+            pipeline.scale_ = np.array(state['scale'])
+        return pipeline
+    
+    @property
+    def encoders(self):
+        """
+        Fitted LabelEncoders per column, as returned by encode_categorical_variables.
+        """
+        from sklearn.preprocessing import LabelEncoder
+        
+        encoders = {}
+        for col, classes in self.categories_.items():
+            encoders[col] = LabelEncoder()
+            encoders[col].classes_ = classes
+        if self.target_classes_ is not None:
+            encoders[self.target_col] = LabelEncoder()
+            encoders[self.target_col].classes_ = self.target_classes_
+        return encoders
+
+
+def _survey_numeric(df, col):
+    """
+    Return a column, converting 'NA' survey strings to numeric as handle_missing_values does.
+    """
+    values = df[col]
+    if col in SURVEY_COLUMNS and values.dtype == object:
+        values = pd.to_numeric(values.replace('NA', np.nan), errors='coerce')
+    return values
+
+
+def _is_categorical(values):
+    return values.dtype == object or isinstance(values.dtype, pd.CategoricalDtype)
+
+
+def _most_frequent(values):
+    """
+    Most frequent non-null value; ties go to the smallest value, as in SimpleImputer.
+    """
+    counts = values.dropna().value_counts()
+    if counts.empty:
+        return np.nan
+    return min(counts.index[counts == counts.max()])
 
 
 def prepare_features_for_modeling(df, target_col='Attrition', drop_cols=None):
@@ -156,7 +501,7 @@ def prepare_features_for_modeling(df, target_col='Attrition', drop_cols=None):
         Name of target variable
     drop_cols : list, optional
         Columns to drop (e.g., EmployeeID, EmployeeCount, Over18)
-        
+    
     Returns:
     --------
     pd.DataFrame, pd.Series
@@ -188,12 +533,14 @@ def scale_features(X_train, X_test=None):
         Training features
     X_test : pd.DataFrame, optional
         Test features
-        
+    
     Returns:
     --------
     np.ndarray, np.ndarray, StandardScaler
         Scaled training features, scaled test features (if provided), and scaler
     """
+    from sklearn.preprocessing import StandardScaler
+    
     scaler = StandardScaler()
     X_train_scaled = scaler.fit_transform(X_train)
     
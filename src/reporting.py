@@ -0,0 +1,223 @@
+"""
+Batch rendering of the model evaluation figures to files with an HTML index.
+
+Figures are drawn on plain matplotlib Figure objects (no pyplot state, no
+display), so a report can be rendered from scripts, servers and forked
+worker processes. Long ROC/PR curves are downsampled before drawing, see
+model_evaluation.downsample_curve.
+"""
+
+import os
+import html
+import time
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from matplotlib.figure import Figure
+
+from model_evaluation import (
+    CURVE_COLUMNS, plot_confusion_matrix, plot_roc_curve, plot_precision_recall_curve,
+    plot_threshold_analysis, compare_models
+)
+from training import SharedArrays, attach_shared_arrays, thread_budget
+
+
+# Figures rendered for every model, in index order
+MODEL_FIGURES = ['confusion_matrix', 'roc_curve', 'precision_recall_curve', 'threshold_analysis']
+
+_FIGURE_TITLES = {
+    'confusion_matrix': 'Confusion matrix',
+    'roc_curve': 'ROC curve',
+    'precision_recall_curve': 'Precision-Recall curve',
+    'threshold_analysis': 'Threshold analysis',
+    'comparison': 'Model comparison'
+}
+
+
+def _file_stem(text):
+    return ''.join(c.lower() if c.isalnum() else '_' for c in text).strip('_')
+
+
+def _draw(kind, model_name, arrays, options):
+    """
+    Draw one figure headlessly and return it.
+    """
+    if kind == 'comparison':
+        results_df = options['results_df']
+        n_metrics = sum(metric in results_df.columns
+                        for metric in ['Accuracy', 'Precision', 'Recall', 'F1-Score', 'ROC-AUC'])
+        return compare_models(results_df, fig=Figure(figsize=(5 * n_metrics, 5)))
+    
+    fig = Figure(figsize=(8, 6))
+    ax = fig.subplots()
+    y_true = arrays['y_true']
+    y_pred, y_score = arrays[f'{model_name}/y_pred'], arrays.get(f'{model_name}/y_score')
+    if kind == 'confusion_matrix':
+        plot_confusion_matrix(y_true, y_pred, model_name=model_name, ax=ax)
+    elif kind == 'roc_curve':
+        plot_roc_curve(y_true, y_score, model_name=model_name, ax=ax, n_columns=options['n_columns'])
+    elif kind == 'precision_recall_curve':
+        plot_precision_recall_curve(y_true, y_score, model_name=model_name, ax=ax,
+                                    n_columns=options['n_columns'])
+    elif kind == 'threshold_analysis':
+        plot_threshold_analysis(y_true, y_score, model_name=model_name, cost_fn=options['cost_fn'],
+                                cost_fp=options['cost_fp'], max_alerts=options['max_alerts'], ax=ax,
+                                n_columns=options['n_columns'])
+    fig.tight_layout()
+    return fig
+
+
+def _render(kind, model_name, arrays, output_dir, options):
+    start = time.perf_counter()
+    fig = _draw(kind, model_name, arrays, options)
+    stem = f'{_file_stem(model_name)}-{kind}' if model_name else kind
+    files = []
+    for fmt in options['formats']:
+        path = os.path.join(output_dir, f'{stem}.{fmt}')
+        fig.savefig(path, format=fmt, dpi=options['dpi'])
+        files.append(os.path.basename(path))
+    return {'kind': kind, 'model': model_name, 'files': files, 'seconds': time.perf_counter() - start}
+
+
+_WORKER_ARRAYS = {}
+
+
+def _render_worker(kind, model_name, spec, output_dir, options):
+    key = tuple(block_name for block_name, _, _ in spec.values())
+    if key not in _WORKER_ARRAYS:
+        _WORKER_ARRAYS.clear()
+        _WORKER_ARRAYS[key] = attach_shared_arrays(spec)
+    arrays, _ = _WORKER_ARRAYS[key]
+    return _render(kind, model_name, arrays, output_dir, options)
+
+
+def write_index(output_dir, figures, results_df=None, title='Employee Turnover Model Report'):
+    """
+    Write index.html linking the rendered figures, grouped by model.
+    
+    Parameters:
+    -----------
+    output_dir : str
+        Report directory (figure paths are relative to it)
+    figures : list of dict
+        Results of the rendered figures (kind, model, files)
+    results_df : pd.DataFrame, optional
+        Metrics table shown at the top
+    title : str
+        Page title
+    
+    Returns:
+    --------
+    str
+        Path of the index
+    """
+    def image(figure):
+        # Browsers show PNG fastest; fall back to whatever format was rendered
+        files = figure['files']
+        source = next((name for name in files if name.endswith('.png')), files[0])
+        links = ' '.join(f'<a href="{html.escape(name)}">{html.escape(name.rsplit(".", 1)[1])}</a>'
+                         for name in files)
+        caption = html.escape(_FIGURE_TITLES.get(figure['kind'], figure['kind']))
+        return (f'<figure><a href="{html.escape(source)}"><img src="{html.escape(source)}" alt="{caption}"></a>'
+                f'<figcaption>{caption} ({links})</figcaption></figure>')
+    
+    parts = [
+        '<!DOCTYPE html>', '<html><head><meta charset="utf-8">', f'<title>{html.escape(title)}</title>',
+        '<style>body{font-family:sans-serif;margin:2em}img{width:480px}'
+        'figure{display:inline-block;margin:0 1em 1em 0}table{border-collapse:collapse}'
+        'td,th{padding:0.2em 0.6em;border:1px solid #ccc;text-align:right}</style>',
+        '</head><body>', f'<h1>{html.escape(title)}</h1>'
+    ]
+    if results_df is not None:
+        parts.append(results_df.to_html(index=False, float_format=lambda value: f'{value:.4f}'))
+    
+    shared = [figure for figure in figures if not figure['model'] and 'files' in figure]
+    for figure in shared:
+        parts.append(image(figure))
+    
+    models = list(dict.fromkeys(figure['model'] for figure in figures if figure['model']))
+    for model_name in models:
+        parts.append(f'<h2 id="{_file_stem(model_name)}">{html.escape(model_name)}</h2>')
+        for figure in figures:
+            if figure['model'] == model_name and 'files' in figure:
+                parts.append(image(figure))
+    parts.append('</body></html>')
+    
+    path = os.path.join(output_dir, 'index.html')
+    with open(path, 'w') as f:
+        f.write('\n'.join(parts))
+    return path
+
+
+def render_report(y_true, predictions, results_df=None, output_dir='reports/figures', formats=('png', 'svg'),
+                  n_workers=None, n_columns=CURVE_COLUMNS, dpi=100, cost_fn=1.0, cost_fp=1.0, max_alerts=None):
+    """
+    Render every per-model evaluation figure to files and write an HTML index.
+    
+    Figures are rendered in parallel on a forked process pool, with the
+    labels and scores passed through shared memory; with one worker or
+    without fork they are rendered in this process.
+    
+    Parameters:
+    -----------
+    y_true : array-like
+        True labels
+    predictions : dict
+        Model name to (y_pred, y_score); models without scores only get a
+        confusion matrix
+    results_df : pd.DataFrame, optional
+        Metrics table, drawn as the comparison figure and shown in the index
+    output_dir : str
+        Directory receiving the figures and index.html
+    formats : tuple of str
+        File formats to save (e.g. 'png', 'svg', 'pdf')
+    n_workers : int, optional
+        Worker processes (default: one per core)
+    n_columns : int
+        Curves are downsampled to at most 4 points per column
+    dpi : int
+        Resolution of raster formats
+    cost_fn, cost_fp, max_alerts :
+        Cost matrix and capacity of the threshold analysis (see select_threshold)
+    
+    Returns:
+    --------
+    str, list of dict
+        Path of index.html and one result per figure (kind, model, files,
+        seconds, or error)
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    options = {'formats': tuple(formats), 'n_columns': n_columns, 'dpi': dpi, 'results_df': results_df,
+               'cost_fn': cost_fn, 'cost_fp': cost_fp, 'max_alerts': max_alerts}
+    
+    arrays = {'y_true': np.asarray(y_true).ravel()}
+    jobs = [('comparison', '')] if results_df is not None else []
+    for model_name, (y_pred, y_score) in predictions.items():
+        arrays[f'{model_name}/y_pred'] = np.asarray(y_pred).ravel()
+        kinds = MODEL_FIGURES[:1]
+        if y_score is not None:
+            arrays[f'{model_name}/y_score'] = np.asarray(y_score, dtype=np.float64).ravel()
+            kinds = MODEL_FIGURES
+        jobs.extend((kind, model_name) for kind in kinds)
+    
+    n_workers, _ = thread_budget(len(jobs), n_workers)
+    figures = []
+    if n_workers == 1 or 'fork' not in mp.get_all_start_methods():
+        for kind, model_name in jobs:
+            try:
+                figures.append(_render(kind, model_name, arrays, output_dir, options))
+            except Exception as e:
+                figures.append({'kind': kind, 'model': model_name, 'error': e})
+    else:
+        with SharedArrays(arrays) as shared:
+            with ProcessPoolExecutor(max_workers=n_workers, mp_context=mp.get_context('fork')) as executor:
+                futures = [executor.submit(_render_worker, kind, model_name, shared.spec, output_dir, options)
+                           for kind, model_name in jobs]
+                for (kind, model_name), future in zip(jobs, futures):
+                    try:
+                        figures.append(future.result())
+                    except Exception as e:
+                        figures.append({'kind': kind, 'model': model_name, 'error': e})
+    
+    return write_index(output_dir, figures, results_df), figures
@@ -0,0 +1,232 @@
+"""
+Content-addressed on-disk cache for the stages of the analysis pipeline.
+
+Each stage result is stored under a hash of the stage name, its
+parameters, the content of its input files, the source of the modules it
+runs and the keys of the stages it depends on. A stage whose key is
+already on disk is read back instead of recomputed, and because keys are
+chained, an unchanged stage never needs its parents to be computed.
+"""
+
+import os
+import json
+import time
+import pickle
+import hashlib
+from pathlib import Path
+
+
+# Pipeline stages in execution order, used by from_stage
+STAGES = ['load', 'merge', 'preprocess', 'split', 'fit']
+
+
+def _stage_kind(name):
+    # 'fit:XGBoost' belongs to the 'fit' stage
+    return name.split(':', 1)[0]
+
+
+def _file_sha256(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class Stage:
+    """
+    A lazily computed pipeline stage; see StageCache.stage.
+    """
+    
+    def __init__(self, cache, name, key, compute):
+        self.cache = cache
+        self.name = name
+        self.key = key
+        self._compute = compute
+        self._done = False
+        self._value = None
+    
+    @property
+    def value(self):
+        if not self._done:
+            self._value = self.cache.get_or_compute(self.name, self.key, self._compute)
+            self._done = True
+        return self._value
+
+
+class StageCache:
+    """
+    Stage results cached on disk under a hash of everything they depend on.
+    
+    Parameters:
+    -----------
+    cache_dir : str
+        Directory holding the cached results
+    from_stage : str, optional
+        Recompute this stage and every later one (see STAGES) even if cached
+    force : bool
+        Recompute every stage
+    enabled : bool
+        When False nothing is read or written and every stage is computed
+    """
+    
+    def __init__(self, cache_dir='data/.stage_cache', from_stage=None, force=False, enabled=True):
+        if from_stage is not None and from_stage not in STAGES:
+            raise ValueError(f"Unknown stage: {from_stage} (expected one of {', '.join(STAGES)})")
+        self.cache_dir = Path(cache_dir)
+        self.from_stage = from_stage
+        self.force = force
+        self.enabled = enabled
+        self.records = []
+        self._digests_path = self.cache_dir / 'file_digests.json'
+        self._digests = None
+    
+    def _file_fingerprint(self, path):
+        """
+        Content hash of an input file, remembered by size and mtime so unchanged files are not re-read.
+        """
+        if self._digests is None:
+            try:
+                with open(self._digests_path) as f:
+                    self._digests = json.load(f)
+            except (OSError, ValueError):
+                self._digests = {}
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        known = self._digests.get(path)
+        if known and known['size'] == stat.st_size and known['mtime_ns'] == stat.st_mtime_ns:
+            return known['sha256']
+        digest = _file_sha256(path)
+        self._digests[path] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': digest}
+        if self.enabled:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp_path = self._digests_path.with_suffix('.tmp')
+            with open(tmp_path, 'w') as f:
+                json.dump(self._digests, f, indent=2)
+            os.replace(tmp_path, self._digests_path)
+        return digest
+    
+    def key(self, name, params=None, parents=(), files=(), code=()):
+        """
+        Hash identifying one stage result.
+        
+        Parameters:
+        -----------
+        name : str
+            Stage name ('load', 'fit:XGBoost', ...)
+        params : dict, optional
+            JSON-serializable parameters (other values are hashed by repr)
+        parents : iterable
+            Stages (or their keys) this stage reads
+        files : iterable
+            Input files, hashed by content
+        code : iterable
+            Modules whose source the stage runs
+        
+        Returns:
+        --------
+        str
+        """
+        payload = {
+            'stage': name,
+            'params': params or {},
+            'parents': [parent.key if isinstance(parent, Stage) else parent for parent in parents],
+            'files': [self._file_fingerprint(path) for path in files],
+            'code': [_file_sha256(module.__file__) for module in code]
+        }
+        blob = json.dumps(payload, sort_keys=True, default=repr).encode()
+        return hashlib.sha256(blob).hexdigest()[:32]
+    
+    def stage(self, name, compute, params=None, parents=(), files=(), code=()):
+        """
+        Declare a stage; it is read from the cache or computed when its value is first used.
+        
+        Parameters:
+        -----------
+        name : str
+            Stage name
+        compute : callable
+            Function without arguments producing the stage result
+        params, parents, files, code
+            Everything the result depends on, see key
+        
+        Returns:
+        --------
+        Stage
+        """
+        return Stage(self, name, self.key(name, params, parents, files, code), compute)
+    
+    def _path(self, name, key):
+        return self.cache_dir / name.replace(':', '_').replace(' ', '_') / f'{key}.pkl'
+    
+    def _forced(self, name):
+        if self.force:
+            return True
+        if self.from_stage is None:
+            return False
+        return STAGES.index(_stage_kind(name)) >= STAGES.index(self.from_stage)
+    
+    def is_cached(self, stage):
+        """
+        Whether a stage would be read from the cache rather than computed.
+        """
+        return (self.enabled and not self._forced(stage.name)
+                and self._path(stage.name, stage.key).exists())
+    
+    def lookup(self, name, key):
+        """
+        Read a cached result.
+        
+        Returns:
+        --------
+        bool, object
+            Whether the result was found, and the result
+        """
+        path = self._path(name, key)
+        if not self.enabled or self._forced(name) or not path.exists():
+            return False, None
+        start = time.perf_counter()
+        try:
+            with open(path, 'rb') as f:
+                value = pickle.load(f)
+        except Exception:
+            return False, None
+        self.records.append({'stage': name, 'status': 'hit', 'seconds': time.perf_counter() - start})
+        return True, value
+    
+    def store(self, name, key, value, seconds=None):
+        """
+        Write a computed result to the cache.
+        """
+        status = 'forced' if self.enabled and self._forced(name) else 'miss'
+        self.records.append({'stage': name, 'status': status, 'seconds': seconds})
+        if not self.enabled:
+            return
+        path = self._path(name, key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix('.tmp')
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    
+    def get_or_compute(self, name, key, compute):
+        """
+        Read a stage result from the cache, or compute and store it.
+        """
+        hit, value = self.lookup(name, key)
+        if hit:
+            return value
+        start = time.perf_counter()
+        value = compute()
+        self.store(name, key, value, seconds=time.perf_counter() - start)
+        return value
+    
+    def print_summary(self):
+        """
+        Print which stages were read from the cache and which were computed.
+        """
+        hits = sum(record['status'] == 'hit' for record in self.records)
+        print(f"\nStage cache: {hits}/{len(self.records)} hits ({self.cache_dir})")
+        for record in self.records:
+            seconds = f"{record['seconds']:.2f}s" if record['seconds'] is not None else ''
+            print(f"  {record['stage']:<28} {record['status']:<7} {seconds}")
@@ -0,0 +1,509 @@
+"""
+Model training utilities for employee turnover analysis.
+"""
+
+import os
+import time
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+
+import numpy as np
+
+
+# Environment variables read by the OpenMP/BLAS runtimes when they start
+THREAD_ENV_VARS = ['OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS']
+
+# Estimator parameters that control the number of threads
+THREAD_PARAMS = ['n_jobs', 'nthread', 'num_threads', 'thread_count']
+
+
+def build_model_zoo(random_state=42):
+    """
+    Build the untrained models compared in run_analysis.py.
+    
+    Parameters:
+    -----------
+    random_state : int
+        Random seed for the models that use one
+    
+    Returns:
+    --------
+    dict
+        Model name to (estimator, use_scaled) where use_scaled tells whether
+        the model is trained on standardized features
+    """
+    from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.svm import SVC
+    from sklearn.neighbors import KNeighborsClassifier
+    import xgboost as xgb
+    import lightgbm as lgb
+    
+    return {
+        'Logistic Regression': (LogisticRegression(random_state=random_state, max_iter=1000), True),
+        'Random Forest': (RandomForestClassifier(n_estimators=100, random_state=random_state, n_jobs=-1), False),
+        'Gradient Boosting': (GradientBoostingClassifier(random_state=random_state), False),
+        'XGBoost': (xgb.XGBClassifier(random_state=random_state, eval_metric='logloss'), False),
+        'LightGBM': (lgb.LGBMClassifier(random_state=random_state, verbose=-1), False),
+        'SVM': (SVC(probability=True, random_state=random_state), True),
+        'KNN': (KNeighborsClassifier(n_neighbors=5), True)
+    }
+
+
+def model_fit_params(estimator, use_scaled):
+    """
+    Everything that determines a fitted model besides its training data, for cache keys.
+    
+    Parameters:
+    -----------
+    estimator : estimator
+        Unfitted model
+    use_scaled : bool
+        Whether it is trained on standardized features
+    
+    Returns:
+    --------
+    dict
+        Estimator class, library version, parameters (thread counts
+        excluded, they do not change the result) and use_scaled
+    """
+    import sys
+    
+    module = type(estimator).__module__
+    library = sys.modules.get(module.split('.')[0])
+    params = {name: value for name, value in estimator.get_params().items() if name not in THREAD_PARAMS}
+    return {
+        'estimator': f'{module}.{type(estimator).__name__}',
+        'version': getattr(library, '__version__', None),
+        'params': params,
+        'use_scaled': use_scaled
+    }
+
+
+class SharedArrays:
+    """
+    NumPy arrays placed in shared memory so worker processes can read them without pickling.
+    
+    Use as a context manager; the blocks are released on exit. ``spec`` is
+    the small, picklable description workers pass to attach_shared_arrays.
+    
+    Parameters:
+    -----------
+    arrays : dict
+        Name to array-like
+    """
+    
+    def __init__(self, arrays):
+        self._blocks = []
+        self.spec = {}
+        for name, values in arrays.items():
+            values = np.ascontiguousarray(values)
+            block = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+            np.ndarray(values.shape, dtype=values.dtype, buffer=block.buf)[...] = values
+            self._blocks.append(block)
+            self.spec[name] = (block.name, values.shape, values.dtype.str)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+    
+    def close(self):
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+        self._blocks = []
+
+
+def attach_shared_arrays(spec):
+    """
+    Attach to arrays created by SharedArrays.
+    
+    Parameters:
+    -----------
+    spec : dict
+        SharedArrays.spec
+    
+    Returns:
+    --------
+    dict, list
+        Read-only array views by name, and the shared memory handles that
+        must stay referenced while the views are used
+    """
+    arrays = {}
+    blocks = []
+    for name, (block_name, shape, dtype) in spec.items():
+        block = shared_memory.SharedMemory(name=block_name)
+        view = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+        view.flags.writeable = False
+        arrays[name] = view
+        blocks.append(block)
+    return arrays, blocks
+
+
+def thread_budget(n_models, n_workers=None, total_threads=None):
+    """
+    Split the available cores between concurrently trained models.
+    
+    Parameters:
+    -----------
+    n_models : int
+        Number of models to train
+    n_workers : int, optional
+        Number of worker processes (defaults to one per model, capped at the core count)
+    total_threads : int, optional
+        Cores to use (defaults to the cores available to this process)
+    
+    Returns:
+    --------
+    int, int
+        Number of workers and threads per model
+    """
+    if total_threads is None:
+        total_threads = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else os.cpu_count()
+    total_threads = max(int(total_threads or 1), 1)
+    if n_workers is None:
+        n_workers = min(n_models, total_threads)
+    n_workers = max(min(int(n_workers), n_models), 1)
+    return n_workers, max(total_threads // n_workers, 1)
+
+
+def limit_model_threads(estimator, threads):
+    """
+    Set the thread-count parameters an estimator exposes (n_jobs, nthread, ...), in place.
+    """
+    params = estimator.get_params()
+    estimator.set_params(**{param: threads for param in THREAD_PARAMS if param in params})
+    return estimator
+
+
+def _init_worker(threads):
+    for var in THREAD_ENV_VARS:
+        os.environ[var] = str(threads)
+
+
+def early_stopping_fit_params(estimator, X_valid, y_valid, rounds):
+    """
+    Fit arguments for the native early stopping of XGBoost and LightGBM.
+    
+    XGBoost takes the patience as an estimator parameter, which is set in
+    place. Other estimators get no extra arguments.
+    
+    Parameters:
+    -----------
+    estimator : estimator
+        Unfitted model
+    X_valid, y_valid : array-like
+        Validation set monitored for early stopping
+    rounds : int
+        Boosting rounds without improvement before stopping
+    
+    Returns:
+    --------
+    dict
+        Keyword arguments for estimator.fit
+    """
+    module = type(estimator).__module__
+    if module.startswith('xgboost'):
+        estimator.set_params(early_stopping_rounds=rounds)
+        return {'eval_set': [(X_valid, y_valid)], 'verbose': False}
+    if module.startswith('lightgbm'):
+        import lightgbm as lgb
+        return {'eval_set': [(X_valid, y_valid)],
+                'callbacks': [lgb.early_stopping(rounds, verbose=False)]}
+    return {}
+
+
+def _best_iteration(estimator):
+    """
+    Number of trees kept by early stopping, or None when the model did not stop early.
+    
+    LightGBM's best_iteration_ is already a tree count (0 when unset);
+    XGBoost's best_iteration is the 0-based index of the best round.
+    """
+    module = type(estimator).__module__
+    try:
+        if module.startswith('lightgbm'):
+            trees = estimator.best_iteration_
+            return int(trees) if trees else None
+        if module.startswith('xgboost'):
+            best = estimator.best_iteration
+            return int(best) + 1 if best is not None else None
+    except AttributeError:
+        pass
+    return None
+
+
+def _fit_and_predict(estimator, use_scaled, arrays, threads, prefix='', early_stopping_rounds=None):
+    """
+    Fit one model and predict the test set under a thread limit.
+    
+    The matrices are looked up in ``arrays`` as ``{prefix}X_train_scaled``,
+    ``{prefix}y_train`` and so on. With early_stopping_rounds, boosters stop
+    on ``{prefix}X_valid_*`` / ``{prefix}y_valid``, never on the test set
+    they are scored on.
+    """
+    from threadpoolctl import threadpool_limits
+    
+    kind = 'scaled' if use_scaled else 'unscaled'
+    limit_model_threads(estimator, threads)
+    fit_params = {}
+    if early_stopping_rounds:
+        if f'{prefix}y_valid' not in arrays:
+            raise ValueError("Early stopping needs a validation set (prepare_cv_folds with validation_size)")
+        fit_params = early_stopping_fit_params(estimator, arrays[f'{prefix}X_valid_{kind}'],
+                                               arrays[f'{prefix}y_valid'], early_stopping_rounds)
+    
+    start, cpu_start = time.perf_counter(), time.process_time()
+    with threadpool_limits(limits=threads):
+        estimator.fit(arrays[f'{prefix}X_train_{kind}'], arrays[f'{prefix}y_train'], **fit_params)
+        fit_seconds = time.perf_counter() - start
+        y_pred = estimator.predict(arrays[f'{prefix}X_test_{kind}'])
+        y_pred_proba = estimator.predict_proba(arrays[f'{prefix}X_test_{kind}'])[:, 1]
+    
+    return {
+        'model': estimator,
+        'y_pred': y_pred,
+        'y_pred_proba': y_pred_proba,
+        'fit_seconds': fit_seconds,
+        'wall_seconds': time.perf_counter() - start,
+        'cpu_seconds': time.process_time() - cpu_start,
+        'threads': threads,
+        'best_iteration': _best_iteration(estimator) if early_stopping_rounds else None
+    }
+
+
+# Shared arrays attached by this worker process, kept mapped for its lifetime
+# because fitted models (e.g. KNN) can hold views into them until pickled back
+_WORKER_ARRAYS = {}
+
+
+def _train_worker(estimator, use_scaled, spec, threads, prefix, early_stopping_rounds):
+    key = tuple(block_name for block_name, _, _ in spec.values())
+    if key not in _WORKER_ARRAYS:
+        _WORKER_ARRAYS.clear()
+        _WORKER_ARRAYS[key] = attach_shared_arrays(spec)
+    arrays, _ = _WORKER_ARRAYS[key]
+    return _fit_and_predict(estimator, use_scaled, arrays, threads, prefix, early_stopping_rounds)
+
+
+def _run_training_tasks(tasks, arrays, n_workers=None, total_threads=None, on_result=None, deadline=None):
+    """
+    Run (key, estimator, use_scaled, prefix, early_stopping_rounds) fit/predict tasks, on a forked pool when possible.
+    
+    ``on_result(key, result)`` is called as each task finishes. Tasks not
+    started by ``deadline`` (a time.perf_counter value) are skipped.
+    
+    Returns a dict from task key to result (or {'error': exception}) in task
+    order, for the tasks that ran.
+    """
+    n_workers, threads = thread_budget(len(tasks), n_workers, total_threads)
+    
+    def finish(key, result):
+        results[key] = result
+        if on_result is not None:
+            on_result(key, result)
+    
+    results = {}
+    if n_workers == 1 or 'fork' not in mp.get_all_start_methods():
+        for key, estimator, use_scaled, prefix, rounds in tasks:
+            if deadline is not None and time.perf_counter() > deadline:
+                break
+            try:
+                result = _fit_and_predict(estimator, use_scaled, arrays, threads, prefix, rounds)
+            except Exception as e:
+                result = {'error': e}
+            finish(key, result)
+        return results
+    
+    # Fork keeps worker start-up cheap and does not re-run the calling script
+    with SharedArrays(arrays) as shared:
+        with ProcessPoolExecutor(max_workers=n_workers, mp_context=mp.get_context('fork'),
+                                 initializer=_init_worker, initargs=(threads,)) as executor:
+            futures = {
+                executor.submit(_train_worker, estimator, use_scaled, shared.spec, threads, prefix, rounds): key
+                for key, estimator, use_scaled, prefix, rounds in tasks
+            }
+            for future in as_completed(futures):
+                if future.cancelled():
+                    continue
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = {'error': e}
+                finish(futures[future], result)
+                if deadline is not None and time.perf_counter() > deadline:
+                    for pending in futures:
+                        pending.cancel()
+    
+    return {key: results[key] for key, _, _, _, _ in tasks if key in results}
+
+
+def train_models(models, X_train_scaled, X_train_unscaled, y_train, X_test_scaled, X_test_unscaled,
+                 n_workers=None, total_threads=None):
+    """
+    Train a set of models concurrently on a process pool.
+    
+    The training and test matrices are placed once in shared memory and
+    attached by every worker instead of being pickled per task. The cores
+    are split between the workers and each model's own threading (n_jobs,
+    OpenMP, BLAS) is capped at its share, so concurrent models do not
+    oversubscribe the machine. With one worker, or where processes cannot be
+    forked, the models are trained one after another in this process.
+    
+    Parameters:
+    -----------
+    models : dict
+        Model name to (estimator, use_scaled), see build_model_zoo
+    X_train_scaled, X_train_unscaled : array-like
+        Training features, standardized and raw
+    y_train : array-like
+        Training labels
+    X_test_scaled, X_test_unscaled : array-like
+        Test features, standardized and raw
+    n_workers : int, optional
+        Number of worker processes (defaults to one per model, capped at the core count)
+    total_threads : int, optional
+        Cores to use (defaults to the cores available to this process)
+    
+    Returns:
+    --------
+    dict
+        Model name to a dict with the fitted 'model', 'y_pred',
+        'y_pred_proba', 'fit_seconds', 'wall_seconds', 'cpu_seconds' and
+        'threads', or 'error' if training failed; in the order of ``models``
+    """
+    arrays = {
+        'X_train_scaled': np.asarray(X_train_scaled, dtype=np.float64),
+        'X_train_unscaled': np.asarray(X_train_unscaled, dtype=np.float64),
+        'y_train': np.asarray(y_train),
+        'X_test_scaled': np.asarray(X_test_scaled, dtype=np.float64),
+        'X_test_unscaled': np.asarray(X_test_unscaled, dtype=np.float64)
+    }
+    tasks = [(name, estimator, use_scaled, '', None) for name, (estimator, use_scaled) in models.items()]
+    return _run_training_tasks(tasks, arrays, n_workers, total_threads)
+
+
+def prepare_cv_folds(X, y, n_splits=5, random_state=42, resample=True, strategy='smote', validation_size=None):
+    """
+    Build stratified folds with per-fold resampled and scaled matrices.
+    
+    The resampling and the StandardScaler are fitted on each training fold only, as
+    in run_analysis.py's single split, so no information leaks from the
+    held-out fold. The matrices are built once and reused by every model.
+    
+    Parameters:
+    -----------
+    X : pd.DataFrame or np.ndarray
+        Features
+    y : pd.Series or np.ndarray
+        Labels
+    n_splits : int
+        Number of folds
+    random_state : int
+        Seed for the fold assignment and the resampling
+    resample : bool
+        Resample each training fold
+    strategy : str
+        Imbalance strategy applied to each training fold, see imbalance.resample
+    validation_size : float, optional
+        Share of each training fold set aside, before resampling, as
+        ``fold{i}/X_valid_*`` / ``fold{i}/y_valid`` for early stopping; the
+        models are fitted on the rest
+    
+    Returns:
+    --------
+    dict
+        Arrays named ``fold{i}/X_train_scaled``, ``fold{i}/y_test`` and so on
+        for every fold, ready for cross_validate_models
+    """
+    from sklearn.model_selection import StratifiedKFold, train_test_split
+    from sklearn.preprocessing import StandardScaler
+    
+    X = np.asarray(X, dtype=np.float64)
+    y = np.asarray(y)
+    
+    folds = {}
+    splitter = StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=random_state)
+    for fold, (train_idx, test_idx) in enumerate(splitter.split(X, y)):
+        X_train, y_train = X[train_idx], y[train_idx]
+        if validation_size:
+            X_train, X_valid, y_train, y_valid = train_test_split(
+                X_train, y_train, test_size=validation_size, random_state=random_state, stratify=y_train
+            )
+        if resample:
+            from imbalance import resample as resample_fold
+            X_train, y_train = resample_fold(X_train, y_train, strategy, random_state=random_state)
+        
+        scaler = StandardScaler().fit(X_train)
+        prefix = f'fold{fold}/'
+        folds[prefix + 'X_train_unscaled'] = X_train
+        folds[prefix + 'X_train_scaled'] = scaler.transform(X_train)
+        folds[prefix + 'y_train'] = y_train
+        folds[prefix + 'X_test_unscaled'] = X[test_idx]
+        folds[prefix + 'X_test_scaled'] = scaler.transform(X[test_idx])
+        folds[prefix + 'y_test'] = y[test_idx]
+        if validation_size:
+            folds[prefix + 'X_valid_unscaled'] = X_valid
+            folds[prefix + 'X_valid_scaled'] = scaler.transform(X_valid)
+            folds[prefix + 'y_valid'] = y_valid
+    return folds
+
+
+def cross_validate_models(models, folds, evaluate=None, n_workers=None, total_threads=None):
+    """
+    Cross-validate models, running all (model, fold) pairs concurrently.
+    
+    Parameters:
+    -----------
+    models : dict
+        Model name to (estimator, use_scaled), see build_model_zoo
+    folds : dict
+        Output of prepare_cv_folds
+    evaluate : callable, optional
+        Metric function with the signature of model_evaluation.evaluate_model
+        (the default)
+    n_workers : int, optional
+        Number of worker processes (defaults to one per task, capped at the core count)
+    total_threads : int, optional
+        Cores to use (defaults to the cores available to this process)
+    
+    Returns:
+    --------
+    pd.DataFrame, pd.DataFrame
+        Per-fold metrics (one row per model and fold) and their mean and
+        standard deviation per model
+    """
+    import pandas as pd
+    from sklearn.base import clone
+    
+    if evaluate is None:
+        from model_evaluation import evaluate_model as evaluate
+    
+    n_folds = len({key.split('/')[0] for key in folds})
+    tasks = [((name, fold), clone(estimator), use_scaled, f'fold{fold}/', None)
+             for name, (estimator, use_scaled) in models.items()
+             for fold in range(n_folds)]
+    results = _run_training_tasks(tasks, folds, n_workers, total_threads)
+    
+    rows = []
+    for (name, fold), result in results.items():
+        if 'error' in result:
+            print(f"  CV {name} fold {fold}: [ERROR] {result['error']}")
+            continue
+        metrics = evaluate(folds[f'fold{fold}/y_test'], result['y_pred'], result['y_pred_proba'],
+                           model_name=name)
+        metrics['Fold'] = fold
+        metrics['FitSeconds'] = result['fit_seconds']
+        rows.append(metrics)
+    
+    fold_metrics = pd.DataFrame(rows)
+    if fold_metrics.empty:
+        return fold_metrics, fold_metrics
+    summary = (fold_metrics.drop(columns=['Fold'])
+               .groupby('Model', sort=False)
+               .agg(['mean', 'std']))
+    summary.columns = [f'{metric} {stat}' for metric, stat in summary.columns]
+    return fold_metrics, summary.reset_index()
@@ -0,0 +1,262 @@
+"""
+Budgeted hyperparameter search for the tree models of the model zoo.
+"""
+
+import time
+import json
+
+import numpy as np
+import pandas as pd
+
+from training import _run_training_tasks
+
+
+# Model families searched by default
+SEARCH_MODELS = ['XGBoost', 'LightGBM', 'Random Forest']
+
+
+def _log_uniform(rng, low, high):
+    return float(np.exp(rng.uniform(np.log(low), np.log(high))))
+
+
+def sample_params(model_name, rng):
+    """
+    Draw one random configuration for a model family.
+    
+    Parameters:
+    -----------
+    model_name : str
+        'XGBoost', 'LightGBM' or 'Random Forest'
+    rng : np.random.Generator
+        Random generator
+    
+    Returns:
+    --------
+    dict
+        Estimator parameters (without n_estimators)
+    """
+    if model_name == 'XGBoost':
+        return {
+            'max_depth': int(rng.integers(3, 11)),
+            'learning_rate': _log_uniform(rng, 0.01, 0.3),
+            'subsample': float(rng.uniform(0.6, 1.0)),
+            'colsample_bytree': float(rng.uniform(0.5, 1.0)),
+            'min_child_weight': _log_uniform(rng, 1, 10),
+            'reg_lambda': _log_uniform(rng, 0.1, 10)
+        }
+    if model_name == 'LightGBM':
+        return {
+            'num_leaves': int(round(_log_uniform(rng, 15, 255))),
+            'learning_rate': _log_uniform(rng, 0.01, 0.3),
+            'subsample': float(rng.uniform(0.6, 1.0)),
+            'subsample_freq': 1,
+            'colsample_bytree': float(rng.uniform(0.5, 1.0)),
+            'min_child_samples': int(rng.integers(5, 101))
+        }
+    if model_name == 'Random Forest':
+        return {
+            'max_depth': [None, 8, 16, 32][rng.integers(4)],
+            'max_features': ['sqrt', 'log2', 0.5][rng.integers(3)],
+            'min_samples_leaf': int(rng.integers(1, 11))
+        }
+    raise ValueError(f"No search space for model: {model_name}")
+
+
+def make_estimator(model_name, params, n_estimators, random_state=42):
+    """
+    Build an unfitted estimator of a model family.
+    
+    Parameters:
+    -----------
+    model_name : str
+        'XGBoost', 'LightGBM' or 'Random Forest'
+    params : dict
+        Parameters from sample_params
+    n_estimators : int
+        Number of trees (the upper bound when boosters stop early)
+    random_state : int
+        Random seed
+    
+    Returns:
+    --------
+    estimator
+    """
+    if model_name == 'XGBoost':
+        import xgboost as xgb
+        return xgb.XGBClassifier(n_estimators=n_estimators, random_state=random_state,
+                                 eval_metric='logloss', **params)
+    if model_name == 'LightGBM':
+        import lightgbm as lgb
+        return lgb.LGBMClassifier(n_estimators=n_estimators, random_state=random_state,
+                                  verbose=-1, **params)
+    if model_name == 'Random Forest':
+        from sklearn.ensemble import RandomForestClassifier
+        return RandomForestClassifier(n_estimators=n_estimators, random_state=random_state, **params)
+    raise ValueError(f"No search space for model: {model_name}")
+
+
+def _print_trial(record, best):
+    print(f"  [rung {record['Rung']}, {record['Trees']} trees] trial {record['Trial']:>3} "
+          f"{record['Model']:<13} AUC {record['ROC-AUC']:.4f} "
+          f"({record['Fit Seconds']:.1f}s) | best: trial {best['Trial']} {best['Model']} "
+          f"{best['ROC-AUC']:.4f}")
+
+
+def successive_halving(folds, model_names=None, n_trials=27, min_resource=50, max_resource=1000,
+                       eta=3, early_stopping_rounds=20, time_budget=None, n_workers=None,
+                       total_threads=None, random_state=42, on_trial=_print_trial):
+    """
+    Search tree-model hyperparameters by successive halving.
+    
+    Random configurations are scored by their mean ROC-AUC over the folds
+    with a small number of trees. The best 1/eta of them move on to the
+    next rung with eta times more trees, until one configuration is left or
+    max_resource trees are reached. XGBoost and LightGBM also stop early
+    on a validation split of each fold's training part, so the held-out
+    part that ranks the configurations plays no part in fitting them.
+    Every rung runs its (trial, fold) fits in parallel on the shared fold
+    matrices.
+    
+    Parameters:
+    -----------
+    folds : dict
+        Output of training.prepare_cv_folds, built with validation_size
+        when early_stopping_rounds is set
+    model_names : list, optional
+        Model families to search (defaults to SEARCH_MODELS)
+    n_trials : int
+        Number of configurations, split evenly between the families
+    min_resource, max_resource : int
+        Trees in the first and the last rung
+    eta : int
+        Halving rate
+    early_stopping_rounds : int, optional
+        Patience of the booster early stopping (None disables it)
+    time_budget : float, optional
+        Wall-clock budget in seconds; no new fits start once it is spent
+    n_workers : int, optional
+        Number of worker processes
+    total_threads : int, optional
+        Cores to use
+    random_state : int
+        Seed for the configurations and the models
+    on_trial : callable, optional
+        Called with (record, best record) whenever a trial completes a rung
+    
+    Returns:
+    --------
+    pd.DataFrame
+        Leaderboard with the furthest rung of every trial, best first
+    """
+    from sklearn.metrics import roc_auc_score
+    
+    if early_stopping_rounds and not any(key.endswith('/y_valid') for key in folds):
+        raise ValueError("Early stopping needs folds with a validation split (prepare_cv_folds validation_size)")
+    
+    model_names = list(model_names or SEARCH_MODELS)
+    rng = np.random.default_rng(random_state)
+    trials = [{'Trial': trial, 'Model': model_names[trial % len(model_names)]}
+              for trial in range(n_trials)]
+    for trial in trials:
+        trial['Params'] = sample_params(trial['Model'], rng)
+    
+    n_folds = len({key.split('/')[0] for key in folds})
+    deadline = time.perf_counter() + time_budget if time_budget else None
+    records = []
+    best = None
+    
+    survivors = trials
+    rung, resource = 0, min_resource
+    while survivors:
+        fold_results = {trial['Trial']: {} for trial in survivors}
+        by_id = {trial['Trial']: trial for trial in survivors}
+        
+        def collect(key, result):
+            nonlocal best
+            trial_id, fold = key
+            fold_results[trial_id][fold] = result
+            if len(fold_results[trial_id]) < n_folds:
+                return
+            
+            results = [fold_results[trial_id][f] for f in range(n_folds)]
+            failed = [r['error'] for r in results if 'error' in r]
+            if failed:
+                print(f"  [rung {rung}] trial {trial_id} {by_id[trial_id]['Model']}: [ERROR] {failed[0]}")
+                aucs = [np.nan]
+            else:
+                aucs = [roc_auc_score(folds[f'fold{f}/y_test'], r['y_pred_proba'])
+                        for f, r in enumerate(results)]
+            iterations = [r.get('best_iteration') for r in results if r.get('best_iteration') is not None]
+            record = {
+                'Trial': trial_id,
+                'Model': by_id[trial_id]['Model'],
+                'Rung': rung,
+                'Trees': resource,
+                'ROC-AUC': float(np.mean(aucs)),
+                'ROC-AUC std': float(np.std(aucs)),
+                'Best Iteration': int(np.mean(iterations)) if iterations else None,
+                'Fit Seconds': float(sum(r.get('fit_seconds', 0.0) for r in results)),
+                'Params': by_id[trial_id]['Params']
+            }
+            records.append(record)
+            if not np.isnan(record['ROC-AUC']) and (
+                    best is None or (record['Rung'], record['ROC-AUC']) > (best['Rung'], best['ROC-AUC'])):
+                best = record
+            if on_trial is not None and best is not None:
+                on_trial(record, best)
+        
+        tasks = [((trial['Trial'], fold),
+                  make_estimator(trial['Model'], trial['Params'], resource, random_state),
+                  False, f'fold{fold}/', early_stopping_rounds)
+                 for trial in survivors for fold in range(n_folds)]
+        _run_training_tasks(tasks, folds, n_workers, total_threads, on_result=collect, deadline=deadline)
+        
+        finished = sorted((r for r in records if r['Rung'] == rung and not np.isnan(r['ROC-AUC'])),
+                          key=lambda r: r['ROC-AUC'], reverse=True)
+        out_of_time = deadline is not None and time.perf_counter() > deadline
+        if resource >= max_resource or len(finished) <= 1 or out_of_time:
+            break
+        survivors = [by_id[r['Trial']] for r in finished[:max(len(finished) // eta, 1)]]
+        rung, resource = rung + 1, min(resource * eta, max_resource)
+    
+    leaderboard = pd.DataFrame(records, columns=['Trial', 'Model', 'Rung', 'Trees', 'ROC-AUC', 'ROC-AUC std',
+                                                 'Best Iteration', 'Fit Seconds', 'Params'])
+    leaderboard = (leaderboard.sort_values(['Rung', 'ROC-AUC'], ascending=False)
+                   .drop_duplicates(subset='Trial')
+                   .reset_index(drop=True))
+    return leaderboard
+
+
+def best_estimators(leaderboard, random_state=42):
+    """
+    Build the best configuration of each model family from a leaderboard.
+    
+    Boosters get the number of trees they early-stopped at, the others the
+    trees of their last rung.
+    
+    Parameters:
+    -----------
+    leaderboard : pd.DataFrame
+        Output of successive_halving
+    random_state : int
+        Random seed
+    
+    Returns:
+    --------
+    dict
+        '<model> (tuned)' to (estimator, use_scaled), as build_model_zoo
+    """
+    models = {}
+    for _, row in leaderboard.dropna(subset=['ROC-AUC']).drop_duplicates(subset='Model').iterrows():
+        trees = row['Best Iteration'] if pd.notna(row['Best Iteration']) else row['Trees']
+        models[f"{row['Model']} (tuned)"] = (
+            make_estimator(row['Model'], row['Params'], int(trees), random_state), False
+        )
+    return models
+
+
+def format_params(params):
+    """
+    Compact JSON form of a configuration for printing.
+    """
+    return json.dumps({k: round(v, 4) if isinstance(v, float) else v for k, v in params.items()})
@@ -0,0 +1,65 @@
+"""
+Shared fixtures: small synthetic badge extracts in the layout of data/in_out_time.zip.
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parent.parent / 'src'))
+
+
+def make_badge_frames(n_employees=40, n_days=12, random_state=0):
+    """
+    Arrival and departure frames with absences, unbadged departures and late nights.
+    
+    Returns:
+    --------
+    pd.DataFrame, pd.DataFrame
+        in_time and out_time frames (EmployeeID plus one column of
+        'YYYY-MM-DD HH:MM:SS' strings per day, NaN where not badged)
+    """
+    rng = np.random.default_rng(random_state)
+    days = pd.bdate_range('2015-01-01', periods=n_days)
+    shape = (n_employees, n_days)
+    arrival = rng.normal(9.25 * 3600, 1800, shape).clip(6 * 3600, 13 * 3600)
+    departure = arrival + rng.normal(8 * 3600, 3600, shape).clip(1800, None)
+    # A few shifts end after midnight, on the next calendar day
+    departure[rng.random(shape) < 0.03] += 6 * 3600
+    absent = rng.random(shape) < 0.1
+    unbadged = rng.random(shape) < 0.02
+    
+    def timestamps(seconds, missing):
+        values = (days.to_numpy()[np.newaxis, :] + np.round(seconds).astype('timedelta64[s]'))
+        frame = pd.DataFrame(values, columns=days.strftime('%Y-%m-%d')).apply(
+            lambda col: col.dt.strftime('%Y-%m-%d %H:%M:%S')
+        )
+        return frame.mask(missing)
+    
+    in_time = timestamps(arrival, absent)
+    out_time = timestamps(departure, absent | unbadged)
+    employee_ids = np.arange(1, n_employees + 1)
+    in_time.insert(0, 'EmployeeID', employee_ids)
+    out_time.insert(0, 'EmployeeID', employee_ids)
+    return in_time, out_time
+
+
+@pytest.fixture
+def badge_frames():
+    return make_badge_frames()
+
+
+@pytest.fixture
+def badge_csv(tmp_path, badge_frames):
+    """
+    The badge frames written as in_time.csv / out_time.csv with the export's unnamed ID column.
+    """
+    paths = []
+    for name, frame in zip(('in_time', 'out_time'), badge_frames):
+        path = tmp_path / f'{name}.csv'
+        frame.rename(columns={'EmployeeID': ''}).to_csv(path, index=False)
+        paths.append(str(path))
+    return tuple(paths)
@@ -0,0 +1,82 @@
+"""
+Compiled tree ensembles must reproduce the library predictions within 1e-6.
+"""
+
+import numpy as np
+import pytest
+from sklearn.datasets import make_classification
+from sklearn.ensemble import RandomForestClassifier, ExtraTreesClassifier, GradientBoostingClassifier
+
+from compiled_trees import compile_model, load_compiled
+
+
+TOLERANCE = 1e-6
+
+
+@pytest.fixture(scope='module')
+def data():
+    X, y = make_classification(n_samples=600, n_features=12, n_informative=6, weights=[0.8],
+                               random_state=0)
+    return X[:400], y[:400], X[400:]
+
+
+def _with_missing(X, step):
+    X = X.copy()
+    X[::step, 3] = np.nan
+    return X
+
+
+def _fit_booster(name, X_train, y_train, early_stopping):
+    """
+    XGBoost or LightGBM fitted with missing values, optionally early-stopped on a validation split.
+    """
+    X_train = _with_missing(X_train, 11)
+    fit_params = {}
+    if name == 'xgboost':
+        xgb = pytest.importorskip('xgboost')
+        model = xgb.XGBClassifier(n_estimators=60, max_depth=4, eval_metric='logloss', random_state=0,
+                                  early_stopping_rounds=5 if early_stopping else None)
+        fit_params['verbose'] = False
+    else:
+        lgb = pytest.importorskip('lightgbm')
+        model = lgb.LGBMClassifier(n_estimators=60, num_leaves=15, random_state=0, verbose=-1)
+        if early_stopping:
+            fit_params['callbacks'] = [lgb.early_stopping(5, verbose=False)]
+    if early_stopping:
+        fit_params['eval_set'] = [(X_train[300:], y_train[300:])]
+        X_train, y_train = X_train[:300], y_train[:300]
+    return model.fit(X_train, y_train, **fit_params)
+
+
+def assert_compiled_matches(model, X):
+    compiled = compile_model(model)
+    np.testing.assert_allclose(compiled.predict_proba(X), model.predict_proba(X), rtol=0, atol=TOLERANCE)
+    np.testing.assert_array_equal(compiled.predict(X), model.predict(X))
+
+
+@pytest.mark.parametrize('model', [
+    RandomForestClassifier(n_estimators=25, max_depth=8, random_state=0),
+    ExtraTreesClassifier(n_estimators=25, max_depth=8, random_state=0),
+    GradientBoostingClassifier(n_estimators=40, max_depth=3, random_state=0)
+], ids=['random_forest', 'extra_trees', 'gradient_boosting'])
+def test_compiled_sklearn_matches_estimator(data, model):
+    X_train, y_train, X_test = data
+    assert_compiled_matches(model.fit(X_train, y_train), X_test)
+
+
+@pytest.mark.parametrize('early_stopping', [False, True], ids=['full', 'early_stopped'])
+@pytest.mark.parametrize('name', ['xgboost', 'lightgbm'])
+def test_compiled_booster_matches_estimator(data, name, early_stopping):
+    X_train, y_train, X_test = data
+    model = _fit_booster(name, X_train, y_train, early_stopping)
+    # Missing values follow each node's learned (or default) direction
+    assert_compiled_matches(model, _with_missing(X_test, 7))
+
+
+def test_saved_model_is_memory_mapped(tmp_path, data):
+    X_train, y_train, X_test = data
+    model = RandomForestClassifier(n_estimators=10, random_state=0).fit(X_train, y_train)
+    compile_model(model).save(tmp_path / 'compiled')
+    loaded = load_compiled(tmp_path / 'compiled')
+    assert isinstance(loaded.threshold, np.memmap)
+    np.testing.assert_allclose(loaded.predict_proba(X_test), model.predict_proba(X_test), rtol=0, atol=TOLERANCE)
@@ -0,0 +1,71 @@
+"""
+The approximate neighbour index behind 'smote_approx', checked against exact k-NN.
+"""
+
+import numpy as np
+import pytest
+from sklearn.datasets import make_classification
+from sklearn.neighbors import NearestNeighbors
+
+from imbalance import ClusteredNeighbors, resample
+
+pytest.importorskip('imblearn')
+
+K = 6
+
+
+@pytest.fixture(scope='module')
+def X():
+    return np.random.default_rng(0).normal(size=(813, 20))
+
+
+def recall(approx_indices, exact_indices):
+    """
+    Share of the exact neighbours the approximate index also returned.
+    """
+    found = [len(set(approx) & set(exact)) for approx, exact in zip(approx_indices, exact_indices)]
+    return np.sum(found) / exact_indices.size
+
+
+def test_recall_against_exact_neighbors(X):
+    _, exact = NearestNeighbors(n_neighbors=K).fit(X).kneighbors()
+    _, approx = ClusteredNeighbors(n_neighbors=K, random_state=0).fit(X).kneighbors()
+    # Default probing on unclustered 20-dimensional data finds about two thirds
+    assert recall(approx, exact) >= 0.55
+    
+    # Probing every cell is an exact search
+    index = ClusteredNeighbors(n_neighbors=K, random_state=0).fit(X)
+    index.set_params(n_probe=len(index.centroids_))
+    distances, approx = index.kneighbors()
+    exact_distances, _ = NearestNeighbors(n_neighbors=K).fit(X).kneighbors()
+    assert recall(approx, exact) == 1
+    np.testing.assert_allclose(distances, exact_distances, rtol=1e-9, atol=1e-9)
+
+
+def test_kneighbors_without_queries_excludes_each_row(X):
+    _, indices = ClusteredNeighbors(n_neighbors=K, random_state=0).fit(X).kneighbors()
+    assert indices.shape == (len(X), K)
+    assert not (indices == np.arange(len(X))[:, None]).any()
+    
+    # A duplicated row keeps its twin as a neighbour but never itself
+    duplicated = np.vstack([X[:100], X[:1]])
+    _, indices = ClusteredNeighbors(n_neighbors=K, random_state=0).fit(duplicated).kneighbors()
+    assert not (indices == np.arange(len(duplicated))[:, None]).any()
+    assert 100 in indices[0] and 0 in indices[100]
+
+
+def test_kneighbors_rejects_too_few_probed_rows(X):
+    # One row per cell, so a single probed cell cannot hold k rows
+    index = ClusteredNeighbors(n_neighbors=K, n_cells=50, n_probe=1, random_state=0).fit(X[:50])
+    with pytest.raises(ValueError, match='probed cells'):
+        index.kneighbors(X[:5])
+    with pytest.raises(ValueError, match='n_neighbors'):
+        index.kneighbors(n_neighbors=50)
+
+
+def test_smote_approx_balances_classes():
+    X, y = make_classification(n_samples=600, n_features=10, weights=[0.85], random_state=0)
+    X_resampled, y_resampled = resample(X, y, 'smote_approx', random_state=0)
+    negatives = int((y == 0).sum())
+    assert np.bincount(y_resampled).tolist() == [negatives, negatives]
+    np.testing.assert_array_equal(X_resampled[:len(X)], X)
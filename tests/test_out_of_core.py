@@ -0,0 +1,87 @@
+"""
+The out-of-core path must produce the same data as the in-memory pipeline.
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LogisticRegression
+from sklearn.preprocessing import StandardScaler
+
+from data_loader import (
+    iter_merged_chunks, load_general_data, load_manager_survey, load_employee_survey, load_working_hours_data,
+    merge_all_data
+)
+from preprocessing import PreprocessingPipeline, prepare_features_for_modeling
+from out_of_core import holdout_mask, write_feature_chunks, predict_chunks
+
+sys.path.append(str(Path(__file__).resolve().parent.parent / 'benchmarks'))
+from generate_hr_data import generate_dataset
+
+
+@pytest.fixture(scope='module')
+def extract(tmp_path_factory):
+    path = tmp_path_factory.mktemp('extract')
+    generate_dataset(path, 500, n_days=15, badge_format='csv')
+    return {name: str(path / f'{name}.csv') for name in
+            ('general_data', 'manager_survey_data', 'employee_survey_data', 'in_time', 'out_time')}
+
+
+def merged_chunks(extract, chunk_rows):
+    return iter_merged_chunks(extract['general_data'], extract['manager_survey_data'],
+                              extract['employee_survey_data'], in_time_path=extract['in_time'],
+                              out_time_path=extract['out_time'], chunk_rows=chunk_rows)
+
+
+@pytest.fixture(scope='module')
+def merged(extract):
+    in_time, out_time = load_working_hours_data(None, extract['in_time'], extract['out_time'])
+    return merge_all_data(load_general_data(extract['general_data']),
+                          load_manager_survey(extract['manager_survey_data']),
+                          load_employee_survey(extract['employee_survey_data']), in_time, out_time)
+
+
+@pytest.mark.parametrize('chunk_rows', [64, 1000])
+def test_merged_chunks_match_in_memory_merge(extract, merged, chunk_rows):
+    streamed = pd.concat(merged_chunks(extract, chunk_rows), ignore_index=True)
+    # Chunks holding different category subsets concatenate to object columns
+    categorical = merged.select_dtypes('category').columns
+    pd.testing.assert_frame_equal(streamed.astype({col: object for col in categorical}),
+                                  merged.astype({col: object for col in categorical}), check_exact=True)
+
+
+def test_feature_chunks_match_in_memory_transform(tmp_path, extract, merged):
+    preprocessor = PreprocessingPipeline(strategy='median', target_col='Attrition')
+    X, y = prepare_features_for_modeling(preprocessor.fit_transform(merged), target_col='Attrition')
+    feature_columns = list(X.columns)
+    train, test, scaler = write_feature_chunks(merged_chunks(extract, 64), preprocessor, feature_columns,
+                                               tmp_path, test_size=0.2)
+    
+    in_test = holdout_mask(merged['EmployeeID'].to_numpy(), 0.2)
+    X = X.to_numpy(dtype=np.float64)
+    y = np.asarray(y)
+    X_train = np.concatenate([X for X, _ in train])
+    y_train = np.concatenate([y for _, y in train])
+    X_test = np.concatenate([X for X, _ in test])
+    y_test = np.concatenate([y for _, y in test])
+    
+    # Chunks store float32 features
+    np.testing.assert_array_equal(X_train, X[~in_test].astype(np.float32))
+    np.testing.assert_array_equal(y_train, y[~in_test])
+    np.testing.assert_array_equal(X_test, X[in_test].astype(np.float32))
+    np.testing.assert_array_equal(y_test, y[in_test])
+    assert train.class_counts == (int((y[~in_test] == 0).sum()), int((y[~in_test] == 1).sum()))
+    
+    # Scaler statistics merged chunk by chunk equal a fit on all training rows
+    full = StandardScaler().fit(X[~in_test])
+    np.testing.assert_allclose(scaler.mean_, full.mean_, rtol=1e-12, atol=1e-12)
+    np.testing.assert_allclose(scaler.var_, full.var_, rtol=1e-10, atol=1e-12)
+    assert scaler.n_samples_seen_ == full.n_samples_seen_
+    
+    model = LogisticRegression(max_iter=1000).fit(scaler.transform(X_train), y_train)
+    labels, scores = predict_chunks(model, test, scaler)
+    np.testing.assert_array_equal(labels, y_test)
+    np.testing.assert_allclose(scores, model.predict_proba(scaler.transform(X_test))[:, 1], rtol=0, atol=1e-12)
@@ -0,0 +1,47 @@
+"""
+Tuned boosters must be rebuilt with exactly the trees early stopping kept.
+"""
+
+import pytest
+from sklearn.datasets import make_classification
+
+from training import prepare_cv_folds, _fit_and_predict
+from tuning import successive_halving, best_estimators, make_estimator
+
+pytest.importorskip('xgboost')
+pytest.importorskip('lightgbm')
+
+MAX_TREES = 300
+
+
+def kept_trees(model):
+    """
+    Trees of an early-stopped booster, read from the library itself.
+    """
+    if type(model).__module__.startswith('lightgbm'):
+        return model.booster_.num_trees()
+    return model.best_iteration + 1
+
+
+@pytest.fixture(scope='module')
+def single_fold():
+    X, y = make_classification(n_samples=800, n_features=10, n_informative=4, flip_y=0.2, random_state=0)
+    folds = prepare_cv_folds(X, y, n_splits=2, random_state=0, resample=False, validation_size=0.25)
+    # One fold, so the leaderboard's tree count is that fold's, not a mean over folds
+    return {key: value for key, value in folds.items() if key.startswith('fold0/')}
+
+
+def test_best_estimators_keep_early_stopped_tree_count(single_fold):
+    leaderboard = successive_halving(single_fold, model_names=['XGBoost', 'LightGBM'], n_trials=2,
+                                     min_resource=MAX_TREES, max_resource=MAX_TREES, early_stopping_rounds=5,
+                                     n_workers=1, random_state=0, on_trial=None)
+    models = best_estimators(leaderboard, random_state=0)
+    
+    for _, row in leaderboard.iterrows():
+        result = _fit_and_predict(make_estimator(row['Model'], row['Params'], MAX_TREES, random_state=0),
+                                  False, single_fold, threads=1, prefix='fold0/', early_stopping_rounds=5)
+        trees = kept_trees(result['model'])
+        assert trees < MAX_TREES, f"{row['Model']} did not stop early"
+        assert result['best_iteration'] == trees
+        estimator, _ = models[f"{row['Model']} (tuned)"]
+        assert estimator.get_params()['n_estimators'] == trees
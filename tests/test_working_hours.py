@@ -0,0 +1,130 @@
+"""
+Equivalence checks of the working-hours feature paths.
+"""
+
+import zipfile
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_loader import (
+    load_working_hours_data, process_working_hours, process_working_hours_streaming, init_working_hours_state,
+    update_working_hours_state, working_hours_state_features, save_working_hours_state, load_working_hours_state
+)
+
+
+def reference_working_hours(in_time_df, out_time_df):
+    """
+    The original per-employee, per-day loop the vectorized engine replaced.
+    """
+    time_cols = [col for col in in_time_df.columns if col != 'EmployeeID']
+    rows = []
+    for emp_id in in_time_df['EmployeeID']:
+        emp_in = in_time_df[in_time_df['EmployeeID'] == emp_id].iloc[0]
+        emp_out = out_time_df[out_time_df['EmployeeID'] == emp_id].iloc[0]
+        daily_hours = []
+        late_arrivals = 0
+        early_departures = 0
+        for col in time_cols:
+            in_time = pd.to_datetime(emp_in[col], errors='coerce')
+            out_time = pd.to_datetime(emp_out[col], errors='coerce')
+            if pd.notna(in_time) and pd.notna(out_time):
+                daily_hours.append((out_time - in_time).total_seconds() / 3600)
+                if in_time.hour > 9 or (in_time.hour == 9 and in_time.minute > 30):
+                    late_arrivals += 1
+                if out_time.hour < 17 or (out_time.hour == 17 and out_time.minute < 30):
+                    early_departures += 1
+        total_days = len(daily_hours)
+        rows.append({
+            'EmployeeID': emp_id,
+            'AvgWorkingHours': np.mean(daily_hours) if daily_hours else np.nan,
+            'StdWorkingHours': np.std(daily_hours) if daily_hours else np.nan,
+            'TotalWorkingDays': total_days,
+            'LateArrivals': late_arrivals,
+            'EarlyDepartures': early_departures,
+            'LateArrivalRate': late_arrivals / total_days if total_days > 0 else 0,
+            'EarlyDepartureRate': early_departures / total_days if total_days > 0 else 0
+        })
+    return pd.DataFrame(rows)
+
+
+def assert_same_features(actual, expected):
+    """
+    Counts and rates must match exactly; mean and std up to summation order.
+    """
+    actual = actual.sort_values('EmployeeID').reset_index(drop=True)
+    expected = expected.sort_values('EmployeeID').reset_index(drop=True)
+    assert list(actual.columns) == list(expected.columns)
+    for col in ['EmployeeID', 'TotalWorkingDays', 'LateArrivals', 'EarlyDepartures',
+                'LateArrivalRate', 'EarlyDepartureRate']:
+        np.testing.assert_array_equal(actual[col].to_numpy(), expected[col].to_numpy(), err_msg=col)
+    for col in ['AvgWorkingHours', 'StdWorkingHours']:
+        np.testing.assert_allclose(actual[col].to_numpy(), expected[col].to_numpy(), rtol=1e-12, atol=1e-12,
+                                   err_msg=col)
+
+
+def test_vectorized_matches_reference_loop(badge_frames):
+    in_time, out_time = badge_frames
+    assert_same_features(process_working_hours(in_time, out_time), reference_working_hours(in_time, out_time))
+
+
+def test_vectorized_aligns_shuffled_departures(badge_frames):
+    in_time, out_time = badge_frames
+    shuffled = out_time.sample(frac=1, random_state=0).reset_index(drop=True)
+    assert_same_features(process_working_hours(in_time, shuffled), process_working_hours(in_time, out_time))
+
+
+@pytest.mark.parametrize('chunksize', [1, 7, 1000])
+def test_streaming_matches_in_memory(badge_csv, chunksize):
+    in_path, out_path = badge_csv
+    expected = process_working_hours(*load_working_hours_data(None, in_path, out_path))
+    streamed = process_working_hours_streaming(None, in_path, out_path, chunksize=chunksize)
+    pd.testing.assert_frame_equal(streamed, expected, check_exact=True)
+
+
+def test_streaming_from_zip_matches_in_memory(tmp_path, badge_csv):
+    in_path, out_path = badge_csv
+    zip_path = tmp_path / 'in_out_time.zip'
+    with zipfile.ZipFile(zip_path, 'w') as archive:
+        archive.write(in_path, 'in_time.csv')
+        archive.write(out_path, 'out_time.csv')
+    expected = process_working_hours(*load_working_hours_data(None, in_path, out_path))
+    streamed = process_working_hours_streaming(str(zip_path), chunksize=5)
+    pd.testing.assert_frame_equal(streamed, expected, check_exact=True)
+
+
+def test_streaming_rejects_misaligned_files(tmp_path, badge_frames):
+    in_time, out_time = badge_frames
+    in_path, out_path = tmp_path / 'in_time.csv', tmp_path / 'out_time.csv'
+    in_time.to_csv(in_path, index=False)
+    out_time.iloc[::-1].to_csv(out_path, index=False)
+    with pytest.raises(ValueError):
+        process_working_hours_streaming(None, str(in_path), str(out_path), chunksize=5)
+
+
+def test_incremental_update_matches_batch_recompute(tmp_path, badge_frames):
+    in_time, out_time = badge_frames
+    days = [col for col in in_time.columns if col != 'EmployeeID']
+    # The last employees only start badging in the incremental days
+    in_time.iloc[-5:, 1:7] = np.nan
+    out_time.iloc[-5:, 1:7] = np.nan
+    history = ['EmployeeID'] + days[:6]
+    state = init_working_hours_state(in_time[history].iloc[:-5], out_time[history].iloc[:-5])
+    
+    for new_days in ([days[6]], days[7:9], days[9:]):
+        columns = ['EmployeeID'] + new_days
+        state = update_working_hours_state(state, in_time[columns], out_time[columns])
+        save_working_hours_state(state, tmp_path / 'state.npz')
+        state = load_working_hours_state(tmp_path / 'state.npz')
+    
+    assert state.attrs['days'] == days
+    assert_same_features(working_hours_state_features(state), process_working_hours(in_time, out_time))
+
+
+def test_incremental_update_refuses_applied_days(badge_frames):
+    in_time, out_time = badge_frames
+    state = init_working_hours_state(in_time, out_time)
+    columns = ['EmployeeID', in_time.columns[-1]]
+    with pytest.raises(ValueError):
+        update_working_hours_state(state, in_time[columns], out_time[columns])
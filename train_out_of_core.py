@@ -0,0 +1,145 @@
+"""
+Out-of-core training on HR extracts too large to hold in memory.
+
+Streams the extract in chunks of employees instead of materializing it:
+fits the preprocessing state on a sample, writes preprocessed feature
+chunks to disk while computing the scaler statistics in the same pass,
+then trains a logistic regression with SGD partial_fit and XGBoost from
+its external-memory iterator, and evaluates both on held-out employees.
+The better model is saved with its preprocessing state, in the layout
+score.py and serve.py read.
+
+Usage:
+    python train_out_of_core.py --general big/general_data.csv \
+        --manager-survey big/manager_survey_data.csv \
+        --employee-survey big/employee_survey_data.csv --badge-zip big/in_out_time.zip \
+        --chunk-rows 100000
+
+The badge features come from data/in_out_time.zip by default, like
+run_analysis.py; without badge data the script warns and trains without
+them, and --no-badge drops them deliberately.
+"""
+
+import os
+import sys
+import time
+import argparse
+sys.path.append('src')
+
+import numpy as np
+import pandas as pd
+
+from data_loader import WORKING_HOURS_FEATURES, iter_merged_chunks
+from out_of_core import (
+    fit_preprocessor_on_sample, write_feature_chunks, balanced_class_weight, train_incremental,
+    train_xgboost_external_memory, predict_chunks
+)
+from model_evaluation import evaluate_model
+from model_io import save_model
+import instrumentation
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Out-of-core training of the attrition models')
+    parser.add_argument('--general', default='data/general_data.csv')
+    parser.add_argument('--manager-survey', default='data/manager_survey_data.csv')
+    parser.add_argument('--employee-survey', default='data/employee_survey_data.csv')
+    parser.add_argument('--badge-zip', default='data/in_out_time.zip', help='in_out_time.zip with the badge data')
+    parser.add_argument('--in-time', default=None, help='in_time.csv (instead of --badge-zip)')
+    parser.add_argument('--out-time', default=None, help='out_time.csv (instead of --badge-zip)')
+    parser.add_argument('--no-badge', action='store_true',
+                        help='train without the badge-derived working-hours features')
+    parser.add_argument('--chunk-rows', type=int, default=100_000,
+                        help='employees read, transformed and fitted per chunk; bounds peak memory')
+    parser.add_argument('--sample-rows', type=int, default=100_000,
+                        help='rows the imputation and encoding state is fitted on')
+    parser.add_argument('--test-size', type=float, default=0.2)
+    parser.add_argument('--epochs', type=int, default=5, help='passes of SGD over the training chunks')
+    parser.add_argument('--boost-rounds', type=int, default=100, help='XGBoost boosting rounds')
+    parser.add_argument('--work-dir', default='data/.out_of_core',
+                        help='directory of the feature chunks and XGBoost pages')
+    parser.add_argument('--artifacts-dir', default='models/out_of_core',
+                        help='directory receiving the best model and its preprocessing state')
+    parser.add_argument('--max-memory-mb', type=float, default=256,
+                        help='memory ceiling per chunk when streaming the badge files')
+    parser.add_argument('--run-log', default=None,
+                        help='JSONL file receiving per-stage timings and memory (default: <artifacts-dir>/run_log.jsonl)')
+    args = parser.parse_args(argv)
+    
+    if args.no_badge:
+        args.badge_zip = args.in_time = args.out_time = None
+    elif not (args.in_time and args.out_time) and not os.path.exists(args.badge_zip):
+        # Same fallback as run_analysis.py, but said out loud: the model will lack these inputs
+        print(f"[WARNING] No badge data at {args.badge_zip}: training without the working-hours features "
+              f"({', '.join(WORKING_HOURS_FEATURES)}). Pass --no-badge to do this deliberately.")
+        args.badge_zip = None
+    
+    os.makedirs(args.artifacts_dir, exist_ok=True)
+    run_log = instrumentation.configure(args.run_log or os.path.join(args.artifacts_dir, 'run_log.jsonl'))
+    
+    def chunks():
+        return iter_merged_chunks(args.general, args.manager_survey, args.employee_survey,
+                                  zip_path=args.badge_zip, in_time_path=args.in_time,
+                                  out_time_path=args.out_time, chunk_rows=args.chunk_rows,
+                                  max_memory_mb=args.max_memory_mb)
+    
+    print("=" * 60)
+    print("OUT-OF-CORE TRAINING")
+    print("=" * 60)
+    
+    print(f"\n[1/4] Fitting preprocessing on a sample of {args.sample_rows:,} rows...")
+    with instrumentation.stage('fit_preprocessing') as record:
+        preprocessor, feature_columns, n_rows = fit_preprocessor_on_sample(chunks(), args.sample_rows)
+        record['rows'] = n_rows
+    print(f"[OK] {n_rows:,} employees, {len(feature_columns)} features")
+    
+    print(f"\n[2/4] Writing feature chunks of {args.chunk_rows:,} rows...")
+    with instrumentation.stage('write_chunks', rows=n_rows):
+        train, test, scaler = write_feature_chunks(chunks(), preprocessor, feature_columns,
+                                                   args.work_dir, test_size=args.test_size)
+    negatives, positives = train.class_counts
+    print(f"[OK] Training: {len(train):,} rows in {len(train.chunks)} chunks "
+          f"({positives / len(train) * 100:.2f}% attrition), test: {len(test):,} rows")
+    
+    print("\n[3/4] Training models...")
+    from sklearn.linear_model import SGDClassifier
+    
+    models = {}
+    start = time.perf_counter()
+    with instrumentation.stage('fit:Logistic Regression (SGD)', rows=len(train)):
+        # Balanced class weights stand in for SMOTE, which needs all rows in memory
+        sgd = SGDClassifier(loss='log_loss', alpha=1e-4, class_weight=balanced_class_weight(train),
+                            random_state=42)
+        models['Logistic Regression (SGD)'] = (train_incremental(sgd, train, scaler, epochs=args.epochs), True)
+    print(f"  Logistic Regression (SGD): {args.epochs} epochs in {time.perf_counter() - start:.2f}s")
+    
+    start = time.perf_counter()
+    with instrumentation.stage('fit:XGBoost (external memory)', rows=len(train)):
+        xgb_model = train_xgboost_external_memory(train, os.path.join(args.work_dir, 'xgb_cache'),
+                                                  num_boost_round=args.boost_rounds)
+        models['XGBoost (external memory)'] = (xgb_model, False)
+    print(f"  XGBoost (external memory): {args.boost_rounds} rounds in {time.perf_counter() - start:.2f}s")
+    
+    print("\n[4/4] Evaluating on held-out employees...")
+    results = []
+    for name, (model, use_scaled) in models.items():
+        with instrumentation.stage(f'evaluate:{name}', rows=len(test)):
+            y_test, y_score = predict_chunks(model, test, scaler if use_scaled else None)
+            results.append(evaluate_model(y_test, (y_score >= 0.5).astype(np.int8), y_score, model_name=name))
+    results_df = pd.DataFrame(results).sort_values('ROC-AUC', ascending=False)
+    print("\n" + results_df.to_string(index=False))
+    
+    best_name = results_df.iloc[0]['Model']
+    best_model, use_scaled = models[best_name]
+    preprocessor.set_model_inputs(feature_columns, scaler)
+    preprocessor.save(os.path.join(args.artifacts_dir, 'preprocessing.json'))
+    save_model(best_model, best_name, use_scaled, model_dir=args.artifacts_dir)
+    print(f"\nBest model: {best_name} -> {args.artifacts_dir} (score with: python score.py "
+          f"--model-dir {args.artifacts_dir})")
+    
+    instrumentation.summarize([record for record in run_log.records if 'parent' not in record])
+    print(f"Run log: {run_log.path} (run {run_log.run_id})")
+
+
+if __name__ == '__main__':
+    main()